@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -88,6 +89,17 @@ DATABASES = {
     }
 }
 
+# LEARNPROOF_DB=sqlite runs against a local file instead, e.g. for trying
+# out search (FTS5) without Postgres
+if os.environ.get("LEARNPROOF_DB") == "sqlite":
+    DATABASES["default"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "db.sqlite3",
+        # a file rather than shared-cache :memory:, where threaded tests fail
+        # with "table is locked" instead of waiting for the writer
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -133,3 +145,83 @@ CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",  # Vite frontend dev server
 ]
 
+
+# Firebase ID tokens are verified locally against Google's public signing keys.
+# The project id falls back to the one in the service account key file.
+FIREBASE_PROJECT_ID = None
+FIREBASE_SERVICE_ACCOUNT_KEY = "./learnproof_serviceaccountkey.json"
+FIREBASE_TOKEN_CACHE_SIZE = 10000
+
+REST_FRAMEWORK = {
+    "DEFAULT_AUTHENTICATION_CLASSES": [
+        "core.authentication.FirebaseAuthentication",
+    ],
+    "DEFAULT_PERMISSION_CLASSES": [
+        "core.authentication.HasUserProfile",
+    ],
+}
+
+# Per-process by default; point this at a shared cache (Redis/Memcached) when
+# running several workers so invalidations reach all of them.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+# YouTube Data API. The key falls back to the YOUTUBE_API_KEY env var and then
+# core/utils/apikey.py; the root URL can point at a local stand-in server.
+YOUTUBE_API_KEY = None
+YOUTUBE_API_ROOT_URL = None
+YOUTUBE_HTTP_TIMEOUT = 30
+YOUTUBE_DISCOVERY_DOCUMENT = BASE_DIR / "youtube.v3.discovery.json"
+
+# Seconds before cached YouTube metadata is revalidated (with If-None-Match).
+YOUTUBE_CACHE_TTL = {
+    "video": 24 * 60 * 60,
+    "playlist": 60 * 60,
+}
+# Threads used to fetch per-video details while playlist pages are paged in.
+YOUTUBE_ENRICH_WORKERS = 4
+# Connections each ASGI worker's event loop keeps to the API for the async views.
+YOUTUBE_ASYNC_MAX_CONNECTIONS = 100
+
+# Playlist import jobs (manage.py run_import_worker). A running job whose
+# worker has not committed a page for IMPORT_JOB_STALE_AFTER seconds is
+# picked up again from its last committed page.
+IMPORT_JOB_STALE_AFTER = 300
+IMPORT_JOB_MAX_ATTEMPTS = 3
+
+# "buffered" queues activity events and writes them in batches (events
+# queued when a worker is killed are lost); "sync" writes each in-request
+ACTIVITY_WRITE_MODE = "buffered"
+ACTIVITY_BUFFER_SIZE = 100
+ACTIVITY_FLUSH_INTERVAL = 2.0
+ACTIVITY_MAX_PENDING = 10000
+
+# "db", "memory" (single process only) or "redis"; see core.utils.leaderboard
+LEADERBOARD_BACKEND = "db"
+LEADERBOARD_BUCKET_WIDTH = 100
+LEADERBOARD_REDIS_URL = None
+
+# processes generating quiz questions (0 = in the request); see core.utils.quiz_cache
+QUIZ_GENERATOR_WORKERS = 2
+QUIZ_GENERATION_TIMEOUT = 10
+
+# Rendered certificate PDFs, stored by content hash; see core.utils.certificates.
+# Processes rendering them after the issuing transaction commits (0 = in the
+# request thread, right after the commit).
+CERTIFICATE_ROOT = BASE_DIR / "media" / "certificates"
+CERTIFICATE_RENDER_WORKERS = 2
+
+# Public certificate verification (see core.utils.verification): how long the
+# cache holds a response, how long unknown IDs are remembered, and the
+# Cache-Control max-age, which bounds how long shared caches may serve a
+# certificate that has since been revoked.
+CERTIFICATE_VERIFICATION_TTL = 24 * 60 * 60
+CERTIFICATE_VERIFICATION_MISS_TTL = 60
+CERTIFICATE_VERIFICATION_MAX_AGE = 60
+
+# Seconds per-user version stamps (core.utils.versions) are kept; one that
+# expires only costs its user a full response on the next conditional GET.
+USER_VERSION_TTL = 7 * 24 * 60 * 60
@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
 
 application = get_wsgi_application()
+
+# Parse the YouTube discovery document and build the first API client before
+# the first request instead of during it.
+from core.utils.youtube_client import warm_youtube_client  # noqa: E402
+
+warm_youtube_client()
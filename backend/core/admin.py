@@ -1,9 +1,43 @@
 from django.contrib import admin
-from .models import Certificate , Playlist , Video , UserProfile, Quiz , UserActivityLog
+from django.utils import timezone
+from .utils.verification import revoke_certificates
+from .models import Certificate , Playlist , Video , UserProfile, Quiz , QuizQuestionSet, UserActivityLog, UserActivityDaily, XPLedger, YouTubeMetadataCache, YouTubePlaylist, YouTubeVideo
 # Register your models here.
-admin.site.register(Certificate)
 admin.site.register(Playlist)
 admin.site.register(Video)
 admin.site.register(UserProfile)
 admin.site.register(Quiz)
-admin.site.register(UserActivityLog)
\ No newline at end of file
+admin.site.register(QuizQuestionSet)
+admin.site.register(UserActivityLog)
+admin.site.register(UserActivityDaily)
+admin.site.register(XPLedger)
+
+
+@admin.register(YouTubeVideo, YouTubePlaylist)
+class YouTubeCatalogAdmin(admin.ModelAdmin):
+    list_display = ("__str__", "url", "updated_at")
+    search_fields = ("name",)
+
+
+@admin.register(YouTubeMetadataCache)
+class YouTubeMetadataCacheAdmin(admin.ModelAdmin):
+    list_display = ("content_type", "content_id", "etag", "fetched_at", "expires_at")
+    list_filter = ("content_type",)
+    search_fields = ("content_id",)
+    actions = ["expire"]
+
+    @admin.action(description="Expire selected entries (revalidate on next import)")
+    def expire(self, request, queryset):
+        queryset.update(expires_at=timezone.now())
+
+
+@admin.register(Certificate)
+class CertificateAdmin(admin.ModelAdmin):
+    list_display = ("certificate_id", "user", "title", "issued_at", "revoked_at")
+    list_select_related = ("user",)
+    search_fields = ("certificate_id", "title")
+    actions = ["revoke"]
+
+    @admin.action(description="Revoke selected certificates")
+    def revoke(self, request, queryset):
+        self.message_user(request, f"Revoked {revoke_certificates(queryset)} certificates")
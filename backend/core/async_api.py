@@ -0,0 +1,60 @@
+import json
+
+from django.http import JsonResponse
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException, NotAuthenticated, NotFound, ParseError
+
+from .authentication import FirebaseAuthentication, FirebaseUser, aget_profile_id
+from .utils.firebase import averify_firebase_token
+
+
+class AsyncAPIView(View):
+    """Base for async views, which DRF's APIView can't run.
+
+    Does the part of APIView our endpoints rely on: the JSON body as
+    ``request.data``, Firebase authentication from the Authorization header
+    or ``idToken`` (``request.user`` is a FirebaseUser, ``request.auth``
+    the claims), HasUserProfile unless ``require_profile`` is False, and
+    DRF exceptions turned into ``{"detail": ...}`` responses. Handlers
+    return JsonResponse.
+    """
+
+    require_profile = True
+    http_method_names = ["post", "options"]
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        # token auth, like APIView: no session, so no CSRF
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            request.data = self.parse(request)
+            await self.authenticate(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except APIException as e:
+            response = JsonResponse({"detail": str(e.detail)}, status=e.status_code)
+            if e.status_code == 401:
+                response["WWW-Authenticate"] = FirebaseAuthentication.keyword
+            return response
+
+    def parse(self, request):
+        if not request.body:
+            return {}
+        try:
+            data = json.loads(request.body)
+        except ValueError as e:
+            raise ParseError(f"JSON parse error - {e}")
+        return data if isinstance(data, dict) else {}
+
+    async def authenticate(self, request):
+        id_token = FirebaseAuthentication().get_token(request)
+        if not id_token:
+            raise NotAuthenticated()
+        claims = await averify_firebase_token(id_token)
+        request.user = FirebaseUser(claims, await aget_profile_id(claims["uid"]))
+        request.auth = claims
+        if self.require_profile and request.user.profile_id is None:
+            raise NotFound("User not found")
@@ -0,0 +1,109 @@
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.exceptions import NotFound
+from rest_framework.permissions import BasePermission
+
+from .models import UserProfile
+from .utils.firebase import verify_firebase_token
+
+PROFILE_ID_TTL = 60 * 60
+
+
+def profile_id_cache_key(uid):
+    return f"profile-id:{uid}"
+
+
+def get_profile_id(uid):
+    """uid -> UserProfile.id, cached across requests."""
+    key = profile_id_cache_key(uid)
+    profile_id = cache.get(key)
+    if profile_id is None:
+        profile_id = UserProfile.objects.filter(uid=uid).values_list("id", flat=True).first()
+        if profile_id is not None:
+            cache.set(key, profile_id, PROFILE_ID_TTL)
+    return profile_id
+
+
+async def aget_profile_id(uid):
+    key = profile_id_cache_key(uid)
+    profile_id = await cache.aget(key)
+    if profile_id is None:
+        profile_id = await UserProfile.objects.filter(uid=uid).values_list("id", flat=True).afirst()
+        if profile_id is not None:
+            await cache.aset(key, profile_id, PROFILE_ID_TTL)
+    return profile_id
+
+
+def forget_profile_id(uid):
+    cache.delete(profile_id_cache_key(uid))
+
+
+class FirebaseUser:
+    """What ``request.user`` is for Firebase-authenticated requests.
+
+    Views that only need to filter by owner use ``profile_id`` and never touch
+    the profile row; ``profile`` loads it at most once per request.
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, claims, profile_id=None):
+        self.claims = claims
+        self.uid = claims["uid"]
+        self.profile_id = profile_id
+
+    @property
+    def pk(self):
+        return self.profile_id
+
+    @cached_property
+    def profile(self):
+        if self.profile_id is None:
+            return None
+        try:
+            return UserProfile.objects.get(pk=self.profile_id)
+        except UserProfile.DoesNotExist:
+            forget_profile_id(self.uid)
+            return None
+
+    def __str__(self):
+        return self.uid
+
+
+class FirebaseAuthentication(BaseAuthentication):
+    """Authenticates with a Firebase ID token sent either as
+    ``Authorization: Bearer <token>`` or as ``idToken`` in the request body."""
+
+    keyword = "Bearer"
+
+    def authenticate(self, request):
+        id_token = self.get_token(request)
+        if not id_token:
+            return None
+
+        claims = verify_firebase_token(id_token)
+        return FirebaseUser(claims, get_profile_id(claims["uid"])), claims
+
+    def get_token(self, request):
+        auth = get_authorization_header(request).split()
+        if auth and auth[0].lower() == self.keyword.lower().encode():
+            if len(auth) == 2:
+                return auth[1].decode()
+            return None
+        return request.data.get("idToken")
+
+    def authenticate_header(self, request):
+        return self.keyword
+
+
+class HasUserProfile(BasePermission):
+    """Signed in with Firebase and already has a UserProfile (404 otherwise)."""
+
+    def has_permission(self, request, view):
+        if not isinstance(request.user, FirebaseUser):
+            return False
+        if request.user.profile_id is None:
+            raise NotFound("User not found")
+        return True
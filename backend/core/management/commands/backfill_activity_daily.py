@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+from core.models import UserActivityDaily, UserActivityLog, UserProfile
+from core.utils.activity import parse_timezone
+
+
+class Command(BaseCommand):
+    help = "Rebuild UserActivityDaily from UserActivityLog, bucketed by each user's timezone"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, action="append", help="Only rebuild these profile ids")
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        profiles = UserProfile.objects.all()
+        if options["user"]:
+            profiles = profiles.filter(pk__in=options["user"])
+
+        # one GROUP BY per distinct timezone rather than one per user
+        zones = profiles.order_by().values_list("timezone", flat=True).distinct()
+        written = 0
+        for name in zones:
+            tz = parse_timezone(name)
+            if tz is None:
+                raise CommandError(f"Unknown timezone {name!r}")
+            written += self.rebuild(profiles.filter(timezone=name), tz, options["batch_size"])
+
+        self.stdout.write(f"Wrote {written} daily rows")
+
+    def rebuild(self, profiles, tz, batch_size):
+        counts = (
+            UserActivityLog.objects.filter(user__in=profiles)
+            .annotate(date=TruncDate("timestamp", tzinfo=tz))
+            .values("user_id", "date", "activity_type")
+            .annotate(count=Count("id"))
+            .order_by()
+        )
+
+        written = 0
+        with transaction.atomic():
+            UserActivityDaily.objects.filter(user__in=profiles).delete()
+            batch = []
+            for row in counts.iterator(chunk_size=batch_size):
+                batch.append(UserActivityDaily(**row))
+                if len(batch) >= batch_size:
+                    written += len(UserActivityDaily.objects.bulk_create(batch))
+                    batch = []
+            written += len(UserActivityDaily.objects.bulk_create(batch))
+        return written
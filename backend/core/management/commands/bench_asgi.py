@@ -0,0 +1,145 @@
+import asyncio
+import json
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from core.models import UserProfile, YouTubeMetadataCache
+from core.testing.firebase import FakeFirebase
+from core.testing.youtube_server import FakeYouTubeServer
+from core.utils.youtube_client import reset_youtube_clients, stats
+
+UID = "bench-asgi"
+MODES = ["sync_threads", "sync_asgi", "async"]
+
+
+def app_threads():
+    # the YouTube stand-in runs in this process too; leave its threads out
+    return sum(1 for t in threading.enumerate() if "process_request" not in t.name)
+
+
+async def asgi_post(app, path, body, headers):
+    """POST ``body`` to the ASGI ``app`` in-process; the response status."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [
+            (b"host", b"localhost"), (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()), *headers,
+        ],
+        "client": ("127.0.0.1", 50000), "server": ("localhost", 80),
+    }
+    received = False
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # the client never disconnects; Django cancels this once it has answered
+        await asyncio.Future()
+
+    status = None
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+class Command(BaseCommand):
+    help = (
+        "Load the ASGI application in-process with concurrent imports against a YouTube stand-in "
+        "with injected latency, through the sync and the async import views"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=400)
+        parser.add_argument("--concurrency", type=int, default=200, help="Requests in flight at once")
+        parser.add_argument("--latency", type=float, default=0.2, help="Seconds added to every API call")
+        parser.add_argument("--threads", type=int, default=8,
+                            help="Threads of the sync worker being compared (e.g. gunicorn gthread)")
+        parser.add_argument("--mode", action="append", choices=MODES, help="Only run these modes")
+
+    def handle(self, *args, **options):
+        from backend.asgi import application
+
+        firebase = FakeFirebase()
+        user = UserProfile.objects.create(uid=UID, email=f"{UID}@example.com", name=UID)
+        results = {}
+        try:
+            with firebase, FakeYouTubeServer(latency=options["latency"]) as server:
+                with override_settings(YOUTUBE_API_ROOT_URL=server.root_url, YOUTUBE_API_KEY="bench"):
+                    reset_youtube_clients()
+                    headers = [(b"authorization", f"Bearer {firebase.token(UID)}".encode())]
+                    modes = {
+                        # sync view, at most --threads requests at a time, as in a threaded WSGI worker
+                        "sync_threads": ("/api/import/", options["threads"]),
+                        # sync view under ASGI: Django gives each request its own thread
+                        "sync_asgi": ("/api/import/", options["concurrency"]),
+                        "async": ("/api/async/import/", options["concurrency"]),
+                    }
+                    for n, (name, (path, concurrency)) in enumerate(modes.items()):
+                        if options["mode"] and name not in options["mode"]:
+                            continue
+                        ids = [f"{n}{i:010d}" for i in range(options["requests"])]
+                        for video_id in ids:
+                            server.add_video(video_id)
+                        results[name] = asyncio.run(self.run(application, path, ids, headers, concurrency))
+                        results[name]["api_calls"] = stats.as_dict()["requests"]
+                reset_youtube_clients()
+        finally:
+            user.delete()
+            YouTubeMetadataCache.objects.filter(content_type="video", content_id__regex=r"^\d{11}$").delete()
+
+        self.stdout.write(json.dumps({
+            "requests": options["requests"],
+            "concurrency": options["concurrency"],
+            "latency": options["latency"],
+            "results": results,
+        }, indent=2))
+
+    async def run(self, app, path, ids, headers, concurrency):
+        stats.reset()
+        gate = asyncio.Semaphore(concurrency)
+        latencies = []
+        statuses = {}
+        peak_threads = app_threads()
+        done = asyncio.Event()
+
+        async def sample():
+            nonlocal peak_threads
+            while not done.is_set():
+                peak_threads = max(peak_threads, app_threads())
+                await asyncio.sleep(0.01)
+
+        async def one(video_id):
+            body = json.dumps({"url": f"https://www.youtube.com/watch?v={video_id}"}).encode()
+            async with gate:
+                start = time.perf_counter()
+                status = await asgi_post(app, path, body, headers)
+                latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+        sampler = asyncio.ensure_future(sample())
+        start = time.perf_counter()
+        await asyncio.gather(*(one(video_id) for video_id in ids))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await sampler
+
+        latencies.sort()
+        return {
+            "seconds": round(elapsed, 2),
+            "requests_per_second": round(len(ids) / elapsed, 1),
+            "p50_ms": round(statistics.median(latencies) * 1000, 1),
+            "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1),
+            "statuses": statuses,
+            "peak_threads": peak_threads,
+        }
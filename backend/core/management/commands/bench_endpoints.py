@@ -0,0 +1,275 @@
+import json
+import logging
+import subprocess
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+
+from core import urls
+from core.models import Certificate, ImportJob, Playlist, Quiz, UserProfile, Video
+from core.testing.firebase import FakeFirebase
+from core.testing.queries import QueryCounter
+from core.testing.youtube_server import FakeYouTubeServer
+from core.utils.certificates import render_now
+from core.utils.youtube_client import reset_youtube_clients
+
+QUESTIONS = [{"question": "Q?", "options": ["A", "B", "C", "D"], "answer": "A"}]
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of sorted ``values``."""
+    if not values:
+        return None
+    rank = max(int(round(p / 100 * len(values) + 0.5)) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+class Sample:
+    """Per-user rows the scenarios pick request bodies from. Rows a request
+    deletes are handed out once."""
+
+    def __init__(self, users):
+        self.users = users
+        self.videos = {}
+        self.playlists = {}
+        for user_id, vid in Video.objects.filter(user__in=users, playlist__isnull=False).values_list("user_id", "youtube_id"):
+            self.videos.setdefault(user_id, []).append(vid)
+        for user_id, pid in Playlist.objects.filter(user__in=users).values_list("user_id", "youtube_id"):
+            self.playlists.setdefault(user_id, []).append(pid)
+        self.certificates = dict(
+            Certificate.objects.filter(user__in=users, revoked_at__isnull=True).order_by("-id").values_list("user_id", "certificate_id")
+        )
+        self._lock = threading.Lock()
+
+    def user(self, n):
+        return self.users[n % len(self.users)]
+
+    def video(self, user):
+        vids = self.videos.get(user.pk)
+        return vids[len(vids) // 2] if vids else "missing"
+
+    def playlist(self, user):
+        pids = self.playlists.get(user.pk)
+        return pids[0] if pids else "missing"
+
+    def certificate(self, user):
+        return self.certificates.get(user.pk) or uuid.uuid4()
+
+    def take(self, pool, user):
+        with self._lock:
+            rows = pool.get(user.pk)
+            return rows.pop() if rows and len(rows) > 1 else "missing"
+
+
+def scenarios(sample, video_url):
+    """route -> {scenario name: build(user) -> (method, path, data, status)}.
+    Builders run before the request is timed, so rows they create are not
+    measured; any response other than ``status`` counts as an error."""
+
+    def post(path, data=None, status=200):
+        return lambda user: ("post", path, data or {}, status)
+
+    def user_post(path, make, status=200):
+        return lambda user: ("post", path, make(user), status)
+
+    def save_playlist(path):
+        def build(user):
+            pid = f"bench-{uuid.uuid4().hex[:12]}"
+            return ("post", path, {"data": {
+                "type": "playlist", "id": pid, "title": "Bench playlist", "url": f"https://www.youtube.com/playlist?list={pid}",
+                "thumbnail": "", "videos": [
+                    {"video_id": f"{pid}-{i}", "title": f"Lesson {i}", "url": "https://youtu.be/x", "description": ""}
+                    for i in range(20)
+                ],
+            }}, 201)
+        return build
+
+    def job_status(user):
+        return ("get", f"import-jobs/{ImportJob.objects.create(user=user, pid='PLbench').id}/", None, 200)
+
+    def start_quiz(user):
+        return ("post", "start-quiz/", {"contentType": "playlist", "contentId": sample.playlist(user)}, 200)
+
+    def submit_quiz(user):
+        quiz = Quiz.objects.create(user=user, playlist=Playlist.objects.filter(user=user).first(), questions=QUESTIONS)
+        return ("post", "submit-quiz/", {"quizId": quiz.id, "answers": ["A"]}, 200)
+
+    def certificate_pdf(user):
+        # rendered before timing; the scenario measures serving the file
+        certificate_id = sample.certificate(user)
+        render_now(certificate_id)
+        return ("get", f"certificates/{certificate_id}.pdf", None, 200)
+
+    def certificate_verify(user):
+        return ("get", f"certificates/{sample.certificate(user)}/verify/", None, 200)
+
+    return {
+        "signup/": {"signup": post("signup/")},
+        "login/": {"login": post("login/")},
+        "oauth-login/": {"oauth-login": post("oauth-login/")},
+        "import/": {"import": post("import/", {"url": video_url})},
+        "save-learning/": {"save-learning playlist": save_playlist("save-learning/")},
+        "import-jobs/<int:job_id>/": {"import-jobs": job_status},
+        "async/signup/": {"async signup": post("async/signup/")},
+        "async/login/": {"async login": post("async/login/")},
+        "async/oauth-login/": {"async oauth-login": post("async/oauth-login/")},
+        "async/import/": {"async import": post("async/import/", {"url": video_url})},
+        "async/save-learning/": {"async save-learning playlist": save_playlist("async/save-learning/")},
+        "continue-watch/": {"continue-watch": post("continue-watch/")},
+        "complete/": {"complete": post("complete/")},
+        "profile/": {"profile": post("profile/")},
+        "activity/": {"activity 14d": post("activity/"), "activity 365d": post("activity/", {"days": 365})},
+        "leaderboard/": {
+            "leaderboard global": post("leaderboard/"),
+            "leaderboard weekly": post("leaderboard/", {"period": "weekly"}),
+        },
+        "my-learnings/": {
+            "my-learnings": post("my-learnings/"),
+            "my-learnings cursor": post("my-learnings/", {"cursor": None}),
+            "my-learnings search": post("my-learnings/", {"searchQuery": "python django"}),
+        },
+        "certs/": {"certs": post("certs/")},
+        "certificates/<uuid:certificate_id>.pdf": {"certificate pdf": certificate_pdf},
+        "certificates/<uuid:certificate_id>/verify/": {"certificate verify": certificate_verify},
+        "quiz-list/": {"quiz-list": post("quiz-list/")},
+        "start-quiz/": {"start-quiz": start_quiz},
+        "submit-quiz/": {"submit-quiz": submit_quiz},
+        "classroom/": {"classroom": user_post("classroom/", lambda u: {"videoId": sample.video(u)})},
+        "mark-completed/": {"mark-completed": user_post("mark-completed/", lambda u: {"videoId": sample.video(u)})},
+        "delete-video/": {
+            "delete-video": user_post("delete-video/", lambda u: {"videoId": sample.take(sample.videos, u)}),
+        },
+        "delete-playlist/": {
+            "delete-playlist": user_post("delete-playlist/", lambda u: {"playlistId": sample.take(sample.playlists, u)}),
+        },
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive every route in core/urls.py concurrently as generated users (see generate_synthetic_data) "
+        "and print p50/p95/p99 latency, throughput and query counts as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--prefix", default="synth", help="uid prefix of the users to act as")
+        parser.add_argument("--users", type=int, default=100, help="How many of them to spread requests over")
+        parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--only", nargs="+", help="Scenario names to run")
+        parser.add_argument("--output", help="Write the JSON report here as well")
+
+    def handle(self, *args, **options):
+        users = list(UserProfile.objects.filter(uid__startswith=f"{options['prefix']}-").order_by("pk")[:options["users"]])
+        if not users:
+            raise CommandError(f"No users with uid prefix {options['prefix']!r}; run generate_synthetic_data first")
+
+        firebase = FakeFirebase()
+        self.headers = {user.pk: firebase.auth_header(user.uid) for user in users}
+        self.local = threading.local()
+
+        with firebase, FakeYouTubeServer() as youtube:
+            youtube.add_video("benchvideo1")
+            # the test Client sends Host: testserver
+            with override_settings(
+                YOUTUBE_API_ROOT_URL=youtube.root_url, YOUTUBE_API_KEY="bench",
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+            ):
+                reset_youtube_clients()
+                report = self.run(Sample(users), options)
+
+        out = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(out + "\n")
+        self.stdout.write(out)
+
+        failed = [name for name, result in report["scenarios"].items() if result["errors"] == result["requests"]]
+        if failed:
+            raise CommandError(f"No request succeeded in: {', '.join(failed)}")
+
+    def run(self, sample, options):
+        table = scenarios(sample, "https://www.youtube.com/watch?v=benchvideo1")
+        routes = [str(p.pattern) for p in urls.urlpatterns]
+        results = {}
+
+        # failures are counted in the report rather than logged with tracebacks
+        request_logger = logging.getLogger("django.request")
+        level = request_logger.level
+        request_logger.setLevel(logging.CRITICAL)
+        try:
+            with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+                for route in routes:
+                    for name, build in table.get(route, {}).items():
+                        if options["only"] and name not in options["only"]:
+                            continue
+                        results[name] = self.measure(pool, sample, route, build, options)
+                        self.stderr.write(f"{name}: p50 {results[name]['p50_ms']} ms, {results[name]['rps']} req/s")
+        finally:
+            request_logger.setLevel(level)
+
+        return {
+            "commit": self.commit(),
+            "database": connection.vendor,
+            "users": len(sample.users),
+            "requests_per_scenario": options["requests"],
+            "concurrency": options["concurrency"],
+            "uncovered_routes": [r for r in routes if r not in table],
+            "scenarios": results,
+        }
+
+    def measure(self, pool, sample, route, build, options):
+        def one(n):
+            user = sample.user(n)
+            method, path, data, expected = build(user)
+            client = getattr(self.local, "client", None)
+            if client is None:
+                client = self.local.client = Client(raise_request_exception=False)
+
+            counter = QueryCounter()
+            with connection.execute_wrapper(counter):
+                start = time.perf_counter()
+                if method == "get":
+                    response = client.get(f"/api/{path}", **self.headers[user.pk])
+                else:
+                    response = client.post(f"/api/{path}", data, content_type="application/json", **self.headers[user.pk])
+                elapsed = time.perf_counter() - start
+            return elapsed, counter.count, response.status_code, expected
+
+        start = time.perf_counter()
+        samples = list(pool.map(one, range(options["requests"])))
+        wall = time.perf_counter() - start
+
+        latencies = sorted(s[0] * 1000 for s in samples)
+        queries = [s[1] for s in samples]
+        statuses = {}
+        for s in samples:
+            statuses[str(s[2])] = statuses.get(str(s[2]), 0) + 1
+        return {
+            "route": route,
+            "requests": len(samples),
+            "errors": sum(1 for s in samples if s[2] != s[3]),
+            "statuses": statuses,
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "max_ms": round(latencies[-1], 2),
+            "rps": round(len(samples) / wall, 1),
+            "queries_avg": round(sum(queries) / len(queries), 2),
+            "queries_max": max(queries),
+        }
+
+    def commit(self):
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5,
+            ).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            return None
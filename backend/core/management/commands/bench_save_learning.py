@@ -0,0 +1,84 @@
+import json
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from core.models import Playlist, UserActivityLog, UserProfile, Video, YouTubePlaylist, YouTubeVideo
+from core.testing.queries import QueryCounter
+from core.utils.library import save_playlist
+
+
+def legacy_save_playlist(user_id, data):
+    """SaveLearningView's original per-video update_or_create loop."""
+    YouTubePlaylist.objects.update_or_create(
+        pid=data["id"],
+        defaults={"name": data["title"], "url": data["url"], "thumbnail": data["thumbnail"]},
+    )
+    playlist = Playlist.objects.create(user_id=user_id, youtube_id=data["id"])
+    for v in data.get("videos", []):
+        YouTubeVideo.objects.update_or_create(
+            vid=v["video_id"],
+            defaults={"name": v["title"], "url": v["url"], "description": v.get("description", "")},
+        )
+        Video.objects.update_or_create(
+            user_id=user_id,
+            youtube_id=v["video_id"],
+            defaults={
+                'playlist': playlist,
+                'imported_at': timezone.now(),
+                'watch_progress': 0.0,
+                'is_completed': False
+            }
+        )
+    UserActivityLog.objects.create(user_id=user_id, activity_type="Learning Import")
+
+
+class Command(BaseCommand):
+    help = "Compare query counts and latency of the legacy and bulk playlist save paths, and of saving a catalogued playlist"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000])
+
+    def handle(self, *args, **options):
+        report = []
+        for size in options["sizes"]:
+            row = {"videos": size}
+            for name, save in (("legacy", legacy_save_playlist), ("bulk", save_playlist), ("catalogued", save_playlist)):
+                tag = uuid.uuid4().hex[:10]
+                users = [
+                    UserProfile.objects.create(uid=f"bench-{tag}-{n}", email=f"bench-{tag}-{n}@example.com", name="Bench")
+                    for n in range(2)
+                ]
+                data = {
+                    "id": f"PL{tag}",
+                    "title": "Benchmark playlist",
+                    "url": f"https://www.youtube.com/playlist?list=PL{tag}",
+                    "thumbnail": "",
+                    "videos": [{
+                        "video_id": f"{tag}{i}",
+                        "title": f"Video {i}",
+                        "url": f"https://www.youtube.com/watch?v={tag}{i}",
+                        "description": "x" * 200,
+                    } for i in range(size)],
+                }
+                try:
+                    if name == "catalogued":
+                        # another user saved it first, so the catalog already has it
+                        save(users[1].id, data)
+                    counter = QueryCounter()
+                    with connection.execute_wrapper(counter):
+                        start = time.perf_counter()
+                        save(users[0].id, data)
+                        elapsed = time.perf_counter() - start
+                    row[name] = {"queries": counter.count, "ms": round(elapsed * 1000, 1)}
+                finally:
+                    for user in users:
+                        user.delete()
+                    YouTubeVideo.objects.filter(vid__startswith=tag).delete()
+                    YouTubePlaylist.objects.filter(pid=data["id"]).delete()
+            report.append(row)
+
+        self.stdout.write(json.dumps({"database": connection.vendor, "results": report}, indent=2))
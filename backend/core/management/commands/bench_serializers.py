@@ -0,0 +1,113 @@
+import json
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Prefetch
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Playlist, UserProfile, Video, YouTubePlaylist, YouTubeVideo
+from core.serializers import PLAYLIST_LIST, VIDEO_LIST, PlaylistSerializer, VideoSerializer
+
+UID = "bench-serializers"
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the read-path row schemas against the ModelSerializers they replace, "
+        "on a library of thousands of videos (query, serialization and JSON rendering)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--videos", type=int, default=5000)
+        parser.add_argument("--playlist-size", type=int, default=100)
+        parser.add_argument("--description-length", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        user = self.create_library(options["videos"], options["playlist_size"], options["description_length"])
+        try:
+            videos = Video.objects.filter(user=user).order_by("-imported_at", "-id")
+            playlists = Playlist.objects.filter(user=user).order_by("-id")
+            scenarios = {
+                "videos": {
+                    "model_serializer": lambda: VideoSerializer(videos.select_related("youtube"), many=True).data,
+                    "row_schema": lambda: VIDEO_LIST.data(videos),
+                },
+                # the my-learnings playlist list: every playlist with its videos
+                "playlists_with_videos": {
+                    "model_serializer": lambda: self.nested_serializers(playlists),
+                    "row_schema": lambda: self.nested_rows(playlists),
+                },
+            }
+            results = {}
+            for scenario, modes in scenarios.items():
+                results[scenario] = {}
+                for name, run in modes.items():
+                    timings = []
+                    for _ in range(options["repeat"]):
+                        start = time.perf_counter()
+                        body = JSONRenderer().render(run())
+                        timings.append(time.perf_counter() - start)
+                    results[scenario][name] = {"ms": round(min(timings) * 1000, 1), "bytes": len(body)}
+        finally:
+            user.delete()
+            YouTubeVideo.objects.filter(vid__startswith=f"{UID}-").delete()
+            YouTubePlaylist.objects.filter(pid__startswith=f"{UID}-").delete()
+
+        self.stdout.write(json.dumps({
+            "videos": options["videos"],
+            "playlist_size": options["playlist_size"],
+            "results": results,
+        }, indent=2))
+
+    def nested_serializers(self, playlists):
+        playlists = playlists.select_related("youtube").prefetch_related(
+            Prefetch("video_set", queryset=Video.objects.select_related("youtube").order_by("id"), to_attr="videos")
+        )
+        data = []
+        for pl in playlists:
+            pl_data = PlaylistSerializer(pl).data
+            pl_data["videos"] = VideoSerializer(pl.videos, many=True).data
+            data.append(pl_data)
+        return data
+
+    def nested_rows(self, playlists):
+        data = PLAYLIST_LIST.data(playlists)
+        videos = {pl["id"]: [] for pl in data}
+        for video in VIDEO_LIST.values(Video.objects.filter(playlist_id__in=videos).order_by("id")):
+            videos[video.playlist].append(video)
+        for pl in data:
+            pl["videos"] = VIDEO_LIST.dicts(videos[pl["id"]])
+        return data
+
+    def create_library(self, n_videos, playlist_size, description_length):
+        UserProfile.objects.filter(uid=UID).delete()
+        user = UserProfile.objects.create(uid=UID, email=f"{UID}@example.com", name=UID)
+        n_playlists = n_videos // playlist_size
+        YouTubePlaylist.objects.bulk_create(
+            [YouTubePlaylist(pid=f"{UID}-PL{p}", name=f"Playlist {p}", url="https://youtube.com/playlist")
+             for p in range(n_playlists)],
+            ignore_conflicts=True,
+        )
+        playlists = Playlist.objects.bulk_create([
+            Playlist(user=user, youtube_id=f"{UID}-PL{p}", total_videos=playlist_size)
+            for p in range(n_playlists)
+        ])
+        description = ("lorem ipsum dolor sit amet " * (description_length // 27 + 1))[:description_length]
+        YouTubeVideo.objects.bulk_create(
+            [YouTubeVideo(vid=f"{UID}-{i}", name=f"Video {i}", url=f"https://youtu.be/{i}", description=description)
+             for i in range(n_videos)],
+            ignore_conflicts=True, batch_size=1000,
+        )
+        now = timezone.now()
+        Video.objects.bulk_create([
+            Video(
+                user=user, youtube_id=f"{UID}-{i}", imported_at=now - timedelta(seconds=i),
+                playlist=playlists[i // playlist_size] if i // playlist_size < n_playlists else None,
+                watch_progress=i % 100, is_completed=i % 3 == 0,
+            )
+            for i in range(n_videos)
+        ], batch_size=1000)
+        return user
@@ -0,0 +1,57 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from core.testing.youtube_server import FakeYouTubeServer
+from core.utils.youtube import iter_enriched_pages, iter_playlist_pages
+from core.utils.youtube_client import reset_youtube_clients
+
+
+class Command(BaseCommand):
+    help = "Time a playlist import against a local YouTube stand-in with injected latency"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--videos", type=int, default=1000)
+        parser.add_argument("--latency", type=float, default=0.08, help="Seconds added to every API call")
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        with FakeYouTubeServer(latency=options["latency"]) as server:
+            server.add_playlist("PLbench", options["videos"])
+            with override_settings(YOUTUBE_API_ROOT_URL=server.root_url, YOUTUBE_API_KEY="bench"):
+                reset_youtube_clients()
+                pool = ThreadPoolExecutor(max_workers=options["workers"])
+                modes = {
+                    # what ImportYoutubeView did before: sequential pages, no durations
+                    "pages_only": lambda: [p for p in iter_playlist_pages("PLbench")],
+                    "sequential_enrichment": lambda: list(iter_enriched_pages(iter_playlist_pages("PLbench"), pool=False)),
+                    "pipelined_enrichment": lambda: list(iter_enriched_pages(iter_playlist_pages("PLbench"), pool=pool)),
+                }
+                results = {}
+                for name, run in modes.items():
+                    timings = []
+                    for _ in range(options["repeat"]):
+                        server.requests.clear()
+                        start = time.perf_counter()
+                        pages = run()
+                        timings.append(time.perf_counter() - start)
+                    videos = [v for page, _ in pages for v in page]
+                    assert [v["position"] for v in videos] == list(range(1, options["videos"] + 1))
+                    results[name] = {
+                        "seconds": round(min(timings), 3),
+                        "api_calls": len(server.requests),
+                        "with_durations": all("duration" in v for v in videos),
+                    }
+                pool.shutdown()
+            reset_youtube_clients()
+
+        self.stdout.write(json.dumps({
+            "videos": options["videos"],
+            "latency": options["latency"],
+            "workers": options["workers"],
+            "results": results,
+        }, indent=2))
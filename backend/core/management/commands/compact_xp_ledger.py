@@ -0,0 +1,60 @@
+import itertools
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from core.models import XPLedger
+
+
+class Command(BaseCommand):
+    help = "Fold each user's XP ledger rows older than --days into a single row; totals are unchanged"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=90)
+        parser.add_argument("--chunk-size", type=int, default=500, help="Users per transaction")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        user_ids = (
+            XPLedger.objects.filter(created_at__lt=cutoff)
+            .values("user_id")
+            .annotate(n=Count("id"))
+            .filter(n__gt=1)
+            .order_by("user_id")
+            .values_list("user_id", flat=True)
+            .iterator()
+        )
+
+        users = folded = 0
+        while True:
+            chunk = list(itertools.islice(user_ids, options["chunk_size"]))
+            if not chunk:
+                break
+            users += len(chunk)
+            folded += self.compact(chunk, cutoff)
+
+        self.stdout.write(f"Folded {folded} rows for {users} users")
+
+    def compact(self, user_ids, cutoff):
+        with transaction.atomic():
+            old = XPLedger.objects.filter(user_id__in=user_ids, created_at__lt=cutoff)
+            rows = list(old.select_for_update().values_list("id", "user_id", "amount", "created_at"))
+            if not rows:
+                return 0
+
+            totals = {}
+            for _, user_id, amount, created_at in rows:
+                total, last = totals.get(user_id, (0, created_at))
+                totals[user_id] = (total + amount, max(last, created_at))
+
+            deleted, _ = old.filter(id__lte=max(r[0] for r in rows)).delete()
+            if deleted != len(rows):
+                raise CommandError(f"Expected to fold {len(rows)} rows, deleted {deleted}; rolled back")
+            XPLedger.objects.bulk_create([
+                XPLedger(user_id=user_id, amount=total, reason="Compacted", created_at=last)
+                for user_id, (total, last) in totals.items()
+            ])
+        return len(rows)
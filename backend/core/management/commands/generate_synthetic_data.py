@@ -0,0 +1,171 @@
+import itertools
+import random
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.models import (
+    Certificate, Playlist, Quiz, UserActivityDaily, UserActivityLog, UserProfile, Video, YouTubePlaylist, YouTubeVideo,
+)
+from core.utils.certificates import download_url
+from core.utils.library import recount_playlists
+
+ACTIVITY_TYPES = [
+    "Video Accessed", "Classroom Accessed", "Video Marked as Completed", "Learning Import",
+    "Quiz Started", "Quiz Submitted", "Certificate Issued",
+]
+QUESTIONS = [
+    {"question": "What is the main idea?", "options": ["A", "B", "C", "D"], "answer": "A"},
+    {"question": "Which of these is correct?", "options": ["X", "Y", "Z", "W"], "answer": "Y"},
+]
+WORDS = "python django sql index cache query async rust linear algebra cooking history guitar".split()
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-insert synthetic users with libraries, quizzes, certificates and activity "
+        "(run recompute_streaks afterwards for streaks)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--videos-per-user", type=int, default=40, help="Standalone videos per user")
+        parser.add_argument("--playlists-per-user", type=int, default=3)
+        parser.add_argument("--playlist-size", type=int, default=20)
+        parser.add_argument("--activity-rows", type=int, default=100000, help="Total UserActivityLog rows")
+        parser.add_argument("--days", type=int, default=365, help="Spread activity over this many days")
+        parser.add_argument("--completed", type=float, default=0.3, help="Share of videos marked completed")
+        parser.add_argument("--chunk-size", type=int, default=500, help="Users generated per transaction")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Rows per INSERT")
+        parser.add_argument("--prefix", default="synth")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--delete", action="store_true", help="Delete users with --prefix instead")
+
+    def handle(self, *args, **options):
+        prefix = options["prefix"]
+        if options["delete"]:
+            deleted, _ = UserProfile.objects.filter(uid__startswith=f"{prefix}-").delete()
+            # synthetic YouTube IDs start with the owner's uid
+            for catalog, key in ((YouTubeVideo, "vid"), (YouTubePlaylist, "pid")):
+                deleted += catalog.objects.filter(**{f"{key}__startswith": f"{prefix}-"}).delete()[0]
+            self.stdout.write(f"Deleted {deleted} rows")
+            return
+
+        self.rng = random.Random(options["seed"])
+        self.options = options
+        self.batch_size = options["batch_size"]
+        self.now = timezone.now()
+        activity_per_user = options["activity_rows"] / max(options["users"], 1)
+        start_index = UserProfile.objects.filter(uid__startswith=f"{prefix}-").count()
+
+        started = time.perf_counter()
+        done = 0
+        while done < options["users"]:
+            size = min(options["chunk_size"], options["users"] - done)
+            with transaction.atomic():
+                self.generate_chunk(prefix, start_index + done, size, activity_per_user)
+            done += size
+            rate = done / (time.perf_counter() - started)
+            self.stdout.write(f"{done}/{options['users']} users ({rate:.0f} users/s)")
+
+    def generate_chunk(self, prefix, first, size, activity_per_user):
+        o = self.options
+        users = UserProfile.objects.bulk_create([
+            UserProfile(uid=f"{prefix}-{n}", email=f"{prefix}-{n}@example.com", name=f"Synthetic {n}")
+            for n in range(first, first + size)
+        ], batch_size=self.batch_size)
+
+        pids = [(user, f"{user.uid}-PL{i}") for user in users for i in range(o["playlists_per_user"])]
+        YouTubePlaylist.objects.bulk_create([
+            YouTubePlaylist(pid=pid, name=self.title(), url=f"https://www.youtube.com/playlist?list={pid}")
+            for _, pid in pids
+        ], batch_size=self.batch_size)
+        playlists = Playlist.objects.bulk_create([
+            Playlist(user=user, youtube_id=pid) for user, pid in pids
+        ], batch_size=self.batch_size)
+
+        videos = [
+            self.video(user, f"{user.uid}-v{i}") for user in users for i in range(o["videos_per_user"])
+        ] + [
+            self.video(playlist.user, f"{playlist.youtube_id}-{i}", playlist)
+            for playlist in playlists for i in range(o["playlist_size"])
+        ]
+        catalog = [self.catalog_video(v.youtube_id) for v in videos]
+        titles = {c.vid: c.name for c in catalog}
+        YouTubeVideo.objects.bulk_create(catalog, batch_size=self.batch_size)
+        videos = Video.objects.bulk_create(videos, batch_size=self.batch_size)
+        recount_playlists(Playlist.objects.filter(pk__in=[p.pk for p in playlists]))
+
+        # a passed quiz and a certificate for most completed videos
+        quizzes, certificates = [], []
+        for video in videos:
+            if video.is_completed and self.rng.random() < 0.5:
+                passed = self.rng.random() < 0.8
+                quizzes.append(Quiz(user_id=video.user_id, video=video, questions=QUESTIONS,
+                                    score=100 if passed else 0, passed=passed))
+                if passed:
+                    certificate = Certificate(user_id=video.user_id, video=video, title=titles[video.youtube_id])
+                    certificate.download_url = download_url(certificate.certificate_id)
+                    certificates.append(certificate)
+        Quiz.objects.bulk_create(quizzes, batch_size=self.batch_size)
+        Certificate.objects.bulk_create(certificates, batch_size=self.batch_size)
+
+        daily = Counter()
+        self.insert_rows(UserActivityLog, ["user_id", "activity_type", "timestamp"],
+                         self.activity(users, activity_per_user, daily))
+
+        UserActivityDaily.objects.bulk_create([
+            UserActivityDaily(user_id=user_id, date=date, activity_type=activity_type, count=count)
+            for (user_id, date, activity_type), count in daily.items()
+        ], batch_size=self.batch_size)
+
+    def activity(self, users, per_user, daily):
+        """UserActivityLog rows for ``users``, counting them into ``daily``
+        (users are UTC, the default timezone)."""
+        seconds = self.options["days"] * 86400
+        adapt = connection.ops.adapt_datetimefield_value
+        for user in users:
+            for _ in range(self.rng.randint(0, int(per_user * 2))):
+                timestamp = self.now - timedelta(seconds=self.rng.randrange(seconds))
+                activity_type = self.rng.choice(ACTIVITY_TYPES)
+                daily[user.pk, timestamp.date(), activity_type] += 1
+                yield (user.pk, activity_type, adapt(timestamp))
+
+    def insert_rows(self, model, columns, rows):
+        """Multi-row INSERTs of plain tuples. Building model instances costs
+        more than the INSERT itself at tens of millions of rows."""
+        quote = connection.ops.quote_name
+        per_batch = min(self.batch_size, connection.features.max_query_params // len(columns))
+        row_sql = "(" + ", ".join(["%s"] * len(columns)) + ")"
+        prefix = f"INSERT INTO {quote(model._meta.db_table)} ({', '.join(quote(c) for c in columns)}) VALUES "
+
+        with connection.cursor() as cursor:
+            while True:
+                batch = list(itertools.islice(rows, per_batch))
+                if not batch:
+                    break
+                cursor.execute(prefix + ", ".join([row_sql] * len(batch)), [v for row in batch for v in row])
+
+    def catalog_video(self, vid):
+        return YouTubeVideo(
+            vid=vid,
+            name=self.title(),
+            url=f"https://www.youtube.com/watch?v={vid}",
+            description=" ".join(self.rng.choices(WORDS, k=30)),
+        )
+
+    def video(self, user, vid, playlist=None):
+        return Video(
+            user=user,
+            youtube_id=vid,
+            playlist=playlist,
+            imported_at=self.now - timedelta(minutes=self.rng.randrange(self.options["days"] * 1440)),
+            is_completed=self.rng.random() < self.options["completed"],
+        )
+
+    def title(self):
+        return " ".join(self.rng.choices(WORDS, k=4)).title()
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from core.utils.leaderboard import boards_for, board_scores, get_leaderboard
+
+
+class Command(BaseCommand):
+    help = (
+        "Reload leaderboards from UserProfile.xp and the XP ledger (after a deploy, "
+        "a backend switch, or a Redis flush) and drop past weekly boards"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--board", nargs="+", help='Boards to reload, e.g. "global" "weekly:2026-W42"')
+
+    def handle(self, *args, **options):
+        leaderboard = get_leaderboard()
+        boards = options["board"] or boards_for()
+        for board in boards:
+            scores = list(board_scores(board))
+            leaderboard.load(board, scores)
+            self.stdout.write(f"{board}: {len(scores)} users")
+
+        if hasattr(leaderboard, "prune") and not options["board"]:
+            leaderboard.prune(boards)
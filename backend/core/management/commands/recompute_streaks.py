@@ -0,0 +1,83 @@
+import itertools
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from core.models import UserActivityDaily, UserProfile
+from core.utils.activity import parse_timezone
+from core.utils.streaks import compute_streaks
+
+FIELDS = ["streak_count", "longest_streak", "last_active_date"]
+
+
+class Command(BaseCommand):
+    help = "Rebuild streak_count, longest_streak and last_active_date from UserActivityDaily"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        now = timezone.now()
+        profiles = UserProfile.objects.only("id", "timezone", *FIELDS).order_by("pk").iterator(chunk_size=chunk_size)
+
+        total = changed = 0
+        while True:
+            chunk = list(itertools.islice(profiles, chunk_size))
+            if not chunk:
+                break
+            total += len(chunk)
+            changed += self.recompute(chunk, now)
+
+        self.stdout.write(f"Checked {total} users, updated {changed}")
+
+    def recompute(self, chunk, now):
+        dates = {}
+        rows = (
+            UserActivityDaily.objects.filter(user__gte=chunk[0].pk, user__lte=chunk[-1].pk)
+            .values_list("user_id", "date")
+            .distinct()
+            .order_by("user_id", "date")
+        )
+        for user_id, date in rows.iterator():
+            dates.setdefault(user_id, []).append(date)
+
+        # every incremental update moves last_active_date forward, so a row
+        # whose last_active_date changed since it was read is left alone:
+        # writing the values computed here would undo that activity
+        stale, broken = [], {}
+        for profile in chunk:
+            tz = parse_timezone(profile.timezone) or parse_timezone("UTC")
+            values = compute_streaks(dates.get(profile.pk, []), timezone.localtime(now, tz).date())
+            current = (profile.streak_count, profile.longest_streak, profile.last_active_date)
+            if values == current:
+                continue
+            # on a normal night the only change is a streak that lapsed,
+            # which needs no per-row CASE
+            if values == (0,) + current[1:]:
+                broken.setdefault(profile.last_active_date, []).append(profile.pk)
+            else:
+                read = profile.last_active_date
+                for field, value in zip(FIELDS, values):
+                    setattr(profile, field, unless_active(read, field, value))
+                stale.append(profile)
+
+        with transaction.atomic():
+            # lapsed streaks mostly share a last active day or two
+            for last_active_date, pks in broken.items():
+                UserProfile.objects.filter(pk__in=pks, last_active_date=last_active_date).update(streak_count=0)
+            UserProfile.objects.bulk_update(stale, FIELDS, batch_size=500)
+        return len(stale) + sum(map(len, broken.values()))
+
+
+def unless_active(last_active_date, field, value):
+    """``value`` for ``field``, provided the row's last_active_date is still
+    the one it was read with."""
+    output_field = UserProfile._meta.get_field(field)
+    return Case(
+        When(last_active_date=last_active_date, then=Value(value, output_field=output_field)),
+        default=F(field),
+        output_field=output_field,
+    )
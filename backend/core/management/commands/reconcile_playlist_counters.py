@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Playlist
+from core.utils.library import recount_playlists
+from core.utils.versions import LIBRARY, bump_versions
+
+
+class Command(BaseCommand):
+    help = "Rebuild Playlist.total_videos / completed_videos from the videos table"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        last_id = 0
+        updated = 0
+
+        while True:
+            ids = list(
+                Playlist.objects.filter(pk__gt=last_id).order_by("pk").values_list("pk", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            with transaction.atomic():
+                updated += recount_playlists(Playlist.objects.filter(pk__in=ids))
+                bump_versions(Playlist.objects.filter(pk__in=ids).values_list("user_id", flat=True), LIBRARY)
+            last_id = ids[-1]
+
+        self.stdout.write(f"Recounted {updated} playlists")
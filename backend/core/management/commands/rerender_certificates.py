@@ -0,0 +1,79 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from django.core.management.base import BaseCommand
+
+from core.models import Certificate
+from core.utils.certificate_pdf import render_certificate
+from core.utils.certificates import (
+    certificate_fields, certificate_root, download_url, pdf_path, render_queryset, store_pdf,
+)
+from core.utils.versions import CERTIFICATES, bump_versions
+
+
+class Command(BaseCommand):
+    help = "Render certificate PDFs in parallel, e.g. after a template change or to fill in missing files"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--missing", action="store_true", help="Only certificates without a stored PDF")
+        parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Render processes (0 = this one)")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--prune", action="store_true", help="Then delete PDFs no certificate points at")
+
+    def handle(self, *args, **options):
+        pool = None
+        if options["workers"]:
+            pool = ProcessPoolExecutor(max_workers=options["workers"], mp_context=get_context("spawn"))
+
+        started_at = time.time()
+        started = time.perf_counter()
+        rendered = updated = 0
+        last = 0
+        try:
+            while True:
+                batch = list(render_queryset(Certificate.objects.filter(id__gt=last).order_by("id"))[:options["batch_size"]])
+                if not batch:
+                    break
+                last = batch[-1].id
+                if options["missing"]:
+                    batch = [c for c in batch if not c.pdf_sha256 or not pdf_path(c.pdf_sha256).exists()]
+                fields = [certificate_fields(c) for c in batch]
+                if pool is None:
+                    pdfs = map(render_certificate, fields)
+                else:
+                    pdfs = pool.map(render_certificate, fields, chunksize=max(len(fields) // (4 * options["workers"]), 1))
+
+                changed = []
+                for certificate, data in zip(batch, pdfs):
+                    digest = store_pdf(data)
+                    if digest != certificate.pdf_sha256:
+                        certificate.pdf_sha256 = digest
+                        certificate.download_url = download_url(certificate.certificate_id, digest)
+                        changed.append(certificate)
+                Certificate.objects.bulk_update(changed, ["pdf_sha256", "download_url"])
+                bump_versions([c.user_id for c in changed], CERTIFICATES)
+                rendered += len(batch)
+                updated += len(changed)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        elapsed = time.perf_counter() - started
+        rate = rendered / elapsed if elapsed else 0
+        self.stdout.write(f"Rendered {rendered} certificates ({updated} changed) in {elapsed:.1f}s, {rate:.0f}/s")
+
+        if options["prune"]:
+            self.prune(started_at)
+
+    def prune(self, started_at):
+        # files written since the command started may belong to certificates
+        # whose row isn't updated yet
+        referenced = set(Certificate.objects.exclude(pdf_sha256="").values_list("pdf_sha256", flat=True).distinct())
+        removed = 0
+        for path in certificate_root().glob("*/*.pdf"):
+            if path.stem not in referenced and path.stat().st_mtime < started_at:
+                path.unlink(missing_ok=True)
+                removed += 1
+        self.stdout.write(f"Removed {removed} unreferenced PDFs")
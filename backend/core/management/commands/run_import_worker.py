@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.utils.import_jobs import claim_job, run_job, worker_name
+
+
+class Command(BaseCommand):
+    help = "Process queued playlist import jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Exit when the queue is empty")
+        parser.add_argument("--poll-interval", type=float, default=2.0)
+
+    def handle(self, *args, **options):
+        worker = worker_name()
+        self.stdout.write(f"Import worker {worker} started")
+
+        while True:
+            job = claim_job(worker)
+            if job is None:
+                if options["once"]:
+                    return
+                time.sleep(options["poll_interval"])
+                continue
+
+            self.stdout.write(f"Importing {job.pid} (job {job.pk}, attempt {job.attempts})")
+            run_job(job)
+            job.refresh_from_db()
+            self.stdout.write(f"Job {job.pk}: {job.status}, {job.imported_videos}/{job.total_videos} videos")
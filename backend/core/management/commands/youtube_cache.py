@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from core.models import YouTubeMetadataCache
+from core.utils.youtube import extract_id
+from core.utils.youtube_cache import get_cached_youtube_metadata
+
+
+class Command(BaseCommand):
+    help = "Inspect, warm or purge the YouTube metadata cache"
+
+    def add_arguments(self, parser):
+        sub = parser.add_subparsers(dest="action", required=True)
+
+        inspect = sub.add_parser("inspect", help="Show cache totals, or a single entry")
+        inspect.add_argument("url", nargs="?", help="YouTube URL of an entry to show")
+
+        warm = sub.add_parser("warm", help="Fetch or revalidate entries for the given URLs")
+        warm.add_argument("urls", nargs="+")
+        warm.add_argument("--force", action="store_true", help="Revalidate even if the entry is still fresh")
+
+        purge = sub.add_parser("purge", help="Delete cache entries")
+        purge.add_argument("--expired", action="store_true", help="Only delete expired entries")
+        purge.add_argument("--type", choices=["video", "playlist"])
+
+    def handle(self, *args, **options):
+        getattr(self, f"handle_{options['action']}")(options)
+
+    def handle_inspect(self, options):
+        now = timezone.now()
+        if options["url"]:
+            content_type, content_id = extract_id(options["url"])
+            entry = YouTubeMetadataCache.objects.filter(content_type=content_type, content_id=content_id).first()
+            if entry is None:
+                raise CommandError("Not cached")
+            self.stdout.write(f"{entry}  etag={entry.etag or '-'}")
+            self.stdout.write(f"fetched {entry.fetched_at:%Y-%m-%d %H:%M}, expires {entry.expires_at:%Y-%m-%d %H:%M} ({'fresh' if entry.is_fresh(now) else 'expired'})")
+            self.stdout.write(f"title: {entry.data.get('title')}")
+            return
+
+        rows = (
+            YouTubeMetadataCache.objects.values("content_type")
+            .annotate(total=Count("id"), fresh=Count("id", filter=Q(expires_at__gt=now)))
+            .order_by("content_type")
+        )
+        for row in rows:
+            self.stdout.write(f"{row['content_type']:<9} {row['total']:>7} entries, {row['fresh']:>7} fresh")
+
+    def handle_warm(self, options):
+        for url in options["urls"]:
+            data = get_cached_youtube_metadata(url, force=options["force"])
+            if "error" in data:
+                self.stderr.write(f"{url}: {data['error']}")
+            else:
+                self.stdout.write(f"{data['type']}:{data['id']}  {data['title']}")
+
+    def handle_purge(self, options):
+        entries = YouTubeMetadataCache.objects.all()
+        if options["expired"]:
+            entries = entries.filter(expires_at__lte=timezone.now())
+        if options["type"]:
+            entries = entries.filter(content_type=options["type"])
+        deleted, _ = entries.delete()
+        self.stdout.write(f"Deleted {deleted} entries")
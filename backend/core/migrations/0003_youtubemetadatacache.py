@@ -0,0 +1,37 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0002_remove_useractivitylog_details"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="YouTubeMetadataCache",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("content_type", models.CharField(max_length=20)),
+                ("content_id", models.CharField(max_length=100)),
+                ("etag", models.CharField(blank=True, default="", max_length=100)),
+                ("page_etags", models.JSONField(blank=True, default=list)),
+                ("data", models.JSONField()),
+                ("fetched_at", models.DateTimeField()),
+                ("expires_at", models.DateTimeField()),
+            ],
+            options={
+                "unique_together": {("content_type", "content_id")},
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:29
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Playlist = apps.get_model("core", "Playlist")
+    Video = apps.get_model("core", "Video")
+    videos = Video.objects.filter(playlist=OuterRef("pk")).order_by().values("playlist")
+    Playlist.objects.update(
+        total_videos=Coalesce(Subquery(videos.annotate(n=Count("pk")).values("n")), 0),
+        completed_videos=Coalesce(
+            Subquery(videos.filter(is_completed=True).annotate(n=Count("pk")).values("n")), 0
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0005_idempotencykey"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="playlist",
+            name="completed_videos",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="playlist",
+            name="total_videos",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="playlist",
+            index=models.Index(
+                fields=["user", "total_videos", "completed_videos"],
+                name="core_playli_user_id_74b43c_idx",
+            ),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_playlist_video_counters"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="video",
+            index=models.Index(
+                fields=["user", "-imported_at", "-id"],
+                name="core_video_user_id_371ea7_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,115 @@
+from django.db import migrations
+
+# pg_trgm is left installed on reverse, other apps may rely on it
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    ALTER TABLE core_video ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX core_video_search_vector_idx ON core_video USING gin (search_vector)",
+    "CREATE INDEX core_video_name_trgm_idx ON core_video USING gin (name gin_trgm_ops)",
+    """
+    ALTER TABLE core_playlist ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(name, '')), 'A')
+    ) STORED
+    """,
+    "CREATE INDEX core_playlist_search_vector_idx ON core_playlist USING gin (search_vector)",
+    "CREATE INDEX core_playlist_name_trgm_idx ON core_playlist USING gin (name gin_trgm_ops)",
+]
+
+POSTGRES_BACKWARD = [
+    "ALTER TABLE core_playlist DROP COLUMN search_vector",
+    "DROP INDEX IF EXISTS core_playlist_name_trgm_idx",
+    "ALTER TABLE core_video DROP COLUMN search_vector",
+    "DROP INDEX IF EXISTS core_video_name_trgm_idx",
+]
+
+# rowid is id * 2 for videos and id * 2 + 1 for playlists, so triggers can
+# find a row without scanning the UNINDEXED columns
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE core_search_fts USING fts5(
+        name, description, kind UNINDEXED, item_id UNINDEXED, user_id UNINDEXED,
+        tokenize = 'trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER core_video_fts_insert AFTER INSERT ON core_video BEGIN
+        INSERT INTO core_search_fts (rowid, name, description, kind, item_id, user_id)
+        VALUES (new.id * 2, new.name, coalesce(new.description, ''), 'video', new.id, new.user_id);
+    END
+    """,
+    """
+    CREATE TRIGGER core_video_fts_update AFTER UPDATE OF name, description, user_id ON core_video BEGIN
+        DELETE FROM core_search_fts WHERE rowid = old.id * 2;
+        INSERT INTO core_search_fts (rowid, name, description, kind, item_id, user_id)
+        VALUES (new.id * 2, new.name, coalesce(new.description, ''), 'video', new.id, new.user_id);
+    END
+    """,
+    """
+    CREATE TRIGGER core_video_fts_delete AFTER DELETE ON core_video BEGIN
+        DELETE FROM core_search_fts WHERE rowid = old.id * 2;
+    END
+    """,
+    """
+    CREATE TRIGGER core_playlist_fts_insert AFTER INSERT ON core_playlist BEGIN
+        INSERT INTO core_search_fts (rowid, name, description, kind, item_id, user_id)
+        VALUES (new.id * 2 + 1, new.name, '', 'playlist', new.id, new.user_id);
+    END
+    """,
+    """
+    CREATE TRIGGER core_playlist_fts_update AFTER UPDATE OF name, user_id ON core_playlist BEGIN
+        DELETE FROM core_search_fts WHERE rowid = old.id * 2 + 1;
+        INSERT INTO core_search_fts (rowid, name, description, kind, item_id, user_id)
+        VALUES (new.id * 2 + 1, new.name, '', 'playlist', new.id, new.user_id);
+    END
+    """,
+    """
+    CREATE TRIGGER core_playlist_fts_delete AFTER DELETE ON core_playlist BEGIN
+        DELETE FROM core_search_fts WHERE rowid = old.id * 2 + 1;
+    END
+    """,
+    """
+    INSERT INTO core_search_fts (rowid, name, description, kind, item_id, user_id)
+    SELECT id * 2, name, coalesce(description, ''), 'video', id, user_id FROM core_video
+    """,
+    """
+    INSERT INTO core_search_fts (rowid, name, description, kind, item_id, user_id)
+    SELECT id * 2 + 1, name, '', 'playlist', id, user_id FROM core_playlist
+    """,
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS core_video_fts_insert",
+    "DROP TRIGGER IF EXISTS core_video_fts_update",
+    "DROP TRIGGER IF EXISTS core_video_fts_delete",
+    "DROP TRIGGER IF EXISTS core_playlist_fts_insert",
+    "DROP TRIGGER IF EXISTS core_playlist_fts_update",
+    "DROP TRIGGER IF EXISTS core_playlist_fts_delete",
+    "DROP TABLE IF EXISTS core_search_fts",
+]
+
+
+def run_for_vendor(postgres, sqlite):
+    def run(apps, schema_editor):
+        statements = {"postgresql": postgres, "sqlite": sqlite}.get(schema_editor.connection.vendor, [])
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_video_keyset_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor(POSTGRES_FORWARD, SQLITE_FORWARD),
+            run_for_vendor(POSTGRES_BACKWARD, SQLITE_BACKWARD),
+        ),
+    ]
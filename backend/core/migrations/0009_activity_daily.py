@@ -0,0 +1,46 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_library_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userprofile",
+            name="timezone",
+            field=models.CharField(default="UTC", max_length=64),
+        ),
+        migrations.CreateModel(
+            name="UserActivityDaily",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("activity_type", models.CharField(max_length=100)),
+                ("count", models.IntegerField(default=0)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="core.userprofile",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("user", "date", "activity_type")},
+            },
+        ),
+    ]
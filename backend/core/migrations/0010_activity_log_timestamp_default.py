@@ -0,0 +1,19 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:35
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0009_activity_daily"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="useractivitylog",
+            name="timestamp",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
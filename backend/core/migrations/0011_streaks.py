@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0010_activity_log_timestamp_default"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userprofile",
+            name="last_active_date",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="userprofile",
+            name="longest_streak",
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:48
+
+import itertools
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def opening_balances(apps, schema_editor):
+    """One ledger row per user with XP, so ledger sums match UserProfile.xp."""
+    UserProfile = apps.get_model("core", "UserProfile")
+    XPLedger = apps.get_model("core", "XPLedger")
+    rows = UserProfile.objects.filter(xp__gt=0).values_list("pk", "xp").iterator(chunk_size=2000)
+    while True:
+        batch = list(itertools.islice(rows, 2000))
+        if not batch:
+            break
+        XPLedger.objects.bulk_create(
+            [XPLedger(user_id=pk, amount=xp, reason="Opening balance") for pk, xp in batch]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0011_streaks"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="XPLedger",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("amount", models.IntegerField()),
+                ("reason", models.CharField(max_length=100)),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="core.userprofile",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["created_at", "user"],
+                        name="core_xpledg_created_7c55cc_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(opening_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0012_xp_ledger"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LeaderboardBucket",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("board", models.CharField(max_length=32)),
+                ("floor", models.IntegerField()),
+                ("count", models.IntegerField(default=0)),
+            ],
+            options={
+                "unique_together": {("board", "floor")},
+            },
+        ),
+        migrations.CreateModel(
+            name="LeaderboardScore",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("board", models.CharField(max_length=32)),
+                ("score", models.IntegerField(default=0)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="core.userprofile",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["board", "-score", "user"],
+                        name="core_leader_board_0efce1_idx",
+                    )
+                ],
+                "unique_together": {("board", "user")},
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.3 on 2026-10-18 07:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0013_leaderboard"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="QuizQuestionSet",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("content_type", models.CharField(max_length=20)),
+                ("content_id", models.CharField(max_length=100)),
+                ("version", models.IntegerField()),
+                ("questions", models.JSONField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "unique_together": {("content_type", "content_id", "version")},
+            },
+        ),
+        migrations.AddField(
+            model_name="quiz",
+            name="question_set",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                to="core.quizquestionset",
+            ),
+        ),
+    ]
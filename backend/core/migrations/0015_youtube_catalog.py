@@ -0,0 +1,222 @@
+from importlib import import_module
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+library_search = import_module("core.migrations.0008_library_search")
+run_for_vendor = library_search.run_for_vendor
+
+BATCH_SIZE = 2000
+
+# search moves to the catalog: per-user rows are joined to it by YouTube ID
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE core_youtubevideo ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX core_youtubevideo_search_vector_idx ON core_youtubevideo USING gin (search_vector)",
+    "CREATE INDEX core_youtubevideo_name_trgm_idx ON core_youtubevideo USING gin (name gin_trgm_ops)",
+    """
+    ALTER TABLE core_youtubeplaylist ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(name, '')), 'A')
+    ) STORED
+    """,
+    "CREATE INDEX core_youtubeplaylist_search_vector_idx ON core_youtubeplaylist USING gin (search_vector)",
+    "CREATE INDEX core_youtubeplaylist_name_trgm_idx ON core_youtubeplaylist USING gin (name gin_trgm_ops)",
+]
+
+POSTGRES_BACKWARD = [
+    "ALTER TABLE core_youtubeplaylist DROP COLUMN search_vector",
+    "DROP INDEX IF EXISTS core_youtubeplaylist_name_trgm_idx",
+    "ALTER TABLE core_youtubevideo DROP COLUMN search_vector",
+    "DROP INDEX IF EXISTS core_youtubevideo_name_trgm_idx",
+]
+
+# same rowid scheme as 0008, over catalog ids; item_key is the YouTube ID
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE core_search_fts USING fts5(
+        name, description, kind UNINDEXED, item_key UNINDEXED,
+        tokenize = 'trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER core_youtubevideo_fts_insert AFTER INSERT ON core_youtubevideo BEGIN
+        INSERT INTO core_search_fts (rowid, name, description, kind, item_key)
+        VALUES (new.id * 2, new.name, coalesce(new.description, ''), 'video', new.vid);
+    END
+    """,
+    """
+    CREATE TRIGGER core_youtubevideo_fts_update AFTER UPDATE OF vid, name, description ON core_youtubevideo BEGIN
+        DELETE FROM core_search_fts WHERE rowid = old.id * 2;
+        INSERT INTO core_search_fts (rowid, name, description, kind, item_key)
+        VALUES (new.id * 2, new.name, coalesce(new.description, ''), 'video', new.vid);
+    END
+    """,
+    """
+    CREATE TRIGGER core_youtubevideo_fts_delete AFTER DELETE ON core_youtubevideo BEGIN
+        DELETE FROM core_search_fts WHERE rowid = old.id * 2;
+    END
+    """,
+    """
+    CREATE TRIGGER core_youtubeplaylist_fts_insert AFTER INSERT ON core_youtubeplaylist BEGIN
+        INSERT INTO core_search_fts (rowid, name, description, kind, item_key)
+        VALUES (new.id * 2 + 1, new.name, '', 'playlist', new.pid);
+    END
+    """,
+    """
+    CREATE TRIGGER core_youtubeplaylist_fts_update AFTER UPDATE OF pid, name ON core_youtubeplaylist BEGIN
+        DELETE FROM core_search_fts WHERE rowid = old.id * 2 + 1;
+        INSERT INTO core_search_fts (rowid, name, description, kind, item_key)
+        VALUES (new.id * 2 + 1, new.name, '', 'playlist', new.pid);
+    END
+    """,
+    """
+    CREATE TRIGGER core_youtubeplaylist_fts_delete AFTER DELETE ON core_youtubeplaylist BEGIN
+        DELETE FROM core_search_fts WHERE rowid = old.id * 2 + 1;
+    END
+    """,
+    """
+    INSERT INTO core_search_fts (rowid, name, description, kind, item_key)
+    SELECT id * 2, name, coalesce(description, ''), 'video', vid FROM core_youtubevideo
+    """,
+    """
+    INSERT INTO core_search_fts (rowid, name, description, kind, item_key)
+    SELECT id * 2 + 1, name, '', 'playlist', pid FROM core_youtubeplaylist
+    """,
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS core_youtubevideo_fts_insert",
+    "DROP TRIGGER IF EXISTS core_youtubevideo_fts_update",
+    "DROP TRIGGER IF EXISTS core_youtubevideo_fts_delete",
+    "DROP TRIGGER IF EXISTS core_youtubeplaylist_fts_insert",
+    "DROP TRIGGER IF EXISTS core_youtubeplaylist_fts_update",
+    "DROP TRIGGER IF EXISTS core_youtubeplaylist_fts_delete",
+    "DROP TABLE IF EXISTS core_search_fts",
+]
+
+CATALOGS = [
+    ("Video", "YouTubeVideo", "vid", ["name", "url", "description"]),
+    ("Playlist", "YouTubePlaylist", "pid", ["name", "url", "thumbnail"]),
+]
+
+
+def fill_catalog(apps, schema_editor):
+    """One catalog row per YouTube ID, from its most recently imported copy.
+
+    Copies are streamed in ID order, so duplicates arrive together and only
+    a batch of catalog rows is held in memory at a time.
+    """
+    db = schema_editor.connection.alias
+    for model, catalog, key, fields in CATALOGS:
+        source = apps.get_model("core", model)
+        catalog = apps.get_model("core", catalog)
+        copies = (
+            source.objects.using(db)
+            .order_by(key, "-imported_at", "-id")
+            .values_list(key, *fields)
+            .iterator(chunk_size=BATCH_SIZE)
+        )
+        batch, last = [], None
+        for row in copies:
+            if row[0] == last:
+                continue
+            last = row[0]
+            batch.append(catalog(**dict(zip([key] + fields, row))))
+            if len(batch) == BATCH_SIZE:
+                catalog.objects.using(db).bulk_create(batch)
+                batch = []
+        catalog.objects.using(db).bulk_create(batch)
+
+
+def restore_metadata(apps, schema_editor):
+    """Copy catalog metadata back onto every per-user row."""
+    db = schema_editor.connection.alias
+    for model, catalog, key, fields in CATALOGS:
+        rows = apps.get_model("core", catalog).objects.using(db).filter(**{key: OuterRef(key)})
+        apps.get_model("core", model).objects.using(db).update(
+            **{field: Subquery(rows.values(field)[:1]) for field in fields}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0014_quiz_question_sets"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="YouTubePlaylist",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("pid", models.CharField(max_length=100, unique=True)),
+                ("name", models.CharField(max_length=200)),
+                ("url", models.URLField()),
+                ("thumbnail", models.URLField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="YouTubeVideo",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("vid", models.CharField(max_length=100, unique=True)),
+                ("name", models.CharField(max_length=200)),
+                ("url", models.URLField()),
+                ("description", models.TextField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        # the old search indexes the per-user columns about to be dropped
+        migrations.RunPython(
+            run_for_vendor(library_search.POSTGRES_BACKWARD, library_search.SQLITE_BACKWARD),
+            run_for_vendor(library_search.POSTGRES_FORWARD, library_search.SQLITE_FORWARD),
+        ),
+        migrations.RunPython(fill_catalog, restore_metadata),
+        # vid/pid keep their columns and values and become foreign keys
+        # into the catalog; pid stops being unique across users
+        migrations.AlterField(
+            model_name="video",
+            name="vid",
+            field=models.ForeignKey(db_column="vid", on_delete=django.db.models.deletion.PROTECT, to="core.youtubevideo", to_field="vid"),
+        ),
+        migrations.RenameField(
+            model_name="video",
+            old_name="vid",
+            new_name="youtube",
+        ),
+        migrations.AlterField(
+            model_name="playlist",
+            name="pid",
+            field=models.ForeignKey(db_column="pid", on_delete=django.db.models.deletion.PROTECT, to="core.youtubeplaylist", to_field="pid"),
+        ),
+        migrations.RenameField(
+            model_name="playlist",
+            old_name="pid",
+            new_name="youtube",
+        ),
+        migrations.AlterUniqueTogether(
+            name="playlist",
+            unique_together={("user", "youtube")},
+        ),
+        # defaults only so that reversing can add the columns back
+        migrations.AlterField(model_name="video", name="name", field=models.CharField(default="", max_length=200)),
+        migrations.AlterField(model_name="video", name="url", field=models.URLField(default="")),
+        migrations.AlterField(model_name="playlist", name="name", field=models.CharField(default="", max_length=200)),
+        migrations.AlterField(model_name="playlist", name="url", field=models.URLField(default="")),
+        migrations.RemoveField(model_name="video", name="name"),
+        migrations.RemoveField(model_name="video", name="url"),
+        migrations.RemoveField(model_name="video", name="description"),
+        migrations.RemoveField(model_name="playlist", name="name"),
+        migrations.RemoveField(model_name="playlist", name="url"),
+        migrations.RemoveField(model_name="playlist", name="thumbnail"),
+        migrations.RunPython(
+            run_for_vendor(POSTGRES_FORWARD, SQLITE_FORWARD),
+            run_for_vendor(POSTGRES_BACKWARD, SQLITE_BACKWARD),
+        ),
+    ]
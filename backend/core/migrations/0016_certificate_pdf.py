@@ -0,0 +1,49 @@
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+
+def fill_titles(apps, schema_editor):
+    """Title existing certificates from the catalog and point them at the
+    download endpoint instead of the placeholder path, which never existed.
+    Their PDFs are rendered on first download (or by rerender_certificates)."""
+    db = schema_editor.connection.alias
+    Certificate = apps.get_model("core", "Certificate")
+    certificates = (
+        Certificate.objects.using(db)
+        .select_related("video__youtube", "playlist__youtube")
+        .only("certificate_id", "video__youtube__name", "playlist__youtube__name")
+        .order_by("id")
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    batch = []
+    for certificate in certificates:
+        source = certificate.video or certificate.playlist
+        certificate.title = source.youtube.name if source else ""
+        certificate.download_url = f"/api/certificates/{certificate.certificate_id}.pdf"
+        batch.append(certificate)
+        if len(batch) == BATCH_SIZE:
+            Certificate.objects.using(db).bulk_update(batch, ["title", "download_url"])
+            batch = []
+    Certificate.objects.using(db).bulk_update(batch, ["title", "download_url"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0015_youtube_catalog"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="certificate",
+            name="title",
+            field=models.CharField(blank=True, default="", max_length=200),
+        ),
+        migrations.AddField(
+            model_name="certificate",
+            name="pdf_sha256",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+        migrations.RunPython(fill_titles, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 07:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0016_certificate_pdf"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="certificate",
+            name="revoked_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 import uuid
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 
 # Create your models here.
 class UserProfile(models.Model):
@@ -10,7 +11,12 @@ class UserProfile(models.Model):
     profile_pic = models.URLField(blank=True , null=True)
     xp = models.IntegerField(default=0)
     level = models.IntegerField(default=1)
+    # maintained by core.utils.streaks; rebuild with recompute_streaks
     streak_count = models.IntegerField(default=0)
+    longest_streak = models.IntegerField(default=0)
+    last_active_date = models.DateField(null=True, blank=True)
+    # IANA name; activity is bucketed into days in this zone
+    timezone = models.CharField(max_length=64, default="UTC")
     joined_at = models.DateTimeField(auto_now_add=True)
 
     def calculate_level(self):
@@ -19,38 +25,91 @@ class UserProfile(models.Model):
     def __str__(self):
         return self.email
     
-class Playlist(models.Model):
-    user = models.ForeignKey(UserProfile , on_delete=models.CASCADE)
-    pid = models.CharField(max_length=100 , unique=True)
+class PlaylistQuerySet(models.QuerySet):
+    def completed(self):
+        return self.filter(total_videos__gt=0, completed_videos=models.F('total_videos'))
+
+
+class YouTubePlaylist(models.Model):
+    """A YouTube playlist's metadata, stored once however many users save it."""
+    pid = models.CharField(max_length=100, unique=True)
     name = models.CharField(max_length=200)
     url = models.URLField()
-    thumbnail = models.URLField(blank=True , null=True)
-    imported_at = models.DateTimeField(auto_now_add=True)
+    thumbnail = models.URLField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name
+
+
+class YouTubeVideo(models.Model):
+    """A YouTube video's metadata, stored once however many users save it."""
+    vid = models.CharField(max_length=100, unique=True)
+    name = models.CharField(max_length=200)
+    url = models.URLField()
+    description = models.TextField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
+
+
+class Playlist(models.Model):
+    user = models.ForeignKey(UserProfile , on_delete=models.CASCADE)
+    # youtube_id is the playlist ID itself, no join needed to look it up
+    youtube = models.ForeignKey(YouTubePlaylist , to_field='pid' , db_column='pid' , on_delete=models.PROTECT)
+    imported_at = models.DateTimeField(auto_now_add=True)
+    # maintained by core.utils.library; rebuild with reconcile_playlist_counters
+    total_videos = models.IntegerField(default=0)
+    completed_videos = models.IntegerField(default=0)
+
+    objects = PlaylistQuerySet.as_manager()
+
+    class Meta:
+        unique_together = ('user' , 'youtube')
+        indexes = [models.Index(fields=['user', 'total_videos', 'completed_videos'])]
+
+    def __str__(self):
+        return self.youtube_id
     
 class Video(models.Model):
     user = models.ForeignKey(UserProfile , on_delete=models.CASCADE)
-    vid = models.CharField(max_length=100)
-    name = models.CharField(max_length=200)
-    url = models.URLField()
-    description = models.TextField(blank=True , null=True)
+    # youtube_id is the video ID itself, no join needed to look it up
+    youtube = models.ForeignKey(YouTubeVideo , to_field='vid' , db_column='vid' , on_delete=models.PROTECT)
     playlist = models.ForeignKey(Playlist , on_delete=models.SET_NULL , null=True , blank=True)
     imported_at = models.DateTimeField()
     watch_progress = models.FloatField(default = 0.0)
     is_completed = models.BooleanField(default=False)
 
     class Meta:
-        unique_together = ('user' , 'vid')
+        unique_together = ('user' , 'youtube')
+        indexes = [models.Index(fields=['user', '-imported_at', '-id'])]
 
     def __str__(self):
-        return self.name
+        return self.youtube_id
     
+class QuizQuestionSet(models.Model):
+    """Generated questions for one YouTube video or playlist, shared by every
+    user who takes a quiz on it (see core.utils.quiz_cache)."""
+    content_type = models.CharField(max_length=20)
+    content_id = models.CharField(max_length=100)
+    # core.utils.quiz_generator.VERSION that produced the questions
+    version = models.IntegerField()
+    questions = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('content_type', 'content_id', 'version')
+
+    def __str__(self):
+        return f"{self.content_type}:{self.content_id} v{self.version}"
+
 class Quiz(models.Model):
     user = models.ForeignKey(UserProfile , on_delete=models.CASCADE)
     video = models.ForeignKey(Video , on_delete=models.SET_NULL , null=True , blank=True)
     playlist = models.ForeignKey(Playlist, on_delete=models.SET_NULL, null=True, blank=True)
+    # new quizzes point at a shared question set; older ones carry a copy
+    question_set = models.ForeignKey(QuizQuestionSet, on_delete=models.PROTECT, null=True, blank=True)
     questions = models.JSONField(default=list)
     score = models.FloatField(null=True, blank=True)
     passed = models.BooleanField(null=True, blank=True)
@@ -60,6 +119,9 @@ class Quiz(models.Model):
         if not self.video and not self.playlist:
             raise ValidationError("Quiz must be linked to either a video or playlist.")
 
+    def get_questions(self):
+        return self.question_set.questions if self.question_set_id else self.questions
+
     def __str__(self):
         return f"Quiz {self.id} - {self.user}"
 
@@ -71,7 +133,12 @@ class Certificate(models.Model):
     playlist = models.ForeignKey(Playlist, on_delete=models.SET_NULL, null=True, blank=True)
     certificate_id = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
     issued_at = models.DateTimeField(auto_now_add=True)
+    # what the PDF is for, copied from the catalog when issued
+    title = models.CharField(max_length=200, blank=True, default="")
+    # content hash of the rendered PDF; empty until it has been rendered
+    pdf_sha256 = models.CharField(max_length=64, blank=True, default="")
     download_url = models.URLField(blank=True, null=True)
+    revoked_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return str(self.certificate_id)
@@ -79,7 +146,142 @@ class Certificate(models.Model):
 class UserActivityLog(models.Model):
     user = models.ForeignKey(UserProfile, on_delete=models.CASCADE)
     activity_type = models.CharField(max_length=100)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # set when the event happens, not when a batch of them is written
+    timestamp = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.user.email} - {self.activity_type}"
+
+class XPLedger(models.Model):
+    """One row per XP award. UserProfile.xp is the running total of these,
+    kept by core.utils.xp.award_xp; compact_xp_ledger folds old rows."""
+    user = models.ForeignKey(UserProfile, on_delete=models.CASCADE)
+    amount = models.IntegerField()
+    reason = models.CharField(max_length=100)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=['created_at', 'user'])]
+
+    def __str__(self):
+        return f"{self.user_id} {self.amount:+d} {self.reason}"
+
+class LeaderboardScore(models.Model):
+    """A user's score on one board ("global", "weekly:2026-W42") for the
+    database leaderboard backend in core.utils.leaderboard."""
+    board = models.CharField(max_length=32)
+    user = models.ForeignKey(UserProfile, on_delete=models.CASCADE)
+    score = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('board', 'user')
+        indexes = [models.Index(fields=['board', '-score', 'user'])]
+
+    def __str__(self):
+        return f"{self.board} {self.user_id}: {self.score}"
+
+class LeaderboardBucket(models.Model):
+    """How many users on ``board`` have a score in [floor, floor + bucket
+    width), so a rank only has to count users in its own bucket."""
+    board = models.CharField(max_length=32)
+    floor = models.IntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('board', 'floor')
+
+    def __str__(self):
+        return f"{self.board} {self.floor}+: {self.count}"
+
+class UserActivityDaily(models.Model):
+    """Per-user, per-local-day activity counts, kept in step with
+    UserActivityLog by core.utils.activity.record_activity."""
+    user = models.ForeignKey(UserProfile, on_delete=models.CASCADE)
+    date = models.DateField()
+    activity_type = models.CharField(max_length=100)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'date', 'activity_type')
+
+    def __str__(self):
+        return f"{self.user_id} {self.date} {self.activity_type}: {self.count}"
+
+class YouTubeMetadataCache(models.Model):
+    content_type = models.CharField(max_length=20)
+    content_id = models.CharField(max_length=100)
+    etag = models.CharField(max_length=100, blank=True, default="")
+    # playlists: [page_token, etag, video_count, next_page_token] per
+    # playlistItems page, since the playlist's own etag doesn't cover them
+    page_etags = models.JSONField(default=list, blank=True)
+    data = models.JSONField()
+    fetched_at = models.DateTimeField()
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('content_type', 'content_id')
+
+    def is_fresh(self, now=None):
+        return self.expires_at > (now or timezone.now())
+
+    def __str__(self):
+        return f"{self.content_type}:{self.content_id}"
+
+
+class ImportJob(models.Model):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    user = models.ForeignKey(UserProfile, on_delete=models.CASCADE)
+    pid = models.CharField(max_length=100)
+    playlist = models.ForeignKey(Playlist, on_delete=models.SET_NULL, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    total_videos = models.IntegerField(default=0)
+    imported_videos = models.IntegerField(default=0)
+    pages_done = models.IntegerField(default=0)
+    # where to resume from; committed together with each page of videos
+    next_page_token = models.CharField(max_length=200, blank=True, null=True)
+    attempts = models.IntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+    locked_by = models.CharField(max_length=100, blank=True, default="")
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "created_at"])]
+
+    @property
+    def percent_complete(self):
+        if self.status == self.DONE:
+            return 100.0
+        if not self.total_videos:
+            return 0.0
+        return round(min(self.imported_videos / self.total_videos, 1) * 100, 1)
+
+    def __str__(self):
+        return f"Import {self.pid} for {self.user_id} ({self.status})"
+
+
+class IdempotencyKey(models.Model):
+    """Stored response of a write request, replayed when a client retries
+    it with the same Idempotency-Key."""
+    user = models.ForeignKey(UserProfile, on_delete=models.CASCADE)
+    key = models.CharField(max_length=100)
+    status_code = models.IntegerField()
+    response = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('user', 'key')
 
     def __str__(self):
-        return f"{self.user.email} - {self.activity_type}"
\ No newline at end of file
+        return f"{self.user_id}:{self.key}"
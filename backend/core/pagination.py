@@ -0,0 +1,63 @@
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import PageNumberPagination
+
+
+class BodyPageNumberPagination(PageNumberPagination):
+    """PageNumberPagination for our POST endpoints, which send the page
+    number in the body rather than the query string."""
+
+    def __init__(self, page=1, page_size=10):
+        self.page = page
+        self.page_size = page_size
+
+    def get_page_number(self, request, paginator):
+        return self.page
+
+
+def encode_cursor(*values):
+    raw = "|".join(v.isoformat() if isinstance(v, datetime) else str(v) for v in values)
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    if not isinstance(cursor, str):
+        raise ValidationError({"cursor": "Invalid cursor"})
+    try:
+        imported_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(imported_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise ValidationError({"cursor": "Invalid cursor"})
+
+
+def paginate_keyset(queryset, cursor=None, page_size=10):
+    """Newest-first page over ``(imported_at, id)`` starting after ``cursor``.
+
+    Seeks with a WHERE on the index instead of OFFSET, so every page costs
+    the same, and never COUNTs. Returns ``(rows, next_cursor)``.
+    """
+    queryset = queryset.order_by("-imported_at", "-id")
+    if cursor:
+        imported_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(imported_at__lt=imported_at) | Q(imported_at=imported_at, id__lt=pk))
+
+    rows = list(queryset[:page_size + 1])
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        return rows, encode_cursor(rows[-1].imported_at, rows[-1].id)
+    return rows, None
+
+
+def paginate_slice(queryset, page=1, page_size=10):
+    """Page ``page`` of ``queryset`` without a COUNT: one extra row tells
+    whether there is a next page. Returns ``(rows, has_next)``; every row
+    if ``page_size`` is None."""
+    if page_size is None:
+        return list(queryset), False
+    page, page_size = max(page, 1), max(page_size, 1)
+    start = (page - 1) * page_size
+    rows = list(queryset[start:start + page_size + 1])
+    return rows[:page_size], len(rows) > page_size
@@ -1,25 +1,50 @@
-from rest_framework import serializers
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
 from .models import (
     UserProfile, Playlist, Video,
-    Quiz, Certificate, UserActivityLog
+    Quiz, Certificate, UserActivityLog, ImportJob
 )
+from .utils.activity import parse_timezone
+from .utils.streaks import current_streak
 
 class UserProfileSerializer(serializers.ModelSerializer):
+    # a streak lapses at the user's midnight, before anything rewrites it
+    streak_count = serializers.SerializerMethodField()
+
     class Meta:
         model = UserProfile
         fields = '__all__'
 
+    def get_streak_count(self, user):
+        tz = parse_timezone(user.timezone) or parse_timezone("UTC")
+        return current_streak(user.streak_count, user.last_active_date, timezone.localtime(timezone.now(), tz).date())
+
 
+# metadata comes from the shared catalog; querysets should select_related('youtube')
 class PlaylistSerializer(serializers.ModelSerializer):
+    pid = serializers.CharField(source='youtube_id', read_only=True)
+    name = serializers.CharField(source='youtube.name', read_only=True)
+    url = serializers.CharField(source='youtube.url', read_only=True)
+    thumbnail = serializers.CharField(source='youtube.thumbnail', read_only=True, allow_null=True)
+
     class Meta:
         model = Playlist
-        fields = '__all__'
+        fields = ['id', 'user', 'pid', 'name', 'url', 'thumbnail', 'imported_at', 'total_videos', 'completed_videos']
 
 
 class VideoSerializer(serializers.ModelSerializer):
+    vid = serializers.CharField(source='youtube_id', read_only=True)
+    name = serializers.CharField(source='youtube.name', read_only=True)
+    url = serializers.CharField(source='youtube.url', read_only=True)
+    description = serializers.CharField(source='youtube.description', read_only=True, allow_null=True)
+
     class Meta:
         model = Video
-        fields = '__all__'
+        fields = ['id', 'user', 'vid', 'name', 'url', 'description', 'playlist', 'imported_at',
+                  'watch_progress', 'is_completed']
 
 
 class QuizSerializer(serializers.ModelSerializer):
@@ -38,3 +63,101 @@ class UserActivityLogSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserActivityLog
         fields = '__all__'
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    percent_complete = serializers.ReadOnlyField()
+
+    class Meta:
+        model = ImportJob
+        fields = ['id', 'pid', 'playlist', 'status', 'total_videos', 'imported_videos',
+                  'pages_done', 'percent_complete', 'error', 'created_at', 'finished_at']
+
+
+def _iso_datetime(value, tz):
+    # DateTimeField.to_representation with ISO 8601 output, with the time
+    # zone looked up once per list instead of once per value
+    if value is None:
+        return None
+    value = value.astimezone(tz).isoformat() if tz else value.isoformat()
+    return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+
+def _string(value, tz):
+    return None if value is None else str(value)
+
+
+class RowSchema:
+    """Read-only list schema that skips ModelSerializer: rows come from one
+    ``values_list()`` over just the listed columns and are turned into
+    dicts by a function built once per schema, without building model
+    instances or per-field serializer objects.
+
+    ``fields`` maps output keys to lookups on ``model``
+    (``name="youtube__name"``). Datetimes and UUIDs are rendered as the
+    ModelSerializer field would, so the output matches the serializers'.
+    """
+
+    def __init__(self, model, **fields):
+        self.model = model
+        self.keys = tuple(fields)
+        self.lookups = tuple(fields.values())
+        self._to_dict = self._compile([self._converter(lookup) for lookup in self.lookups])
+
+    def _converter(self, lookup):
+        *path, name = lookup.split("__")
+        model = self.model
+        for part in path:
+            model = model._meta.get_field(part).related_model
+        field = model._meta.get_field(name)
+        if field.is_relation:
+            field = field.target_field
+        if isinstance(field, models.DateTimeField):
+            if api_settings.DATETIME_FORMAT.lower() != ISO_8601:
+                representation = serializers.DateTimeField().to_representation
+                return lambda value, tz: representation(value)
+            return _iso_datetime
+        if isinstance(field, models.UUIDField):
+            return _string
+        return None
+
+    def _compile(self, converters):
+        keys = self.keys
+        # only the datetime and UUID columns need a call per value
+        converted = tuple((key, i, c) for i, (key, c) in enumerate(zip(keys, converters)) if c)
+
+        def to_dict(row, tz):
+            values = dict(zip(keys, row))
+            for key, i, convert in converted:
+                values[key] = convert(row[i], tz)
+            return values
+
+        return to_dict
+
+    def values(self, queryset):
+        """``queryset`` as named rows of this schema's columns; slice, page
+        or order it like the queryset, then hand the rows to ``dicts``."""
+        return queryset.values_list(*self.lookups, named=True)
+
+    def dicts(self, rows):
+        tz = timezone.get_current_timezone() if settings.USE_TZ else None
+        to_dict = self._to_dict
+        return [to_dict(row, tz) for row in rows]
+
+    def data(self, queryset):
+        return self.dicts(self.values(queryset))
+
+
+# list endpoints: no descriptions, which the classroom fetches per video
+VIDEO_LIST = RowSchema(
+    Video,
+    id="id", user="user", vid="youtube_id", name="youtube__name", url="youtube__url",
+    playlist="playlist", imported_at="imported_at", watch_progress="watch_progress", is_completed="is_completed",
+)
+
+PLAYLIST_LIST = RowSchema(
+    Playlist,
+    id="id", user="user", pid="youtube_id", name="youtube__name", url="youtube__url",
+    thumbnail="youtube__thumbnail", imported_at="imported_at", total_videos="total_videos",
+    completed_videos="completed_videos",
+)
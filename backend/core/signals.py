@@ -0,0 +1,23 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import forget_profile_id
+from .models import Certificate, UserProfile
+from .utils.activity import forget_user_timezone
+from .utils.verification import forget_verification
+from .utils.versions import CERTIFICATES, PROFILE, bump_version
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_profile_caches(sender, instance, **kwargs):
+    forget_profile_id(instance.uid)
+    forget_user_timezone(instance.pk)
+    bump_version(instance.pk, PROFILE)
+
+
+@receiver(post_save, sender=Certificate)
+@receiver(post_delete, sender=Certificate)
+def invalidate_certificate_verification(sender, instance, **kwargs):
+    forget_verification(instance.certificate_id)
+    bump_version(instance.user_id, CERTIFICATES)
@@ -0,0 +1,2 @@
+"""Local stand-ins for the external services the backend talks to, used by
+the test suite and the benchmark commands."""
@@ -0,0 +1,51 @@
+import time
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from ..utils import firebase
+from ..utils.firebase import FirebaseTokenVerifier, StaticKeySource
+
+
+class FakeFirebase:
+    """Signs ID tokens with a throwaway RSA key and, while installed, makes
+    the app verify tokens against that key instead of Google's."""
+
+    kid = "fake-firebase-key"
+
+    def __init__(self, project_id="learnproof-test"):
+        self.project_id = project_id
+        self.private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.verifier = FirebaseTokenVerifier(project_id, StaticKeySource({self.kid: self.private_key.public_key()}))
+        self._previous = None
+
+    def token(self, uid, lifetime=3600, **claims):
+        now = int(time.time())
+        payload = {
+            "sub": uid,
+            "aud": self.project_id,
+            "iss": f"https://securetoken.google.com/{self.project_id}",
+            "iat": now,
+            "exp": now + lifetime,
+            "email": f"{uid}@example.com",
+            **claims,
+        }
+        return jwt.encode(payload, self.private_key, algorithm="RS256", headers={"kid": self.kid})
+
+    def auth_header(self, uid, **claims):
+        """Test client kwargs for an ``Authorization: Bearer`` header."""
+        return {"HTTP_AUTHORIZATION": f"Bearer {self.token(uid, **claims)}"}
+
+    def install(self):
+        self._previous = firebase._verifier
+        firebase.set_token_verifier(self.verifier)
+
+    def uninstall(self):
+        firebase.set_token_verifier(self._previous)
+
+    def __enter__(self):
+        self.install()
+        return self
+
+    def __exit__(self, *exc):
+        self.uninstall()
@@ -0,0 +1,33 @@
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryCounter:
+    """``connection.execute_wrapper`` that only counts, for loops too long
+    for CaptureQueriesContext (which keeps the last 9000 queries)."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def query_budget(limit, label=""):
+    """Fail if the block runs more than ``limit`` SQL queries, listing every
+    query it ran. Yields the CaptureQueriesContext for further checks."""
+    with CaptureQueriesContext(connection) as ctx:
+        yield ctx
+
+    if len(ctx) > limit:
+        lines = [f"{label or 'block'} ran {len(ctx)} queries, budget is {limit}:"]
+        lines += [f"{i}. {q['sql']}" for i, q in enumerate(ctx.captured_queries, 1)]
+        raise QueryBudgetExceeded("\n".join(lines))
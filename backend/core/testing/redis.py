@@ -0,0 +1,77 @@
+import threading
+
+from sortedcontainers import SortedList
+
+
+class FakeRedis:
+    """In-process stand-in for the sorted-set commands RedisLeaderboard uses,
+    with redis-py's signatures and return types (members come back as bytes,
+    scores as floats, ties in descending member order)."""
+
+    def __init__(self):
+        self._sets = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _member(member):
+        return member if isinstance(member, bytes) else str(member).encode()
+
+    def _get(self, key):
+        # (scores by member, SortedList of (score, member))
+        return self._sets.get(key) or ({}, SortedList())
+
+    def _put(self, key, member, score):
+        scores, entries = self._sets.setdefault(key, ({}, SortedList()))
+        old = scores.get(member)
+        if old is not None:
+            entries.remove((old, member))
+        scores[member] = score
+        entries.add((score, member))
+
+    def zincrby(self, key, amount, member):
+        member = self._member(member)
+        with self._lock:
+            score = self._get(key)[0].get(member, 0.0) + float(amount)
+            self._put(key, member, score)
+            return score
+
+    def zadd(self, key, mapping):
+        with self._lock:
+            added = 0
+            for member, score in mapping.items():
+                member = self._member(member)
+                added += member not in self._get(key)[0]
+                self._put(key, member, float(score))
+            return added
+
+    def zscore(self, key, member):
+        with self._lock:
+            return self._get(key)[0].get(self._member(member))
+
+    def zrevrank(self, key, member):
+        member = self._member(member)
+        with self._lock:
+            scores, entries = self._get(key)
+            if member not in scores:
+                return None
+            return len(entries) - 1 - entries.bisect_left((scores[member], member))
+
+    def zrevrange(self, key, start, end, withscores=False):
+        with self._lock:
+            entries = self._get(key)[1]
+            size = len(entries)
+            end = size - 1 if end == -1 else min(end, size - 1)
+            rows = [entries[size - 1 - i] for i in range(start, end + 1)]
+            return [(m, s) for s, m in rows] if withscores else [m for _, m in rows]
+
+    def zcard(self, key):
+        with self._lock:
+            return len(self._get(key)[0])
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(self._sets.pop(key, None) is not None for key in keys)
+
+    def expire(self, key, seconds):
+        # nothing outlives the process anyway
+        return key in self._sets
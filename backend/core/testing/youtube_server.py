@@ -0,0 +1,157 @@
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def make_video(video_id, title=None, description="", seconds=300):
+    return {
+        "id": video_id,
+        "snippet": {
+            "title": title or f"Video {video_id}",
+            "description": description,
+            "channelTitle": "Stand-in Channel",
+            "publishedAt": "2024-01-01T00:00:00Z",
+            "thumbnails": {"high": {"url": f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"}},
+        },
+        "contentDetails": {"duration": f"PT{seconds // 60}M{seconds % 60}S"},
+        "statistics": {"viewCount": "1", "likeCount": "0"},
+    }
+
+
+class FakeYouTubeServer:
+    """A small HTTP server answering the videos, playlists and playlistItems
+    list calls of the YouTube Data API from in-memory data.
+
+    ``latency`` seconds are slept before every response to mimic the real
+    API. Responses carry ETags and honour If-None-Match. Point the app at it
+    with ``YOUTUBE_API_ROOT_URL = server.root_url``.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.videos = {}
+        self.playlists = {}
+        self.requests = []
+        self._lock = threading.Lock()
+        self._httpd = None
+
+    def add_video(self, video_id, **kwargs):
+        self.videos[video_id] = make_video(video_id, **kwargs)
+        return self.videos[video_id]
+
+    def add_playlist(self, playlist_id, n_videos, title=None):
+        video_ids = [f"{playlist_id[-4:]}{i:07d}" for i in range(n_videos)]
+        for i, video_id in enumerate(video_ids):
+            self.add_video(video_id, seconds=60 + i % 600)
+        self.playlists[playlist_id] = {
+            "id": playlist_id,
+            "title": title or f"Playlist {playlist_id}",
+            "video_ids": video_ids,
+        }
+        return video_ids
+
+    @property
+    def root_url(self):
+        host, port = self._httpd.server_address
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server.handle(self)
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def handle(self, request):
+        url = urlparse(request.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        resource = url.path.rstrip("/").rsplit("/", 1)[-1]
+        with self._lock:
+            self.requests.append(resource)
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        handler = getattr(self, f"list_{resource}", None)
+        if handler is None:
+            return self.respond(request, 404, {"error": {"code": 404, "message": "Not found"}})
+
+        body = handler(params)
+        body["etag"] = '"%s"' % hashlib.md5(json.dumps(body, sort_keys=True).encode()).hexdigest()
+        if request.headers.get("If-None-Match") == body["etag"]:
+            return self.respond(request, 304, None)
+        self.respond(request, 200, body)
+
+    def respond(self, request, status, body):
+        payload = json.dumps(body).encode() if body is not None else b""
+        request.send_response(status)
+        if body is not None:
+            request.send_header("Content-Type", "application/json")
+            request.send_header("ETag", body["etag"])
+        request.send_header("Content-Length", str(len(payload)))
+        request.end_headers()
+        request.wfile.write(payload)
+
+    def list_videos(self, params):
+        ids = params.get("id", "").split(",")
+        return {"items": [self.videos[i] for i in ids if i in self.videos]}
+
+    def list_playlists(self, params):
+        playlist = self.playlists.get(params.get("id"))
+        if playlist is None:
+            return {"items": []}
+        return {"items": [{
+            "id": playlist["id"],
+            "snippet": {
+                "title": playlist["title"],
+                "description": "",
+                "channelTitle": "Stand-in Channel",
+                "publishedAt": "2024-01-01T00:00:00Z",
+                "thumbnails": {"high": {"url": "https://i.ytimg.com/vi/x/hqdefault.jpg"}},
+            },
+            "contentDetails": {"itemCount": len(playlist["video_ids"])},
+        }]}
+
+    def list_playlistItems(self, params):
+        playlist = self.playlists.get(params.get("playlistId"))
+        if playlist is None:
+            return {"items": []}
+        start = int(params.get("pageToken") or 0)
+        size = min(int(params.get("maxResults", 5)), 50)
+        page = playlist["video_ids"][start:start + size]
+        body = {"items": [{
+            "snippet": {
+                "title": self.videos[video_id]["snippet"]["title"],
+                "position": start + i,
+                "resourceId": {"kind": "youtube#video", "videoId": video_id},
+            },
+        } for i, video_id in enumerate(page)]}
+        if start + size < len(playlist["video_ids"]):
+            body["nextPageToken"] = str(start + size)
+        return body
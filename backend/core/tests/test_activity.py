@@ -0,0 +1,88 @@
+from datetime import date, datetime, timezone as dt_timezone
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.models import UserActivityDaily, UserActivityLog, UserProfile
+from core.testing.firebase import FakeFirebase
+from core.utils.activity import activity_graph, write_activity
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=dt_timezone.utc)
+
+
+@override_settings(ACTIVITY_WRITE_MODE="sync")
+class ActivityGraphTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.firebase = FakeFirebase()
+        cls.firebase.install()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.firebase.uninstall()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.kolkata = UserProfile.objects.create(uid="ada", email="ada@example.com", name="Ada", timezone="Asia/Kolkata")
+        self.utc = UserProfile.objects.create(uid="bob", email="bob@example.com", name="Bob")
+        # 20:00 UTC on Jan 1 is already Jan 2 in Kolkata (+05:30)
+        write_activity([
+            (self.kolkata.pk, "Video Accessed", utc(2026, 1, 1, 10)),
+            (self.kolkata.pk, "Video Accessed", utc(2026, 1, 1, 20)),
+            (self.kolkata.pk, "Learning Import", utc(2026, 1, 1, 21)),
+            (self.utc.pk, "Video Accessed", utc(2026, 1, 1, 20)),
+        ])
+
+    def counts(self, user, days=3, end=date(2026, 1, 3)):
+        return [day["activity_count"] for day in activity_graph(user.pk, days, end)]
+
+    def test_rolled_up_by_local_day(self):
+        self.assertEqual(self.counts(self.kolkata), [1, 2, 0])
+        self.assertEqual(self.counts(self.utc), [1, 0, 0])
+        self.assertEqual(
+            activity_graph(self.kolkata.pk, 2, date(2026, 1, 2)),
+            [{"date": "2026-01-01", "activity_count": 1}, {"date": "2026-01-02", "activity_count": 2}],
+        )
+        # one row per (day, type), however many events
+        self.assertEqual(UserActivityDaily.objects.filter(user=self.kolkata).count(), 3)
+
+    def test_graph_is_one_query(self):
+        with self.assertNumQueries(1):
+            activity_graph(self.kolkata.pk, 366, date(2026, 1, 3))
+
+    def test_backfill_matches_rollup(self):
+        before = list(UserActivityDaily.objects.order_by("user", "date", "activity_type").values_list(
+            "user", "date", "activity_type", "count"))
+        UserActivityDaily.objects.all().delete()
+
+        out = StringIO()
+        call_command("backfill_activity_daily", stdout=out)
+        self.assertEqual(out.getvalue().strip(), "Wrote 4 daily rows")
+        after = list(UserActivityDaily.objects.order_by("user", "date", "activity_type").values_list(
+            "user", "date", "activity_type", "count"))
+        self.assertEqual(after, before)
+
+        # a changed timezone moves past events to the new local days
+        UserProfile.objects.filter(pk=self.kolkata.pk).update(timezone="UTC")
+        call_command("backfill_activity_daily", "--user", str(self.kolkata.pk), stdout=StringIO())
+        self.assertEqual(self.counts(self.kolkata), [3, 0, 0])
+        self.assertEqual(UserActivityLog.objects.count(), 4)
+
+    def test_endpoint(self):
+        auth = self.firebase.auth_header("ada")
+        response = self.client.post("/api/activity/", {"days": 2, "endDate": "2026-01-02"}, content_type="application/json", **auth)
+        self.assertEqual([d["activity_count"] for d in response.json()["graph"]], [1, 2])
+
+        response = self.client.get("/api/activity/?days=1000", **auth)
+        self.assertEqual(len(response.json()["graph"]), 366)
+
+        for params in ({"days": "many"}, {"endDate": "yesterday"}):
+            with self.subTest(params):
+                response = self.client.post("/api/activity/", params, content_type="application/json", **auth)
+                self.assertEqual(response.status_code, 400)
@@ -0,0 +1,98 @@
+import threading
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core.models import UserActivityDaily, UserActivityLog, UserProfile
+from core.utils import activity
+from core.utils.activity import flush_activity, record_activity, write_activity
+from core.utils.activity_buffer import ActivityBuffer
+
+
+class Writer:
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+        self.called = threading.Event()
+
+    def __call__(self, events):
+        try:
+            if self.fail:
+                raise RuntimeError("database unavailable")
+            self.batches.append(list(events))
+            return len(events)
+        finally:
+            self.called.set()
+
+
+class ActivityBufferTests(SimpleTestCase):
+    def test_flushed_when_full(self):
+        writer = Writer()
+        buffer = ActivityBuffer(writer, max_size=3, interval=3600)
+        for i in range(3):
+            buffer.add(i)
+        self.assertTrue(writer.called.wait(5))
+        buffer.flush()
+        self.assertEqual(writer.batches, [[0, 1, 2]])
+
+    def test_flushed_on_interval(self):
+        writer = Writer()
+        buffer = ActivityBuffer(writer, max_size=100, interval=0.01)
+        buffer.add("event")
+        self.assertTrue(writer.called.wait(5))
+        self.assertEqual(writer.batches, [["event"]])
+
+    def test_bounded_queue_and_stats(self):
+        writer = Writer()
+        buffer = ActivityBuffer(writer, max_size=100, interval=3600, max_pending=2)
+        for i in range(3):
+            buffer.add(i)
+        self.assertEqual(buffer.stats()["queue_depth"], 2)
+
+        self.assertEqual(buffer.flush(), 2)
+        stats = buffer.stats()
+        self.assertEqual(
+            {k: stats[k] for k in ("queue_depth", "enqueued", "written", "dropped", "flushes")},
+            {"queue_depth": 0, "enqueued": 2, "written": 2, "dropped": 1, "flushes": 1},
+        )
+        self.assertGreater(stats["flush_ms_max"], 0)
+
+    def test_failed_write_requeued(self):
+        writer = Writer(fail=True)
+        buffer = ActivityBuffer(writer, max_size=100, interval=3600)
+        buffer.add("first")
+        with self.assertLogs("core.utils.activity_buffer", "ERROR"):
+            self.assertEqual(buffer.flush(), 0)
+        buffer.add("second")
+
+        writer.fail = False
+        self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(writer.batches, [["first", "second"]])
+        self.assertEqual(buffer.stats()["failed_flushes"], 1)
+
+
+class RecordActivityTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = UserProfile.objects.create(uid="ada", email="ada@example.com", name="Ada")
+
+    @override_settings(ACTIVITY_WRITE_MODE="sync")
+    def test_sync_mode_writes_in_request(self):
+        record_activity(self.user.pk, "Video Accessed")
+        self.assertEqual(UserActivityLog.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(UserActivityDaily.objects.get(user=self.user).count, 1)
+
+    @override_settings(ACTIVITY_WRITE_MODE="buffered")
+    def test_buffered_mode_writes_after_commit(self):
+        buffer = ActivityBuffer(write_activity, max_size=100, interval=3600)
+        with mock.patch.object(activity, "_buffer", buffer):
+            with self.captureOnCommitCallbacks(execute=True):
+                record_activity(self.user.pk, "Video Accessed")
+                record_activity(self.user.pk, "Video Accessed")
+                # nothing is queued until the transaction commits
+                self.assertEqual(buffer.stats()["queue_depth"], 0)
+            self.assertFalse(UserActivityLog.objects.exists())
+
+            self.assertEqual(flush_activity(), 2)
+        self.assertEqual(UserActivityDaily.objects.get(user=self.user).count, 2)
@@ -0,0 +1,114 @@
+import json
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from core.models import Playlist, UserProfile, Video
+from core.testing.firebase import FakeFirebase
+from core.testing.youtube_server import FakeYouTubeServer
+from core.utils.youtube_client import reset_youtube_clients
+
+
+@override_settings(ACTIVITY_WRITE_MODE="sync", YOUTUBE_API_KEY="test-key")
+class AsyncViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.firebase = FakeFirebase()
+        cls.firebase.install()
+        cls.youtube = FakeYouTubeServer().start()
+        cls.youtube.add_video("dQw4w9WgXcQ", title="Never Gonna")
+        cls.youtube.add_playlist("PLasync", 120)
+        cls.youtube_settings = override_settings(YOUTUBE_API_ROOT_URL=cls.youtube.root_url)
+        cls.youtube_settings.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.youtube_settings.disable()
+        cls.youtube.stop()
+        cls.firebase.uninstall()
+        reset_youtube_clients()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        reset_youtube_clients()
+
+    async def post(self, path, data, uid="ada", **headers):
+        return await self.async_client.post(
+            f"/api/{path}", data, content_type="application/json",
+            headers={"Authorization": f"Bearer {self.firebase.token(uid, name='Ada')}", **headers},
+        )
+
+    async def test_signup_and_timezone(self):
+        response = await self.post("async/signup/", {"timezone": "Asia/Kolkata"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["timezone"], "Asia/Kolkata")
+
+        response = await self.post("async/login/", {"timezone": "Europe/Paris"})
+        self.assertEqual(response.json()["timezone"], "Europe/Paris")
+        self.assertEqual(await UserProfile.objects.acount(), 1)
+
+    async def test_authentication_required(self):
+        response = await self.async_client.post("/api/async/import/", {}, content_type="application/json")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response["WWW-Authenticate"], "Bearer")
+        self.assertEqual((await self.post("async/import/", {"url": "x"}, uid="nobody")).status_code, 404)
+
+    async def test_import_matches_sync_view(self):
+        await UserProfile.objects.acreate(uid="ada", email="ada@example.com", name="Ada")
+        url = "https://www.youtube.com/playlist?list=PLasync"
+        response = await self.post("async/import/", {"url": url})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()["data"]
+        self.assertEqual(len(data["videos"]), 120)
+        self.assertTrue(all(v["duration"] for v in data["videos"]))
+
+        # the async import filled the same cache the sync view reads
+        self.youtube.requests.clear()
+        sync = await self.async_client.post(
+            "/api/import/", {"url": url}, content_type="application/json",
+            headers={"Authorization": f"Bearer {self.firebase.token('ada')}"},
+        )
+        self.assertEqual(sync.json()["data"], data)
+        self.assertEqual(self.youtube.requests, [])
+
+    async def test_streamed_preview(self):
+        await UserProfile.objects.acreate(uid="ada", email="ada@example.com", name="Ada")
+        response = await self.post("async/import/", {
+            "url": "https://www.youtube.com/playlist?list=PLasync", "stream": True, "maxPages": 2,
+        })
+        body = b"".join([chunk async for chunk in response.streaming_content])
+        events = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([e["type"] for e in events], ["header", "page", "page", "end"])
+        self.assertEqual(events[-1], {"type": "end", "continuation": "100", "total_videos_fetched": 100})
+
+        # the same from the fresh cache entry the import left behind
+        await self.post("async/import/", {"url": "https://www.youtube.com/playlist?list=PLasync"})
+        response = await self.post("async/import/", {
+            "url": "https://www.youtube.com/playlist?list=PLasync", "stream": True, "maxPages": 2,
+        })
+        body = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(json.loads(body.splitlines()[-1])["continuation"], "100")
+
+    async def test_streamed_preview_rejects_bad_max_pages(self):
+        await UserProfile.objects.acreate(uid="ada", email="ada@example.com", name="Ada")
+        for max_pages in ("two", 0, -1, [2]):
+            response = await self.post("async/import/", {
+                "url": "https://www.youtube.com/playlist?list=PLasync", "stream": True, "maxPages": max_pages,
+            })
+            self.assertEqual(response.status_code, 400, max_pages)
+            self.assertFalse(response.streaming)
+
+    async def test_save_learning_is_idempotent(self):
+        user = await UserProfile.objects.acreate(uid="ada", email="ada@example.com", name="Ada")
+        data = {"data": {
+            "type": "playlist", "id": "PLsaved", "title": "Saved", "url": "https://youtube.com/playlist?list=PLsaved",
+            "videos": [{"video_id": f"v{i}", "title": f"Video {i}", "url": "https://youtu.be/x"} for i in range(3)],
+        }}
+        first = await self.post("async/save-learning/", data, **{"Idempotency-Key": "k1"})
+        again = await self.post("async/save-learning/", data, **{"Idempotency-Key": "k1"})
+
+        self.assertEqual((first.status_code, again.status_code), (201, 201))
+        self.assertEqual(await Playlist.objects.filter(user=user).acount(), 1)
+        self.assertEqual(await Video.objects.filter(user=user).acount(), 3)
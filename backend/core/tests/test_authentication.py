@@ -0,0 +1,67 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from core.authentication import get_profile_id, profile_id_cache_key
+from core.models import UserProfile
+from core.testing.firebase import FakeFirebase
+
+
+class FirebaseAuthenticationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.firebase = FakeFirebase()
+        cls.firebase.install()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.firebase.uninstall()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.user = UserProfile.objects.create(uid="ada", email="ada@example.com", name="Ada")
+
+    def test_bearer_header_and_body_token(self):
+        header = self.client.post("/api/profile/", {}, content_type="application/json", **self.firebase.auth_header("ada"))
+        body = self.client.post("/api/profile/", {"idToken": self.firebase.token("ada")}, content_type="application/json")
+        self.assertEqual(header.status_code, 200)
+        self.assertEqual(header.json(), body.json())
+
+    def test_rejected_requests(self):
+        anonymous = self.client.post("/api/profile/", {}, content_type="application/json")
+        self.assertEqual(anonymous.status_code, 401)
+        self.assertEqual(anonymous["WWW-Authenticate"], "Bearer")
+
+        forged = self.client.post("/api/profile/", {}, content_type="application/json", HTTP_AUTHORIZATION="Bearer nonsense")
+        self.assertEqual(forged.status_code, 401)
+
+        # signed in, but no profile yet
+        response = self.client.post("/api/profile/", {}, content_type="application/json", **self.firebase.auth_header("eve"))
+        self.assertEqual(response.status_code, 404)
+
+    def test_profile_id_cached_across_requests(self):
+        auth = self.firebase.auth_header("ada")
+        self.client.post("/api/continue-watch/", {}, content_type="application/json", **auth)
+        self.assertEqual(cache.get(profile_id_cache_key("ada")), self.user.pk)
+
+        # the uid is resolved from the cache; only the endpoint's own query runs
+        with self.assertNumQueries(1):
+            self.client.post("/api/continue-watch/", {}, content_type="application/json", **auth)
+
+    def test_cache_forgotten_when_profile_changes(self):
+        self.assertEqual(get_profile_id("ada"), self.user.pk)
+        self.user.delete()
+        self.assertIsNone(cache.get(profile_id_cache_key("ada")))
+        self.assertIsNone(get_profile_id("ada"))
+
+        # a miss isn't cached, so signing up afterwards is seen at once
+        user = UserProfile.objects.create(uid="ada", email="ada@example.com", name="Ada")
+        self.assertEqual(get_profile_id("ada"), user.pk)
+
+    def test_signup_creates_profile_once(self):
+        auth = self.firebase.auth_header("grace", name="Grace")
+        first = self.client.post("/api/signup/", {}, content_type="application/json", **auth)
+        again = self.client.post("/api/login/", {}, content_type="application/json", **auth)
+        self.assertEqual(first.json()["id"], again.json()["id"])
+        self.assertEqual(UserProfile.objects.filter(uid="grace").count(), 1)
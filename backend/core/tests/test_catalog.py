@@ -0,0 +1,55 @@
+from django.test import TestCase
+
+from core.models import Playlist, UserProfile, Video, YouTubePlaylist, YouTubeVideo
+from core.utils.library import bulk_upsert_videos, save_playlist
+from core.utils.search import search_library
+
+
+def playlist_data(title="Graph Algorithms", description="Shortest paths with Dijkstra."):
+    return {
+        "type": "playlist", "id": "PLshared", "title": title, "url": "https://youtube.com/playlist?list=PLshared",
+        "thumbnail": "", "videos": [
+            {"video_id": f"shared{i}", "title": f"{title} {i}", "url": f"https://youtu.be/shared{i}",
+             "description": description}
+            for i in range(3)
+        ],
+    }
+
+
+class CatalogTests(TestCase):
+    def setUp(self):
+        self.alice, self.bob = UserProfile.objects.bulk_create([
+            UserProfile(uid=name, email=f"{name}@example.com", name=name) for name in ("alice", "bob")
+        ])
+
+    def test_users_share_catalog_rows(self):
+        save_playlist(self.alice.pk, playlist_data())
+        save_playlist(self.bob.pk, playlist_data())
+
+        self.assertEqual(YouTubePlaylist.objects.count(), 1)
+        self.assertEqual(YouTubeVideo.objects.count(), 3)
+        self.assertEqual(Playlist.objects.filter(youtube_id="PLshared").count(), 2)
+        self.assertEqual(Video.objects.filter(user=self.bob, playlist__youtube_id="PLshared").count(), 3)
+
+    def test_changed_metadata_updates_catalog(self):
+        save_playlist(self.alice.pk, playlist_data())
+        # a preview without a description leaves the stored one alone
+        bulk_upsert_videos(self.bob.pk, [
+            {"video_id": "shared0", "title": "Graph Algorithms, revised", "url": "https://youtu.be/shared0"},
+        ])
+
+        video = YouTubeVideo.objects.get(vid="shared0")
+        self.assertEqual(video.name, "Graph Algorithms, revised")
+        self.assertEqual(video.description, "Shortest paths with Dijkstra.")
+
+    def test_search_only_returns_own_rows(self):
+        save_playlist(self.alice.pk, playlist_data())
+        bulk_upsert_videos(self.bob.pk, playlist_data()["videos"][:1])
+
+        alice_videos, _ = search_library(self.alice.pk, "dijkstra")
+        bob_videos, _ = search_library(self.bob.pk, "dijkstra")
+
+        self.assertCountEqual(alice_videos, Video.objects.filter(user=self.alice).values_list("pk", flat=True))
+        self.assertEqual(bob_videos, list(Video.objects.filter(user=self.bob).values_list("pk", flat=True)))
+        self.assertEqual(search_library(self.bob.pk, "graph")[1], [])
+        self.assertEqual(len(search_library(self.alice.pk, "graph")[1]), 1)
@@ -0,0 +1,164 @@
+import json
+import re
+import tempfile
+import uuid
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from core.models import Certificate, Playlist, Quiz, UserProfile, YouTubePlaylist
+from core.testing.firebase import FakeFirebase
+from core.utils.certificate_pdf import render_certificate
+from core.utils.certificates import get_render_pool, pdf_path, shutdown_render_pool
+from core.utils.verification import revoke_certificates, verify_signature
+
+FIELDS = {"name": "Ada Lovelace", "title": "Notes on (the) Analytical Engine", "issued": "18 October 2026",
+          "certificate_id": "0b0c1a2e-0000-4000-8000-000000000000"}
+
+
+class RenderTests(TestCase):
+    def test_deterministic_with_valid_xref(self):
+        data = render_certificate(FIELDS)
+        self.assertEqual(data, render_certificate(FIELDS))
+        self.assertTrue(data.startswith(b"%PDF-1.4"))
+
+        startxref = int(re.search(rb"startxref\n(\d+)", data).group(1))
+        self.assertTrue(data[startxref:].startswith(b"xref"))
+        for n, offset in enumerate(re.findall(rb"(\d{10}) 00000 n", data), start=1):
+            self.assertTrue(data[int(offset):].startswith(b"%d 0 obj" % n))
+        self.assertIn(b"\\(the\\)", data)
+
+    def test_long_title_is_cut(self):
+        data = render_certificate(dict(FIELDS, title="word " * 200))
+        lines = [line for line in data.split(b"\n") if b"(word" in line]
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[-1].endswith(b" ...) Tj ET"))
+
+    @override_settings(CERTIFICATE_RENDER_WORKERS=1)
+    def test_process_pool_matches_inline(self):
+        try:
+            self.assertEqual(get_render_pool().submit(render_certificate, FIELDS).result(), render_certificate(FIELDS))
+        finally:
+            shutdown_render_pool()
+
+
+@override_settings(CERTIFICATE_RENDER_WORKERS=0, ACTIVITY_WRITE_MODE="sync")
+class DownloadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.firebase = FakeFirebase()
+        cls.firebase.install()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.firebase.uninstall()
+        super().tearDownClass()
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        settings = self.settings(CERTIFICATE_ROOT=root.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.user = UserProfile.objects.create(uid="ada", email="ada@example.com", name="Ada")
+        YouTubePlaylist.objects.create(pid="PLeng", name="Analytical Engines", url="https://youtube.com/playlist")
+        playlist = Playlist.objects.create(user=self.user, youtube_id="PLeng")
+        quiz = Quiz.objects.create(user=self.user, playlist=playlist,
+                                   questions=[{"question": "Q?", "options": ["A", "B"], "answer": "A"}])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/submit-quiz/", {"quizId": quiz.id, "answers": ["A"]},
+                                        content_type="application/json", **self.firebase.auth_header("ada"))
+        self.certificate = Certificate.objects.get(user=self.user)
+        self.assertEqual(response.json()["certificate_url"], f"/api/certificates/{self.certificate.certificate_id}.pdf")
+
+    def get(self, query="", **headers):
+        return self.client.get(f"/api/certificates/{self.certificate.certificate_id}.pdf{query}", **headers)
+
+    def test_rendered_after_commit(self):
+        self.assertEqual(self.certificate.title, "Analytical Engines")
+        self.assertTrue(pdf_path(self.certificate.pdf_sha256).exists())
+        self.assertTrue(self.certificate.download_url.endswith(f"?v={self.certificate.pdf_sha256[:16]}"))
+
+    def test_download_and_revalidate(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertEqual(response["Cache-Control"], "public, max-age=300")
+        body = b"".join(response.streaming_content)
+        self.assertEqual(body, pdf_path(self.certificate.pdf_sha256).read_bytes())
+
+        self.assertIn("immutable", self.client.get(self.certificate.download_url)["Cache-Control"])
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+
+    def test_ranges(self):
+        body = pdf_path(self.certificate.pdf_sha256).read_bytes()
+
+        response = self.get(HTTP_RANGE="bytes=0-99")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 0-99/{len(body)}")
+        self.assertEqual(b"".join(response.streaming_content), body[:100])
+
+        response = self.get(HTTP_RANGE="bytes=-20")
+        self.assertEqual(b"".join(response.streaming_content), body[-20:])
+
+        response = self.get(HTTP_RANGE="bytes=0-99", HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+        response = self.get(HTTP_RANGE=f"bytes={len(body)}-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(body)}")
+
+    def test_missing_file_rendered_on_download(self):
+        pdf_path(self.certificate.pdf_sha256).unlink()
+        Certificate.objects.filter(pk=self.certificate.pk).update(pdf_sha256="")
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(pdf_path(self.certificate.pdf_sha256).exists())
+        self.assertEqual(self.client.get(f"/api/certificates/{uuid.uuid4()}.pdf").status_code, 404)
+
+    def test_deleted_while_rendering_on_download(self):
+        Certificate.objects.filter(pk=self.certificate.pk).update(pdf_sha256="")
+        with mock.patch("core.views.render_now", return_value=None):
+            response = self.get()
+        self.assertEqual(response.status_code, 404)
+
+
+class VerificationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = UserProfile.objects.create(uid="ada", email="ada@example.com", name="Ada Lovelace")
+        self.certificate = Certificate.objects.create(user=user, title="Analytical Engines")
+        self.url = f"/api/certificates/{self.certificate.certificate_id}/verify/"
+
+    def test_repeat_hits_use_cache(self):
+        first = self.client.get(self.url)
+        data = json.loads(first.content)
+        self.assertEqual((data["status"], data["holder"]), ("valid", "Ada Lovelace"))
+        self.assertTrue(verify_signature(data))
+        self.assertFalse(verify_signature(dict(data, holder="Mallory")))
+        self.assertTrue(first["Cache-Control"].startswith("public"))
+
+        with self.assertNumQueries(0):
+            again = self.client.get(self.url)
+            not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual((again.content, again["ETag"]), (first.content, first["ETag"]))
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_revocation_invalidates(self):
+        etag = self.client.get(self.url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(revoke_certificates(Certificate.objects.all()), 1)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)["status"], "revoked")
+        self.assertEqual(self.client.get(f"/api/certificates/{self.certificate.certificate_id}.pdf").status_code, 410)
+
+    def test_unknown_id(self):
+        url = f"/api/certificates/{uuid.uuid4()}/verify/"
+        self.assertEqual(self.client.get(url).status_code, 404)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).status_code, 404)
@@ -0,0 +1,79 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.models import Certificate, UserProfile, Video, YouTubeVideo
+from core.testing.firebase import FakeFirebase
+from core.utils.library import bulk_upsert_videos
+
+
+@override_settings(ACTIVITY_WRITE_MODE="sync")
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.firebase = FakeFirebase()
+        cls.firebase.install()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.firebase.uninstall()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.user = UserProfile.objects.create(uid="ada", email="ada@example.com", name="Ada")
+        YouTubeVideo.objects.create(vid="engine1", name="Engines", url="https://youtu.be/engine1")
+        Video.objects.create(user=self.user, youtube_id="engine1", imported_at=timezone.now())
+        self.auth = self.firebase.auth_header("ada")
+
+    def get(self, path, **headers):
+        return self.client.get(f"/api/{path}", **self.auth, **headers)
+
+    def post(self, path, data):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(f"/api/{path}", data, content_type="application/json", **self.auth)
+
+    def test_not_modified_without_queries(self):
+        first = self.get("continue-watch/")
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first["Cache-Control"], "private, no-cache")
+        self.assertEqual(len(first.json()["videos"]), 1)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get("continue-watch/", HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+            self.assertEqual(self.get("continue-watch/", HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]).status_code, 304)
+
+    def test_writes_change_the_etag(self):
+        etags = {path: self.get(path)["ETag"] for path in ("continue-watch/", "quiz-list/", "certs/", "profile/")}
+
+        self.post("mark-completed/", {"videoId": "engine1"})
+        for path in ("continue-watch/", "quiz-list/", "profile/"):
+            response = self.get(path, HTTP_IF_NONE_MATCH=etags[path])
+            self.assertEqual(response.status_code, 200, path)
+        self.assertEqual(self.get("certs/", HTTP_IF_NONE_MATCH=etags["certs/"]).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Certificate.objects.create(user=self.user, title="Engines")
+        self.assertEqual(self.get("certs/", HTTP_IF_NONE_MATCH=etags["certs/"]).status_code, 200)
+
+    def test_query_string_and_shared_catalog(self):
+        first = self.get("my-learnings/?page_size=5")
+        self.assertEqual(first.json()["videos"]["results"][0]["name"], "Engines")
+        self.assertNotEqual(self.get("my-learnings/?page_size=6")["ETag"], first["ETag"])
+
+        # another user's import renames the shared video
+        other = UserProfile.objects.create(uid="bob", email="bob@example.com", name="Bob")
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_upsert_videos(other.pk, [{"video_id": "engine1", "title": "Engines, revised", "url": "https://youtu.be/engine1"}])
+        response = self.get("my-learnings/?page_size=5", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.json()["videos"]["results"][0]["name"], "Engines, revised")
+
+    def test_activity(self):
+        first = self.get("activity/?days=7")
+        self.assertEqual(len(first.json()["graph"]), 7)
+        self.assertEqual(self.get("activity/?days=7", HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+
+        self.post("classroom/", {"videoId": "engine1"})
+        response = self.get("activity/?days=7", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.json()["graph"][-1]["activity_count"], 1)
@@ -0,0 +1,163 @@
+import datetime
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import jwt
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from django.test import SimpleTestCase
+
+from core.utils.firebase import FirebaseTokenVerifier, HttpKeySource, StaticKeySource, parse_max_age
+
+PROJECT = "learnproof-test"
+
+
+def mint(private_key, kid="k1", lifetime=3600, **claims):
+    now = int(time.time())
+    payload = {
+        "sub": "ada", "aud": PROJECT, "iss": f"https://securetoken.google.com/{PROJECT}",
+        "iat": now, "exp": now + lifetime, **claims,
+    }
+    return jwt.encode(payload, private_key, algorithm="RS256", headers={"kid": kid})
+
+
+def certificate_pem(private_key):
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "securetoken")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder().subject_name(name).issuer_name(name)
+        .public_key(private_key.public_key()).serial_number(1)
+        .not_valid_before(now).not_valid_after(now + datetime.timedelta(days=1))
+        .sign(private_key, hashes.SHA256())
+    )
+    return cert.public_bytes(serialization.Encoding.PEM).decode()
+
+
+class Clock:
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self):
+        return self.now
+
+
+class VerifierTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+    def setUp(self):
+        self.clock = Clock()
+        self.verifier = FirebaseTokenVerifier(
+            PROJECT, StaticKeySource({"k1": self.key.public_key()}), max_entries=2, clock=self.clock,
+        )
+
+    def test_hit_and_miss(self):
+        token = mint(self.key)
+        claims = self.verifier.verify(token)
+        self.assertEqual(claims["uid"], "ada")
+        self.assertEqual(self.verifier.verify(token), claims)
+        self.assertEqual((self.verifier.hits, self.verifier.misses), (1, 1))
+
+        # callers get a copy; the cached claims can't be changed through it
+        claims["uid"] = "eve"
+        self.assertEqual(self.verifier.verify(token)["uid"], "ada")
+
+    def test_evicted_at_exp(self):
+        token = mint(self.key, lifetime=600)
+        exp = self.verifier.verify(token)["exp"]
+        self.clock.now = exp - 1
+        self.verifier.verify(token)
+        self.assertEqual(self.verifier.hits, 1)
+
+        self.clock.now = exp
+        self.assertIsNone(self.verifier.cached(token))
+        self.assertEqual(self.verifier.stats()["cached_tokens"], 0)
+
+    def test_least_recently_used_evicted(self):
+        first, second, third = (mint(self.key, sub=uid) for uid in ("a", "b", "c"))
+        self.verifier.verify(first)
+        self.verifier.verify(second)
+        self.verifier.verify(first)
+        self.verifier.verify(third)
+        self.assertIsNotNone(self.verifier.cached(first))
+        self.assertIsNone(self.verifier.cached(second))
+
+    def test_rejects_bad_tokens(self):
+        other = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        bad = {
+            "aud": mint(self.key, aud="another-project"),
+            "iss": mint(self.key, iss="https://securetoken.google.com/another-project"),
+            "kid": mint(self.key, kid="unknown"),
+            "signature": mint(other),
+            "expired": mint(self.key, lifetime=-3600),
+            "sub": mint(self.key, sub=""),
+            "alg": jwt.encode({"sub": "ada", "aud": PROJECT}, "secret", algorithm="HS256", headers={"kid": "k1"}),
+        }
+        for reason, token in bad.items():
+            with self.subTest(reason), self.assertRaises(jwt.InvalidTokenError):
+                self.verifier.verify(token)
+        self.assertEqual(self.verifier.stats()["cached_tokens"], 0)
+
+
+class HttpKeySourceTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        cls.certs = {"k1": certificate_pem(cls.key)}
+        cls.requests = 0
+        test = cls
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                test.requests += 1
+                body = json.dumps(test.certs).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Cache-Control", "public, max-age=300, must-revalidate, no-transform")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        cls.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=cls.httpd.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.httpd.shutdown()
+        cls.httpd.server_close()
+        super().tearDownClass()
+
+    def test_refresh_follows_max_age(self):
+        clock = Clock()
+        host, port = self.httpd.server_address
+        source = HttpKeySource(f"http://{host}:{port}/", clock=clock)
+        verifier = FirebaseTokenVerifier(PROJECT, source, clock=clock)
+
+        verifier.verify(mint(self.key, sub="a"))
+        clock.now += 299
+        verifier.verify(mint(self.key, sub="b"))
+        self.assertEqual(source.fetches, 1)
+
+        # a key rotated in after the first fetch is only seen once max-age is up
+        rotated = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        type(self).certs = {**self.certs, "k2": certificate_pem(rotated)}
+        with self.assertRaises(jwt.InvalidTokenError):
+            verifier.verify(mint(rotated, kid="k2"))
+
+        clock.now += 1
+        self.assertEqual(verifier.verify(mint(rotated, kid="k2"))["uid"], "ada")
+        self.assertEqual(source.fetches, 2)
+
+    def test_parse_max_age(self):
+        self.assertEqual(parse_max_age("public, max-age=19204, must-revalidate"), 19204)
+        self.assertEqual(parse_max_age("no-cache"), 0)
@@ -0,0 +1,150 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.models import ImportJob, Playlist, UserActivityLog, UserProfile, Video
+from core.testing.firebase import FakeFirebase
+from core.testing.youtube_server import FakeYouTubeServer
+from core.utils import import_jobs
+from core.utils.import_jobs import claim_job, enqueue_playlist_import, run_job
+from core.utils.youtube_client import reset_youtube_clients
+
+
+@override_settings(ACTIVITY_WRITE_MODE="sync", YOUTUBE_API_KEY="test-key", IMPORT_JOB_MAX_ATTEMPTS=2)
+class ImportJobTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.firebase = FakeFirebase()
+        cls.firebase.install()
+        cls.youtube = FakeYouTubeServer().start()
+        cls.video_ids = cls.youtube.add_playlist("PLjobs01", 120)
+        cls.youtube_settings = override_settings(YOUTUBE_API_ROOT_URL=cls.youtube.root_url)
+        cls.youtube_settings.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.youtube_settings.disable()
+        cls.youtube.stop()
+        cls.firebase.uninstall()
+        reset_youtube_clients()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        reset_youtube_clients()
+        self.user = UserProfile.objects.create(uid="ada", email="ada@example.com", name="Ada")
+        self.auth = self.firebase.auth_header("ada")
+
+    def status(self, job):
+        return self.client.get(f"/api/import-jobs/{job.pk}/", **self.auth).json()
+
+    def test_queued_from_save_learning_and_run_by_worker(self):
+        data = {"background": True, "data": {"type": "playlist", "id": "PLjobs01"}}
+        response = self.client.post("/api/save-learning/", data, content_type="application/json", **self.auth)
+        self.assertEqual(response.status_code, 202)
+        job = ImportJob.objects.get(pk=response.json()["job"]["id"])
+        self.assertEqual((job.status, job.percent_complete), (ImportJob.QUEUED, 0.0))
+        # an unfinished job for the same playlist is reused
+        self.assertEqual(enqueue_playlist_import(self.user.pk, "PLjobs01"), job)
+
+        out = StringIO()
+        call_command("run_import_worker", "--once", stdout=out)
+        self.assertIn(f"Job {job.pk}: done, 120/120 videos", out.getvalue())
+
+        status = self.status(job)
+        self.assertEqual((status["status"], status["percent_complete"], status["pages_done"]), ("done", 100.0, 3))
+        playlist = Playlist.objects.get(user=self.user, youtube_id="PLjobs01")
+        self.assertEqual(
+            list(Video.objects.filter(playlist=playlist).order_by("id").values_list("youtube_id", flat=True)),
+            self.video_ids,
+        )
+
+    def test_resumes_from_last_committed_page(self):
+        job = enqueue_playlist_import(self.user.pk, "PLjobs01")
+        save_page = import_jobs.save_page
+        calls = []
+
+        def crash_on_second_page(job, videos):
+            calls.append(len(videos))
+            if len(calls) == 2:
+                raise ConnectionError("worker lost the database")
+            save_page(job, videos)
+
+        with mock.patch("core.utils.import_jobs.save_page", crash_on_second_page), self.assertLogs(import_jobs.logger, "ERROR"):
+            run_job(claim_job("w1"))
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.pages_done, job.imported_videos), (ImportJob.QUEUED, 1, 50))
+        self.assertEqual(job.next_page_token, "50")
+        self.assertEqual(self.status(job)["percent_complete"], 41.7)
+        self.assertEqual(Video.objects.filter(user=self.user).count(), 50)
+
+        self.youtube.requests.clear()
+        run_job(claim_job("w2"))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.imported_videos, job.attempts), (ImportJob.DONE, 120, 2))
+        # the committed page isn't fetched again
+        self.assertEqual(self.youtube.requests.count("playlistItems"), 2)
+        self.assertEqual(Video.objects.filter(user=self.user).count(), 120)
+
+    def test_stale_running_job_reclaimed(self):
+        job = enqueue_playlist_import(self.user.pk, "PLjobs01")
+        self.assertEqual(claim_job("w1"), job)
+        self.assertIsNone(claim_job("w2"))
+
+        ImportJob.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(minutes=10))
+        reclaimed = claim_job("w2")
+        self.assertEqual((reclaimed.pk, reclaimed.locked_by, reclaimed.attempts), (job.pk, "w2", 2))
+
+    def test_reclaimed_job_left_to_new_worker(self):
+        job = enqueue_playlist_import(self.user.pk, "PLjobs01")
+        iter_enriched_pages = import_jobs.iter_enriched_pages
+
+        def reclaimed_after_first_page(pages):
+            for n, page in enumerate(iter_enriched_pages(pages)):
+                if n == 1:
+                    # w1 stalls long enough for w2 to take the job over
+                    ImportJob.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(minutes=10))
+                    self.assertEqual(claim_job("w2").pk, job.pk)
+                yield page
+
+        with mock.patch("core.utils.import_jobs.iter_enriched_pages", reclaimed_after_first_page), self.assertLogs(import_jobs.logger, "WARNING"):
+            run_job(claim_job("w1"))
+
+        job.refresh_from_db()
+        # w1's second page wasn't saved and it neither finished nor failed the job
+        self.assertEqual((job.status, job.locked_by, job.pages_done, job.imported_videos), (ImportJob.RUNNING, "w2", 1, 50))
+        self.assertEqual(Video.objects.filter(user=self.user).count(), 50)
+        self.assertFalse(UserActivityLog.objects.filter(user=self.user).exists())
+
+        job.locked_by = "w2"
+        run_job(job)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.imported_videos), (ImportJob.DONE, 120))
+        self.assertEqual(UserActivityLog.objects.filter(user=self.user, activity_type="Learning Import").count(), 1)
+
+    def test_fails_after_max_attempts(self):
+        job = enqueue_playlist_import(self.user.pk, "PLmissing")
+        with self.assertLogs(import_jobs.logger, "ERROR"):
+            run_job(claim_job("w1"))
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.QUEUED)
+
+        with self.assertLogs(import_jobs.logger, "ERROR"):
+            run_job(claim_job("w1"))
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.FAILED)
+        self.assertTrue(job.error)
+        self.assertIsNone(claim_job("w1"))
+
+    def test_status_is_per_user(self):
+        job = enqueue_playlist_import(self.user.pk, "PLjobs01")
+        UserProfile.objects.create(uid="eve", email="eve@example.com", name="Eve")
+        response = self.client.get(f"/api/import-jobs/{job.pk}/", **self.firebase.auth_header("eve"))
+        self.assertEqual(response.status_code, 404)
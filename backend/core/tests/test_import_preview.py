@@ -0,0 +1,101 @@
+import json
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.models import UserProfile, YouTubeMetadataCache
+from core.testing.firebase import FakeFirebase
+from core.testing.youtube_server import FakeYouTubeServer
+from core.utils.youtube_client import reset_youtube_clients
+
+PLAYLIST_URL = "https://www.youtube.com/playlist?list=PLstream1"
+
+
+@override_settings(YOUTUBE_API_KEY="test-key")
+class StreamedPreviewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.firebase = FakeFirebase()
+        cls.firebase.install()
+        cls.youtube = FakeYouTubeServer().start()
+        cls.video_ids = cls.youtube.add_playlist("PLstream1", 120)
+        cls.youtube_settings = override_settings(YOUTUBE_API_ROOT_URL=cls.youtube.root_url)
+        cls.youtube_settings.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.youtube_settings.disable()
+        cls.youtube.stop()
+        cls.firebase.uninstall()
+        reset_youtube_clients()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        reset_youtube_clients()
+        UserProfile.objects.create(uid="ada", email="ada@example.com", name="Ada")
+        self.youtube.requests.clear()
+
+    def post(self, data):
+        return self.client.post("/api/import/", data, content_type="application/json", **self.firebase.auth_header("ada"))
+
+    def stream(self, **data):
+        response = self.post({"url": PLAYLIST_URL, "stream": True, **data})
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        return [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+
+    def test_header_then_pages(self):
+        events = self.stream()
+        self.assertEqual([e["type"] for e in events], ["header", "page", "page", "page", "end"])
+        self.assertEqual(events[0]["data"]["title"], "Playlist PLstream1")
+        self.assertNotIn("videos", events[0]["data"])
+        videos = [v["video_id"] for e in events if e["type"] == "page" for v in e["videos"]]
+        self.assertEqual(videos, self.video_ids)
+        self.assertEqual(events[-1], {"type": "end", "continuation": None, "total_videos_fetched": 120})
+
+    def test_continuation(self):
+        first = self.stream(maxPages=1)
+        self.assertEqual(first[-1], {"type": "end", "continuation": "50", "total_videos_fetched": 50})
+
+        # the rest, without the header again
+        rest = self.stream(pageToken=first[-1]["continuation"])
+        self.assertEqual([e["type"] for e in rest], ["page", "page", "end"])
+        self.assertEqual(rest[0]["videos"][0]["video_id"], self.video_ids[50])
+
+    def test_served_from_fresh_cache(self):
+        self.post({"url": PLAYLIST_URL})
+        self.youtube.requests.clear()
+
+        events = self.stream(maxPages="2")
+        self.assertEqual([e["type"] for e in events], ["header", "page", "page", "end"])
+        self.assertEqual(events[-1], {"type": "end", "continuation": "100", "total_videos_fetched": 100})
+
+        rest = self.stream(pageToken="100")
+        self.assertEqual([v["video_id"] for v in rest[0]["videos"]], self.video_ids[100:])
+        self.assertEqual(rest[-1]["continuation"], None)
+        self.assertEqual([r for r in self.youtube.requests if r != "videos"], [])
+
+    def test_continuation_from_cache_works_after_expiry(self):
+        self.post({"url": PLAYLIST_URL})
+        continuation = self.stream(maxPages=1)[-1]["continuation"]
+        YouTubeMetadataCache.objects.update(expires_at=timezone.now())
+
+        rest = self.stream(pageToken=continuation)
+        self.assertEqual([v["video_id"] for e in rest if e["type"] == "page" for v in e["videos"]], self.video_ids[50:])
+
+    def test_max_pages_bounded(self):
+        with mock.patch("core.views.MAX_PREVIEW_PAGES", 2):
+            events = self.stream(maxPages=1000)
+        self.assertEqual(events[-1]["continuation"], "100")
+
+    def test_rejects_bad_params_before_streaming(self):
+        for params in ({"maxPages": "lots"}, {"maxPages": 0}, {"maxPages": -3}, {"maxPages": True}, {"pageToken": 50}):
+            with self.subTest(params):
+                response = self.post({"url": PLAYLIST_URL, "stream": True, **params})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {"error": "Invalid pageToken or maxPages"})
+        # enrichment calls left over from earlier streams may still land
+        self.assertEqual([r for r in self.youtube.requests if r != "videos"], [])
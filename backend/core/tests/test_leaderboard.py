@@ -0,0 +1,76 @@
+import random
+
+from django.test import TestCase
+
+from core.models import LeaderboardBucket, UserProfile
+from core.testing.redis import FakeRedis
+from core.utils.leaderboard import (
+    GLOBAL, DatabaseLeaderboard, MemoryLeaderboard, RedisLeaderboard, set_leaderboard, weekly_board,
+)
+from core.utils.xp import award_xp
+
+
+class LeaderboardBackendTests(TestCase):
+    """Each backend, fed through award_xp, must agree with a ranking
+    computed from UserProfile.xp."""
+
+    def setUp(self):
+        self.users = UserProfile.objects.bulk_create([
+            UserProfile(uid=f"lb{i}", email=f"lb{i}@example.com", name=f"LB {i}") for i in range(40)
+        ])
+        self.idle = UserProfile.objects.create(uid="idle", email="idle@example.com", name="Idle")
+
+    def tearDown(self):
+        set_leaderboard(None)
+
+    def award_randomly(self, leaderboard):
+        set_leaderboard(leaderboard)
+        rng = random.Random(7)
+        for _ in range(300):
+            # each award commits on its own, as in a request
+            with self.captureOnCommitCallbacks(execute=True):
+                award_xp(rng.choice(self.users).pk, rng.choice([5, 10, 10, 25, 60]), "Test")
+
+    def check(self, leaderboard, board, exact_ties):
+        xp = dict(UserProfile.objects.filter(xp__gt=0).values_list("pk", "xp"))
+        expected = sorted(xp.items(), key=lambda item: (-item[1], item[0]))
+
+        top = leaderboard.top(board, 10)
+        self.assertEqual([score for _, score in top], [score for _, score in expected[:10]])
+        if exact_ties:
+            self.assertEqual(top, expected[:10])
+
+        for user_id, score in xp.items():
+            rank, got = leaderboard.rank(board, user_id)
+            self.assertEqual(got, score)
+            higher = sum(1 for s in xp.values() if s > score)
+            ties = sum(1 for s in xp.values() if s == score)
+            self.assertTrue(higher < rank <= higher + ties, (user_id, rank, higher, ties))
+            if exact_ties:
+                self.assertEqual(rank, expected.index((user_id, score)) + 1)
+
+        self.assertIsNone(leaderboard.rank(board, self.idle.pk))
+
+    def test_database(self):
+        leaderboard = DatabaseLeaderboard(bucket_width=50)
+        self.award_randomly(leaderboard)
+        self.check(leaderboard, GLOBAL, exact_ties=True)
+        self.check(leaderboard, weekly_board(), exact_ties=True)
+        counts = dict(LeaderboardBucket.objects.filter(board=GLOBAL).values_list("floor", "count"))
+        self.assertEqual(sum(counts.values()), UserProfile.objects.filter(xp__gt=0).count())
+
+    def test_memory(self):
+        leaderboard = MemoryLeaderboard()
+        self.award_randomly(leaderboard)
+        self.check(leaderboard, GLOBAL, exact_ties=True)
+        self.check(leaderboard, weekly_board(), exact_ties=True)
+
+    def test_memory_loads_committed_scores(self):
+        self.award_randomly(DatabaseLeaderboard())
+        self.check(MemoryLeaderboard(), GLOBAL, exact_ties=True)
+
+    def test_redis(self):
+        leaderboard = RedisLeaderboard(FakeRedis())
+        self.award_randomly(leaderboard)
+        self.check(leaderboard, GLOBAL, exact_ties=False)
+        self.check(leaderboard, weekly_board(), exact_ties=False)
@@ -0,0 +1,91 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.models import Playlist, UserProfile, Video, YouTubePlaylist, YouTubeVideo
+from core.pagination import paginate_slice
+from core.testing.firebase import FakeFirebase
+
+
+@override_settings(ACTIVITY_WRITE_MODE="sync")
+class MyLearningsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.firebase = FakeFirebase()
+        cls.firebase.install()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.firebase.uninstall()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.user = UserProfile.objects.create(uid="ada", email="ada@example.com", name="Ada")
+        now = timezone.now()
+        for p in range(25):
+            YouTubePlaylist.objects.create(pid=f"PL{p:02d}", name=f"Playlist {p}", url="https://youtube.com/playlist")
+            Playlist.objects.create(user=self.user, youtube_id=f"PL{p:02d}")
+        for i in range(12):
+            YouTubeVideo.objects.create(vid=f"learn{i:02d}", name=f"Video {i}", url="https://youtu.be/x")
+            Video.objects.create(user=self.user, youtube_id=f"learn{i:02d}", imported_at=now - timedelta(minutes=i))
+
+    def post(self, **data):
+        return self.client.post("/api/my-learnings/", data, content_type="application/json", **self.firebase.auth_header("ada"))
+
+    def test_all_playlists_unless_paged(self):
+        data = self.post().json()
+        self.assertEqual(len(data["playlists"]), 25)
+        self.assertEqual(data["playlist_pagination"], {"page": 1, "next": None, "previous": None})
+
+        data = self.post(playlist_page=2).json()
+        self.assertEqual([pl["pid"] for pl in data["playlists"]], ["PL04", "PL03", "PL02", "PL01", "PL00"])
+        self.assertEqual(data["playlist_pagination"], {"page": 2, "next": None, "previous": 1})
+
+        data = self.post(playlist_page_size=10).json()
+        self.assertEqual(len(data["playlists"]), 10)
+        self.assertEqual(data["playlist_pagination"]["next"], 2)
+
+    def test_video_pages(self):
+        data = self.post(page=2, page_size=5).json()["videos"]
+        self.assertEqual(data["count"], 12)
+        self.assertEqual([v["vid"] for v in data["results"]], [f"learn{i:02d}" for i in range(5, 10)])
+
+        # the query string works the same for GET
+        response = self.client.get("/api/my-learnings/?page=3&page_size=5", **self.firebase.auth_header("ada"))
+        self.assertEqual(len(response.json()["videos"]["results"]), 2)
+
+    def test_out_of_range_values_clamped(self):
+        data = self.post(page=0, page_size=0, playlist_page=-4, playlist_page_size=0).json()
+        self.assertEqual(len(data["videos"]["results"]), 1)
+        self.assertEqual(data["playlist_pagination"], {"page": 1, "next": 2, "previous": None})
+        self.assertEqual(len(data["playlists"]), 1)
+
+        data = self.post(page_size=5000).json()
+        self.assertEqual(len(data["videos"]["results"]), 12)
+
+    def test_rejects_non_integers(self):
+        for params in ({"page": "two"}, {"page_size": "ten"}, {"playlist_page": "x"}, {"playlist_page_size": [5]}):
+            with self.subTest(params):
+                response = self.post(**params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("error", response.json())
+
+        for cursor in (5, ["abc"], {"id": 1}, "not-a-cursor"):
+            with self.subTest(cursor=cursor):
+                response = self.post(cursor=cursor)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {"cursor": "Invalid cursor"})
+
+        response = self.client.get("/api/my-learnings/?page_size=abc", **self.firebase.auth_header("ada"))
+        self.assertEqual(response.status_code, 400)
+
+    def test_paginate_slice(self):
+        playlists = Playlist.objects.order_by("id")
+        rows, has_next = paginate_slice(playlists, 0, 10)
+        self.assertEqual((len(rows), has_next), (10, True))
+        self.assertEqual(paginate_slice(playlists, 3, 10)[1], False)
+        self.assertEqual(len(paginate_slice(playlists, 1, None)[0]), 25)
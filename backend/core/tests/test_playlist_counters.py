@@ -0,0 +1,70 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.models import Playlist, UserProfile, Video
+from core.testing.firebase import FakeFirebase
+from core.utils.library import save_playlist
+
+
+@override_settings(ACTIVITY_WRITE_MODE="sync")
+class PlaylistCounterTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.firebase = FakeFirebase()
+        cls.firebase.install()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.firebase.uninstall()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.user = UserProfile.objects.create(uid="ada", email="ada@example.com", name="Ada")
+        self.playlist = save_playlist(self.user.pk, {
+            "id": "PLcount", "title": "Counted", "url": "https://youtube.com/playlist?list=PLcount",
+            "videos": [{"video_id": f"count{i}", "title": f"Video {i}", "url": "https://youtu.be/x"} for i in range(3)],
+        })
+
+    def post(self, path, data=None):
+        return self.client.post(f"/api/{path}", data or {}, content_type="application/json", **self.firebase.auth_header("ada"))
+
+    def counters(self):
+        self.playlist.refresh_from_db()
+        return self.playlist.total_videos, self.playlist.completed_videos
+
+    def test_completion_and_deletion(self):
+        self.assertEqual(self.counters(), (3, 0))
+        self.post("mark-completed/", {"videoId": "count0"})
+        # completing it again doesn't count twice
+        self.post("mark-completed/", {"videoId": "count0"})
+        self.assertEqual(self.counters(), (3, 1))
+
+        self.post("delete-video/", {"videoId": "count0"})
+        self.assertEqual(self.counters(), (2, 0))
+        self.post("delete-video/", {"videoId": "count1"})
+        self.assertEqual(self.counters(), (1, 0))
+        self.assertEqual(self.post("quiz-list/").json()["playlists"], [])
+
+        self.post("mark-completed/", {"videoId": "count2"})
+        self.assertEqual(self.counters(), (1, 1))
+        [completed] = self.post("complete/").json()["playlists"]
+        self.assertEqual(completed["pid"], "PLcount")
+        self.assertEqual(len(self.post("quiz-list/").json()["playlists"]), 1)
+
+    def test_completed_playlists_in_one_query(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(list(Playlist.objects.filter(user=self.user).completed()), [])
+
+    def test_reconcile_command(self):
+        Video.objects.filter(youtube_id="count0").update(is_completed=True)
+        Playlist.objects.filter(pk=self.playlist.pk).update(total_videos=40, completed_videos=-2)
+
+        out = StringIO()
+        call_command("reconcile_playlist_counters", "--batch-size", "1", stdout=out)
+        self.assertEqual(out.getvalue().strip(), "Recounted 1 playlists")
+        self.assertEqual(self.counters(), (3, 1))
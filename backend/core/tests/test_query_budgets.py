@@ -0,0 +1,259 @@
+"""SQL query budgets per endpoint.
+
+Every endpoint is called for a user with a tiny library and for one with a
+large library. Both calls must stay within the endpoint's budget and run
+the same number of queries, so an N+1 shows up here as a failing test with
+the offending SQL listed instead of as a slow page in production.
+
+Activity is written synchronously here so its queries count against the
+endpoint that records it. Firebase and YouTube are replaced by
+core.testing's FakeFirebase and FakeYouTubeServer.
+
+XP awards go to a database leaderboard with a single bucket: moving a user
+between buckets costs a few extra queries once per bucket width, which
+would otherwise make the count depend on how much XP an award is worth.
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.models import (
+    Certificate, ImportJob, Playlist, Quiz, UserProfile, Video, YouTubeMetadataCache, YouTubePlaylist, YouTubeVideo,
+)
+from core.testing.firebase import FakeFirebase
+from core.testing.queries import query_budget
+from core.testing.youtube_server import FakeYouTubeServer
+from core.utils.leaderboard import DatabaseLeaderboard, set_leaderboard
+from core.utils.library import recount_playlists, save_playlist
+from core.utils.quiz_cache import get_question_set
+from core.utils.xp import award_xp
+from core.utils.youtube_client import reset_youtube_clients
+
+SMALL = {"videos": 3, "playlists": 2, "playlist_size": 2}
+LARGE = {"videos": 300, "playlists": 15, "playlist_size": 20}
+
+QUESTIONS = [{"question": "Q?", "options": ["A", "B", "C", "D"], "answer": "A"}]
+
+
+def uncached(data):
+    """``prepare`` for import calls that must miss the metadata cache."""
+    def prepare(user):
+        YouTubeMetadataCache.objects.all().delete()
+        return data
+    return prepare
+
+
+def earlier_xp(user):
+    """Give the user XP on the leaderboards already, so the request measures
+    an ordinary award rather than the user's first."""
+    award_xp(user.pk, 10, "Earlier")
+
+
+def saved_playlist(uid, size=30):
+    """SaveLearningView data for a playlist of ``size`` videos."""
+    return {
+        "type": "playlist", "id": f"{uid}-save", "title": "Playlist", "url": "https://youtube.com/playlist",
+        "thumbnail": "", "videos": [
+            {"video_id": f"{uid}-s{i}", "title": f"Lesson {i}", "url": "https://youtu.be/x", "description": ""}
+            for i in range(size)
+        ],
+    }
+
+
+def seed_library(uid, videos, playlists, playlist_size):
+    """A user with standalone videos (every other one completed), playlists
+    (the first one fully completed), and a passed quiz and certificate per
+    completed video."""
+    user = UserProfile.objects.create(uid=uid, email=f"{uid}@example.com", name=uid)
+    now = timezone.now()
+
+    YouTubePlaylist.objects.bulk_create([
+        YouTubePlaylist(pid=f"{uid}-PL{i}", name=f"Playlist {i}", url=f"https://youtube.com/playlist?list={uid}-PL{i}")
+        for i in range(playlists)
+    ])
+    lists = Playlist.objects.bulk_create([Playlist(user=user, youtube_id=f"{uid}-PL{i}") for i in range(playlists)])
+    catalog = [
+        YouTubeVideo(vid=f"{uid}-v{i}", name=f"Video {i}", url="https://youtu.be/x", description="about things")
+        for i in range(videos)
+    ]
+    rows = [
+        Video(user=user, youtube_id=f"{uid}-v{i}", imported_at=now - timedelta(minutes=i), is_completed=i % 2 == 0)
+        for i in range(videos)
+    ]
+    for p, playlist in enumerate(lists):
+        catalog += [
+            YouTubeVideo(vid=f"{uid}-p{p}-{i}", name=f"Lesson {i}", url="https://youtu.be/x")
+            for i in range(playlist_size)
+        ]
+        rows += [
+            Video(user=user, youtube_id=f"{uid}-p{p}-{i}", playlist=playlist,
+                  imported_at=now - timedelta(minutes=i), is_completed=p == 0)
+            for i in range(playlist_size)
+        ]
+    YouTubeVideo.objects.bulk_create(catalog)
+    rows = Video.objects.bulk_create(rows)
+    recount_playlists(Playlist.objects.filter(user=user))
+
+    done = [v for v in rows if v.is_completed and v.playlist_id is None]
+    Quiz.objects.bulk_create([Quiz(user=user, video=v, questions=QUESTIONS, score=100, passed=True) for v in done])
+    Certificate.objects.bulk_create([Certificate(user=user, video=v) for v in done])
+    return user
+
+
+@override_settings(ACTIVITY_WRITE_MODE="sync", YOUTUBE_API_KEY="test-key")
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.firebase = FakeFirebase()
+        cls.firebase.install()
+        cls.youtube = FakeYouTubeServer().start()
+        cls.youtube.add_video("dQw4w9WgXcQ")
+        cls.youtube.add_playlist("PLbudget", 30)
+        cls.youtube_settings = override_settings(YOUTUBE_API_ROOT_URL=cls.youtube.root_url)
+        cls.youtube_settings.enable()
+        set_leaderboard(DatabaseLeaderboard(bucket_width=10**9))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.youtube_settings.disable()
+        cls.youtube.stop()
+        cls.firebase.uninstall()
+        reset_youtube_clients()
+        set_leaderboard(None)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        reset_youtube_clients()
+        self.users = 0
+
+    def call(self, user, method, path, data=None):
+        auth = self.firebase.auth_header(user.uid)
+        if method == "get":
+            return self.client.get(path, **auth)
+        return self.client.post(path, data or {}, content_type="application/json", **auth)
+
+    def assertBudget(self, path, budget, data=None, prepare=None, status=200, method="post"):
+        """Call ``/api/<path>`` for a small and a large library.
+
+        ``path`` may be a callable taking the seeded user; ``prepare(user)``
+        returns the request data when it depends on the user's rows.
+        """
+        counts = []
+        for size in (SMALL, LARGE):
+            self.users += 1
+            user = seed_library(f"budget-{self.users}", **size)
+            url = "/api/" + (path(user) if callable(path) else path)
+            body = prepare(user) if prepare else data
+            with query_budget(budget, f"{method.upper()} {url} ({size['videos']} videos)") as ctx:
+                response = self.call(user, method, url, body)
+            self.assertEqual(response.status_code, status, getattr(response, "data", response))
+            counts.append(len(ctx))
+        self.assertEqual(counts[0], counts[1], f"{method.upper()} {path} query count grows with library size: {counts}")
+
+    def test_login(self):
+        self.assertBudget("login/", 2)
+
+    def test_profile(self):
+        self.assertBudget("profile/", 2)
+
+    def test_import_video(self):
+        self.assertBudget("import/", 8, prepare=uncached({"url": "https://www.youtube.com/watch?v=dQw4w9WgXcQ"}))
+
+    def test_import_playlist(self):
+        self.assertBudget("import/", 8, prepare=uncached({"url": "https://www.youtube.com/playlist?list=PLbudget"}))
+
+    def test_import_cached(self):
+        self.call(seed_library("warm", **SMALL), "post", "/api/import/", {"url": "https://www.youtube.com/playlist?list=PLbudget"})
+        self.assertBudget("import/", 2, {"url": "https://www.youtube.com/playlist?list=PLbudget"})
+
+    def test_save_video(self):
+        # a video new to the catalog
+        self.assertBudget("save-learning/", 16, prepare=lambda user: {"data": {
+            "type": "video", "id": f"{user.uid}-new", "title": "Video", "url": "https://youtu.be/new",
+            "description": "",
+        }})
+
+    def test_save_playlist(self):
+        self.assertBudget("save-learning/", 21, status=201, prepare=lambda user: {"data": saved_playlist(user.uid)})
+
+    def test_save_catalogued_playlist(self):
+        # another user saved it first: no catalog writes, only the user's rows
+        def prepare(user):
+            data = saved_playlist(user.uid)
+            save_playlist(seed_library(f"{user.uid}-first", 0, 0, 0).pk, data)
+            return {"data": data}
+        self.assertBudget("save-learning/", 19, status=201, prepare=prepare)
+
+    def test_import_job_status(self):
+        def path(user):
+            return f"import-jobs/{ImportJob.objects.create(user=user, pid='PLbudget').id}/"
+        self.assertBudget(path, 2, method="get")
+
+    def test_continue_watching(self):
+        self.assertBudget("continue-watch/", 2)
+
+    def test_completed(self):
+        self.assertBudget("complete/", 3)
+
+    def test_activity_graph(self):
+        self.assertBudget("activity/", 3, {"days": 365})
+
+    def test_leaderboard(self):
+        def prepare(user):
+            award_xp(user.pk, 250, "Test")
+            return {"period": "weekly", "limit": 20}
+        self.assertBudget("leaderboard/", 7, prepare=prepare)
+
+    def test_my_learnings(self):
+        self.assertBudget("my-learnings/", 5)
+
+    def test_my_learnings_cursor(self):
+        self.assertBudget("my-learnings/", 4, {"cursor": None})
+
+    def test_my_learnings_search(self):
+        self.assertBudget("my-learnings/", 7, {"searchQuery": "lesson"})
+
+    def test_certificates(self):
+        self.assertBudget("certs/", 2)
+
+    def test_quiz_list(self):
+        self.assertBudget("quiz-list/", 3)
+
+    def test_start_quiz(self):
+        # first quiz on this playlist: reads its catalog metadata, generates
+        # and stores its question set
+        self.assertBudget("start-quiz/", 18, prepare=lambda user: {
+            "contentType": "playlist", "contentId": f"{user.uid}-PL0",
+        })
+
+    def test_start_quiz_shared_questions(self):
+        def prepare(user):
+            get_question_set("playlist", f"{user.uid}-PL0", lambda: ("Earlier", "Generated for another user."))
+            return {"contentType": "playlist", "contentId": f"{user.uid}-PL0"}
+        self.assertBudget("start-quiz/", 12, prepare=prepare)
+
+    def test_submit_quiz(self):
+        def prepare(user):
+            earlier_xp(user)
+            quiz = Quiz.objects.create(user=user, playlist=Playlist.objects.get(user=user, youtube_id=f"{user.uid}-PL0"), questions=QUESTIONS)
+            return {"quizId": quiz.id, "answers": ["A"]}
+        self.assertBudget("submit-quiz/", 30, prepare=prepare)
+
+    def test_classroom(self):
+        self.assertBudget("classroom/", 12, prepare=lambda user: {"videoId": f"{user.uid}-p1-0"})
+
+    def test_mark_completed(self):
+        def prepare(user):
+            earlier_xp(user)
+            return {"videoId": f"{user.uid}-p1-0"}
+        self.assertBudget("mark-completed/", 22, prepare=prepare)
+
+    def test_delete_video(self):
+        self.assertBudget("delete-video/", 10, prepare=lambda user: {"videoId": f"{user.uid}-p1-0"})
+
+    def test_delete_playlist(self):
+        self.assertBudget("delete-playlist/", 12, prepare=lambda user: {"playlistId": f"{user.uid}-PL1"})
@@ -0,0 +1,135 @@
+import threading
+from concurrent.futures import Future
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from core.models import QuizQuestionSet
+from core.utils.quiz_cache import (
+    QuizGenerationUnavailable, _generate_once, _inflight, generate, get_question_set, shutdown_generator_pool,
+)
+from core.utils.quiz_generator import BLANK, generate_quiz
+
+TITLE = "Python Decorators Explained"
+DESCRIPTION = """In this video we explore Python decorators and closures.
+A decorator wraps a function to extend its behaviour without modifying it.
+Closures capture variables from the enclosing scope, which makes them useful for factories.
+Subscribe for more! https://example.com/channel
+00:00 Intro"""
+
+
+class QuizGeneratorTests(TestCase):
+    def test_cloze_questions(self):
+        questions = generate_quiz(TITLE, DESCRIPTION, count=5, seed=1)
+        self.assertEqual(len(questions), 4)
+        for q in questions:
+            self.assertIn(BLANK, q["question"])
+            self.assertIn(q["answer"], q["options"])
+            self.assertEqual(len({o.lower() for o in q["options"]}), 4)
+        self.assertFalse(any("Subscribe" in q["question"] or "https" in q["options"] for q in questions))
+
+    def test_same_seed_same_questions(self):
+        self.assertEqual(generate_quiz(TITLE, DESCRIPTION, seed=3), generate_quiz(TITLE, DESCRIPTION, seed=3))
+
+    def test_nothing_to_ask_about(self):
+        self.assertEqual(len(generate_quiz("Hi", "")), 1)
+
+    @override_settings(QUIZ_GENERATOR_WORKERS=1)
+    def test_process_pool_matches_inline(self):
+        try:
+            self.assertEqual(generate(TITLE, DESCRIPTION, 5, 9), generate_quiz(TITLE, DESCRIPTION, 5, 9))
+        finally:
+            shutdown_generator_pool()
+
+
+@override_settings(QUIZ_GENERATOR_WORKERS=0)
+class QuestionSetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_shared_per_content_id(self):
+        calls = []
+
+        def source():
+            calls.append(1)
+            return TITLE, DESCRIPTION
+
+        first = get_question_set("video", "abc123", source)
+        cache.clear()
+        second = get_question_set("video", "abc123", source)
+        third = get_question_set("video", "abc123", source)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(third.questions, first.questions)
+        self.assertEqual(QuizQuestionSet.objects.count(), 1)
+
+    def test_concurrent_first_requests_generate_once(self):
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def slow_source():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return TITLE, DESCRIPTION
+
+        results = []
+        # only the generation step is shared in-process; call it directly so
+        # the thread doesn't need its own database connection
+        worker = threading.Thread(target=lambda: results.append(_generate_once("k", slow_source, 5, 1)))
+        worker.start()
+        started.wait(5)
+        # the first generation is now in flight; join it from this thread
+        threading.Timer(0.2, release.set).start()
+        results.append(_generate_once("k", slow_source, 5, 1))
+        worker.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results[0], results[1])
+
+
+class HeldPool:
+    """Records submitted jobs and leaves them running until the test settles them."""
+
+    def __init__(self):
+        self.jobs = []
+
+    def submit(self, fn, *args):
+        self.jobs.append(Future())
+        return self.jobs[-1]
+
+
+@override_settings(QUIZ_GENERATION_TIMEOUT=0.05)
+class GenerationTimeoutTests(TestCase):
+    def test_retry_waits_for_the_same_job(self):
+        pool = HeldPool()
+        with mock.patch("core.utils.quiz_cache.get_generator_pool", return_value=pool):
+            source = lambda: (TITLE, DESCRIPTION)
+            with self.assertRaises(QuizGenerationUnavailable):
+                _generate_once("slow", source, 5, 1)
+            # the job keeps going: a retry joins it instead of generating again
+            with self.assertRaises(QuizGenerationUnavailable):
+                _generate_once("slow", source, 5, 1)
+            self.assertEqual(len(pool.jobs), 1)
+
+            pool.jobs[0].set_result(["question"])
+            self.assertEqual(_generate_once("slow", source, 5, 1), ["question"])
+            self.assertEqual(len(pool.jobs), 1)
+        self.assertNotIn("slow", _inflight)
+
+    def test_failed_job_not_kept(self):
+        pool = HeldPool()
+        with mock.patch("core.utils.quiz_cache.get_generator_pool", return_value=pool):
+            with self.assertRaises(QuizGenerationUnavailable):
+                _generate_once("broken", lambda: (TITLE, DESCRIPTION), 5, 1)
+            pool.jobs[0].set_exception(ValueError("bad input"))
+            with self.assertRaises(ValueError):
+                _generate_once("broken", lambda: (TITLE, DESCRIPTION), 5, 1)
+            # the next request starts over
+            with self.assertRaises(QuizGenerationUnavailable):
+                _generate_once("broken", lambda: (TITLE, DESCRIPTION), 5, 1)
+            self.assertEqual(len(pool.jobs), 2)
+        _inflight.clear()
@@ -0,0 +1,66 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.models import Playlist, UserProfile, Video, YouTubePlaylist, YouTubeVideo
+from core.serializers import PLAYLIST_LIST, VIDEO_LIST, PlaylistSerializer, VideoSerializer
+from core.testing.firebase import FakeFirebase
+
+
+@override_settings(ACTIVITY_WRITE_MODE="sync")
+class RowSchemaTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.firebase = FakeFirebase()
+        cls.firebase.install()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.firebase.uninstall()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.user = UserProfile.objects.create(uid="ada", email="ada@example.com", name="Ada")
+        YouTubePlaylist.objects.create(pid="PLrows", name="Rows", url="https://youtube.com/playlist?list=PLrows")
+        self.playlist = Playlist.objects.create(user=self.user, youtube_id="PLrows", total_videos=3)
+        now = timezone.now()
+        for i in range(5):
+            YouTubeVideo.objects.create(vid=f"row{i}", name=f"Row {i}", url="https://youtu.be/x", description="long " * 100)
+            Video.objects.create(
+                user=self.user, youtube_id=f"row{i}", playlist=self.playlist if i < 3 else None,
+                imported_at=now - timedelta(minutes=i), watch_progress=i * 10.5, is_completed=i == 0,
+            )
+
+    def test_matches_model_serializers_without_description(self):
+        videos = Video.objects.order_by("id")
+        expected = VideoSerializer(videos.select_related("youtube"), many=True).data
+        for row in expected:
+            del row["description"]
+        self.assertEqual(VIDEO_LIST.data(videos), [dict(row) for row in expected])
+        self.assertEqual(list(VIDEO_LIST.data(videos)[0]), list(VIDEO_LIST.keys))
+
+        playlists = Playlist.objects.all()
+        expected = PlaylistSerializer(playlists.select_related("youtube"), many=True).data
+        self.assertEqual(PLAYLIST_LIST.data(playlists), [dict(row) for row in expected])
+
+    def test_my_learnings(self):
+        auth = self.firebase.auth_header("ada")
+        with self.assertNumQueries(5):
+            data = self.client.get("/api/my-learnings/?page_size=2", **auth).json()
+        self.assertEqual(data["videos"]["count"], 5)
+        self.assertEqual([v["vid"] for v in data["videos"]["results"]], ["row0", "row1"])
+        self.assertNotIn("description", data["videos"]["results"][0])
+        [playlist] = data["playlists"]
+        self.assertEqual([v["vid"] for v in playlist["videos"]], ["row0", "row1", "row2"])
+
+        # keyset pages over the schema's rows
+        seen, cursor = [], ""
+        while cursor is not None:
+            page = self.client.get(f"/api/my-learnings/?page_size=2&cursor={cursor}", **auth).json()["videos"]
+            seen += [v["vid"] for v in page["results"]]
+            cursor = page["next"]
+        self.assertEqual(seen, [f"row{i}" for i in range(5)])
@@ -0,0 +1,106 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core.models import IdempotencyKey, Playlist, UserActivityLog, UserProfile, Video
+from core.testing.firebase import FakeFirebase
+from core.utils.library import bulk_upsert_videos
+
+
+def playlist_data(pid, n_videos, offset=0):
+    return {"data": {
+        "type": "playlist", "id": pid, "title": f"Playlist {pid}", "url": f"https://youtube.com/playlist?list={pid}",
+        "videos": [
+            {"video_id": f"vid{i}", "title": f"Video {i}", "url": f"https://youtu.be/vid{i}"}
+            for i in range(offset, offset + n_videos)
+        ],
+    }}
+
+
+@override_settings(ACTIVITY_WRITE_MODE="sync")
+class SaveLearningTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.firebase = FakeFirebase()
+        cls.firebase.install()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.firebase.uninstall()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.user = UserProfile.objects.create(uid="ada", email="ada@example.com", name="Ada")
+
+    def save(self, data, key=None):
+        headers = {"HTTP_IDEMPOTENCY_KEY": key} if key else {}
+        return self.client.post(
+            "/api/save-learning/", data, content_type="application/json", **self.firebase.auth_header("ada"), **headers,
+        )
+
+    def test_saves_playlist_with_counters(self):
+        response = self.save(playlist_data("PLbulk", 30))
+        self.assertEqual(response.status_code, 201)
+        playlist = Playlist.objects.get(user=self.user, youtube_id="PLbulk")
+        self.assertEqual((playlist.total_videos, playlist.completed_videos), (30, 0))
+        self.assertEqual(Video.objects.filter(playlist=playlist).count(), 30)
+        self.assertEqual(UserActivityLog.objects.filter(user=self.user).count(), 1)
+
+        self.assertEqual(self.save(playlist_data("PLbulk", 30)).json(), {"message": "Playlist already saved"})
+
+    def test_no_queries_per_video(self):
+        # the first save of the day also caches the profile id and starts the streak
+        self.save(playlist_data("PLwarm", 1, offset=5000))
+        counts = []
+        for pid, n in (("PLsmall", 5), ("PLlarge", 400)):
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.save(playlist_data(pid, n, offset=len(counts) * 1000)).status_code, 201)
+            counts.append(len(queries))
+        # no per-video queries; SQLite only splits the large INSERTs into batches
+        self.assertLess(counts[1] - counts[0], 10)
+
+    def test_all_or_nothing(self):
+        with mock.patch("core.utils.library.record_activity", side_effect=RuntimeError("activity store down")):
+            with self.assertRaises(RuntimeError):
+                self.save(playlist_data("PLbulk", 30))
+        self.assertFalse(Playlist.objects.exists())
+        self.assertFalse(Video.objects.exists())
+
+    def test_idempotency_key_replays_first_response(self):
+        first = self.save(playlist_data("PLbulk", 3), key="retry-1")
+        again = self.save(playlist_data("PLbulk", 3), key="retry-1")
+        self.assertEqual((first.status_code, again.status_code), (201, 201))
+        self.assertEqual(first.json(), again.json())
+        self.assertEqual(UserActivityLog.objects.filter(user=self.user).count(), 1)
+
+        # a new key is a new request
+        self.assertEqual(self.save(playlist_data("PLbulk", 3), key="retry-2").json(), {"message": "Playlist already saved"})
+        self.assertEqual(IdempotencyKey.objects.filter(user=self.user).count(), 2)
+
+    def test_invalid_idempotency_key_rejected(self):
+        for key in ("k" * 101, "with space", "caf\u00e9"):
+            with self.subTest(key=key):
+                response = self.client.post(
+                    "/api/save-learning/", {**playlist_data("PLbulk", 3), "idempotencyKey": key},
+                    content_type="application/json", **self.firebase.auth_header("ada"),
+                )
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.save(playlist_data("PLbulk", 3), key="k" * 100).status_code, 201)
+        self.assertEqual(Playlist.objects.count(), 1)
+
+    def test_reimported_videos_move_between_playlists(self):
+        self.save(playlist_data("PLfirst", 4))
+        self.save(playlist_data("PLsecond", 4, offset=2))
+        first, second = Playlist.objects.order_by("id")
+        self.assertEqual((first.total_videos, second.total_videos), (2, 4))
+        self.assertEqual(Video.objects.filter(user=self.user).count(), 6)
+
+    def test_chunks_and_repeated_videos(self):
+        videos = playlist_data("PLbulk", 7)["data"]["videos"]
+        self.assertEqual(bulk_upsert_videos(self.user.pk, videos + videos[:2], chunk_size=3), 7)
+        self.assertEqual(Video.objects.filter(user=self.user).count(), 7)
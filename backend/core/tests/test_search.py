@@ -0,0 +1,75 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.models import Playlist, UserProfile, Video, YouTubePlaylist, YouTubeVideo
+from core.testing.firebase import FakeFirebase
+from core.utils.search import fts_match_expression, search_library
+
+
+@override_settings(ACTIVITY_WRITE_MODE="sync")
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.firebase = FakeFirebase()
+        cls.firebase.install()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.firebase.uninstall()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.user = UserProfile.objects.create(uid="ada", email="ada@example.com", name="Ada")
+        self.videos = {}
+        for vid, name, description in [
+            ("title", "Dynamic Programming", "Memoisation and tabulation."),
+            ("desc", "Lecture 7", "Today: dynamic programming on trees."),
+            ("other", "Sorting", "Quicksort and mergesort."),
+        ]:
+            YouTubeVideo.objects.create(vid=vid, name=name, url="https://youtu.be/x", description=description)
+            self.videos[vid] = Video.objects.create(user=self.user, youtube_id=vid, imported_at=timezone.now()).pk
+        YouTubePlaylist.objects.create(pid="PLdp", name="Dynamic Programming Course", url="https://youtube.com/playlist")
+        self.playlist = Playlist.objects.create(user=self.user, youtube_id="PLdp").pk
+
+    def test_title_ranks_above_description(self):
+        videos, playlists = search_library(self.user.pk, "dynamic programming")
+        self.assertEqual(videos, [self.videos["title"], self.videos["desc"]])
+        self.assertEqual(playlists, [self.playlist])
+
+    def test_partial_words_and_fts_syntax(self):
+        self.assertEqual(search_library(self.user.pk, "quicks")[0], [self.videos["other"]])
+        # operators and quotes in the query are matched literally
+        self.assertEqual(search_library(self.user.pk, 'sort" OR "dynamic'), ([], []))
+        self.assertEqual(search_library(self.user.pk, "NOT"), ([], []))
+
+    def test_short_terms(self):
+        self.assertIsNone(fts_match_expression("a to"))
+        self.assertEqual(fts_match_expression('ab "dp" tree'), '"""dp""" "tree"')
+        # nothing indexable: falls back to a scan
+        self.assertEqual(search_library(self.user.pk, "7")[0], [self.videos["desc"]])
+        self.assertEqual(search_library(self.user.pk, "   "), ([], []))
+
+    def test_my_learnings_keeps_rank_order(self):
+        data = self.client.post(
+            "/api/my-learnings/", {"searchQuery": "dynamic programming"}, content_type="application/json",
+            **self.firebase.auth_header("ada"),
+        ).json()
+        self.assertEqual([v["vid"] for v in data["videos"]["results"]], ["title", "desc"])
+        self.assertEqual([pl["pid"] for pl in data["playlists"]], ["PLdp"])
+
+    def test_catalog_changes_are_searchable(self):
+        YouTubeVideo.objects.filter(vid="other").update(description="Binary search trees.")
+        self.assertEqual(search_library(self.user.pk, "binary")[0], [self.videos["other"]])
+        self.assertEqual(search_library(self.user.pk, "mergesort")[0], [])
+
+    def test_only_own_library_matched(self):
+        YouTubeVideo.objects.create(vid="unsaved", name="Dynamic Programming II", url="https://youtu.be/x")
+        other = UserProfile.objects.create(uid="eve", email="eve@example.com", name="Eve")
+        theirs = Video.objects.create(user=other, youtube_id="unsaved", imported_at=timezone.now()).pk
+        Playlist.objects.create(user=other, youtube_id="PLdp")
+
+        self.assertEqual(search_library(self.user.pk, "dynamic"), ([self.videos["title"], self.videos["desc"]], [self.playlist]))
+        self.assertEqual(search_library(other.pk, "dynamic")[0], [theirs])
@@ -0,0 +1,131 @@
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core.models import UserActivityDaily, UserProfile
+from core.testing.firebase import FakeFirebase
+from core.utils.activity import local_date, record_activity
+from core.utils.streaks import compute_streaks, current_streak, update_streak
+
+JAN = [date(2026, 1, d) for d in range(1, 32)]
+
+
+class ComputeStreaksTests(SimpleTestCase):
+    def test_runs(self):
+        dates = [JAN[0], JAN[1], JAN[2], JAN[5], JAN[6]]
+        self.assertEqual(compute_streaks(dates, JAN[6]), (2, 3, JAN[6]))
+        # still current on the next day, until it ends without activity
+        self.assertEqual(compute_streaks(dates, JAN[7]), (2, 3, JAN[6]))
+        self.assertEqual(compute_streaks(dates, JAN[8]), (0, 3, JAN[6]))
+        self.assertEqual(compute_streaks([], JAN[8]), (0, 0, None))
+
+    def test_current_streak_matches(self):
+        for today in (JAN[6], JAN[7], JAN[8]):
+            current, _, last = compute_streaks([JAN[5], JAN[6]], today)
+            self.assertEqual(current_streak(2, last, today), current)
+        self.assertEqual(current_streak(0, None, JAN[0]), 0)
+
+
+@override_settings(ACTIVITY_WRITE_MODE="sync")
+class StreakTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.firebase = FakeFirebase()
+        cls.firebase.install()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.firebase.uninstall()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.user = UserProfile.objects.create(uid="ada", email="ada@example.com", name="Ada", timezone="Asia/Kolkata")
+
+    def streak(self):
+        self.user.refresh_from_db()
+        return self.user.streak_count, self.user.longest_streak, self.user.last_active_date
+
+    def test_update_streak(self):
+        update_streak(self.user.pk, JAN[0])
+        update_streak(self.user.pk, JAN[1])
+        # the same day again, or an earlier one, changes nothing
+        self.assertEqual(update_streak(self.user.pk, JAN[1]), 0)
+        self.assertEqual(update_streak(self.user.pk, JAN[0]), 0)
+        self.assertEqual(self.streak(), (2, 2, JAN[1]))
+
+        update_streak(self.user.pk, JAN[4])
+        self.assertEqual(self.streak(), (1, 2, JAN[4]))
+
+    def profile(self):
+        return self.client.post("/api/profile/", {}, content_type="application/json", **self.firebase.auth_header("ada")).json()
+
+    def test_lapsed_streak_reads_as_zero(self):
+        today = local_date(self.user.pk)
+        for days_ago, shown in ((0, 5), (1, 5), (2, 0)):
+            UserProfile.objects.filter(pk=self.user.pk).update(
+                streak_count=5, longest_streak=5, last_active_date=today - timedelta(days=days_ago),
+            )
+            with self.subTest(days_ago=days_ago):
+                profile = self.profile()
+                self.assertEqual((profile["streak_count"], profile["longest_streak"]), (shown, 5))
+
+    def test_activity_extends_streak(self):
+        today = local_date(self.user.pk)
+        UserProfile.objects.filter(pk=self.user.pk).update(streak_count=3, longest_streak=3, last_active_date=today - timedelta(days=1))
+        record_activity(self.user.pk, "Video Accessed")
+        record_activity(self.user.pk, "Learning Import")
+        self.assertEqual(self.streak(), (4, 4, today))
+
+    def test_recompute_command(self):
+        today = local_date(self.user.pk)
+        other = UserProfile.objects.create(uid="bob", email="bob@example.com", name="Bob")
+        for user, days in ((self.user, (4, 3, 1, 0)), (other, (5, 4))):
+            UserActivityDaily.objects.bulk_create([
+                UserActivityDaily(user=user, date=today - timedelta(days=d), activity_type="Video Accessed", count=1)
+                for d in days
+            ])
+        UserProfile.objects.filter(pk=other.pk).update(streak_count=2, longest_streak=2, last_active_date=today - timedelta(days=4))
+
+        out = StringIO()
+        call_command("recompute_streaks", "--chunk-size", "1", stdout=out)
+        self.assertEqual(out.getvalue().strip(), "Checked 2 users, updated 2")
+        self.assertEqual(self.streak(), (2, 2, today))
+        other.refresh_from_db()
+        self.assertEqual((other.streak_count, other.longest_streak), (0, 2))
+
+        out = StringIO()
+        call_command("recompute_streaks", stdout=out)
+        self.assertEqual(out.getvalue().strip(), "Checked 2 users, updated 0")
+
+    def test_recompute_leaves_activity_in_between(self):
+        today = local_date(self.user.pk)
+        other = UserProfile.objects.create(uid="bob", email="bob@example.com", name="Bob")
+        for user, days in ((self.user, (2, 1)), (other, (3,))):
+            UserActivityDaily.objects.bulk_create([
+                UserActivityDaily(user=user, date=today - timedelta(days=d), activity_type="Video Accessed", count=1)
+                for d in days
+            ])
+        # Ada's stored streak lags a day behind; Bob's lapsed
+        UserProfile.objects.filter(pk=self.user.pk).update(streak_count=1, longest_streak=1, last_active_date=today - timedelta(days=2))
+        UserProfile.objects.filter(pk=other.pk).update(streak_count=1, longest_streak=1, last_active_date=today - timedelta(days=3))
+
+        def active_while_computing(dates, today):
+            # both users are active after the command read them
+            if not UserProfile.objects.filter(last_active_date=today).exists():
+                record_activity(self.user.pk, "Video Accessed")
+                record_activity(other.pk, "Video Accessed")
+            return compute_streaks(dates, today)
+
+        with mock.patch("core.management.commands.recompute_streaks.compute_streaks", active_while_computing):
+            call_command("recompute_streaks", stdout=StringIO())
+
+        # neither event is overwritten by values computed without it
+        self.assertEqual(self.streak(), (1, 1, today))
+        other.refresh_from_db()
+        self.assertEqual((other.streak_count, other.longest_streak, other.last_active_date), (1, 1, today))
@@ -0,0 +1,78 @@
+import threading
+from io import StringIO
+from datetime import timedelta
+from unittest import skipIf
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from core.models import UserProfile, XPLedger
+from core.utils.xp import award_xp, level_for
+
+THREADS = 8
+AWARDS_PER_THREAD = 25
+
+
+@skipIf(connection.vendor == "sqlite" and connection.is_in_memory_db(),
+        "threads need a database file on SQLite (see LEARNPROOF_DB in settings)")
+class ConcurrentAwardTests(TransactionTestCase):
+    def run_threads(self, target):
+        start = threading.Barrier(THREADS)
+        errors = []
+
+        def worker():
+            try:
+                start.wait()
+                target()
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(THREADS)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+
+    def test_parallel_awards_are_not_lost(self):
+        user = UserProfile.objects.create(uid="xp", email="xp@example.com", name="XP")
+
+        def award():
+            for _ in range(AWARDS_PER_THREAD):
+                award_xp(user.pk, 7, "Stress")
+
+        self.run_threads(award)
+
+        expected = THREADS * AWARDS_PER_THREAD * 7
+        user.refresh_from_db()
+        self.assertEqual(user.xp, expected)
+        self.assertEqual(user.level, level_for(expected))
+        ledger = XPLedger.objects.filter(user=user)
+        self.assertEqual(ledger.count(), THREADS * AWARDS_PER_THREAD)
+        self.assertEqual(ledger.aggregate(total=Sum("amount"))["total"], expected)
+
+
+class CompactionTests(TestCase):
+    def test_folds_old_rows_and_keeps_totals(self):
+        user = UserProfile.objects.create(uid="xp", email="xp@example.com", name="XP")
+        other = UserProfile.objects.create(uid="xp2", email="xp2@example.com", name="XP2")
+        for _ in range(5):
+            award_xp(user.pk, 10, "Quiz Passed")
+        award_xp(other.pk, 10, "Quiz Passed")
+        old = timezone.now() - timedelta(days=200)
+        XPLedger.objects.update(created_at=old)
+        award_xp(user.pk, 3, "Recent")
+
+        call_command("compact_xp_ledger", "--days", "90", stdout=StringIO())
+
+        rows = list(XPLedger.objects.filter(user=user).order_by("created_at").values_list("amount", "reason"))
+        self.assertEqual(rows, [(50, "Compacted"), (3, "Recent")])
+        # a single old row has nothing to fold into
+        self.assertEqual(list(XPLedger.objects.filter(user=other).values_list("reason", flat=True)), ["Quiz Passed"])
+        user.refresh_from_db()
+        self.assertEqual(user.xp, 53)
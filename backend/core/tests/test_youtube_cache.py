@@ -0,0 +1,129 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.models import YouTubeMetadataCache
+from core.testing.youtube_server import FakeYouTubeServer
+from core.utils.youtube_cache import aget_cached_youtube_metadata, get_cached_youtube_metadata
+from core.utils.youtube_client import reset_youtube_clients
+
+VIDEO_URL = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+PLAYLIST_URL = "https://www.youtube.com/playlist?list=PLcache0001"
+
+
+@override_settings(YOUTUBE_API_KEY="test-key")
+class YouTubeCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.youtube = FakeYouTubeServer().start()
+        cls.youtube_settings = override_settings(YOUTUBE_API_ROOT_URL=cls.youtube.root_url)
+        cls.youtube_settings.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.youtube_settings.disable()
+        cls.youtube.stop()
+        reset_youtube_clients()
+        super().tearDownClass()
+
+    def setUp(self):
+        reset_youtube_clients()
+        self.youtube.videos.clear()
+        self.youtube.playlists.clear()
+        self.youtube.add_video("dQw4w9WgXcQ", title="Never Gonna")
+        self.video_ids = self.youtube.add_playlist("PLcache0001", 120)
+        self.youtube.requests.clear()
+
+    def expire(self, content_type):
+        YouTubeMetadataCache.objects.filter(content_type=content_type).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+    def test_fresh_entry_served_without_api_calls(self):
+        first = get_cached_youtube_metadata(VIDEO_URL)
+        self.assertEqual(first["title"], "Never Gonna")
+        self.youtube.requests.clear()
+
+        self.youtube.videos["dQw4w9WgXcQ"]["snippet"]["title"] = "Changed"
+        self.assertEqual(get_cached_youtube_metadata(VIDEO_URL)["title"], "Never Gonna")
+        self.assertEqual(self.youtube.requests, [])
+
+    def test_expired_video_revalidated(self):
+        get_cached_youtube_metadata(VIDEO_URL)
+        self.expire("video")
+        self.youtube.requests.clear()
+
+        # 304: the entry is kept and its lifetime renewed
+        self.assertEqual(get_cached_youtube_metadata(VIDEO_URL)["title"], "Never Gonna")
+        self.assertEqual(self.youtube.requests, ["videos"])
+        self.assertTrue(YouTubeMetadataCache.objects.get(content_type="video").is_fresh())
+
+        self.expire("video")
+        self.youtube.videos["dQw4w9WgXcQ"]["snippet"]["title"] = "Changed"
+        self.assertEqual(get_cached_youtube_metadata(VIDEO_URL)["title"], "Changed")
+
+    def test_playlist_items_revalidated_when_header_unchanged(self):
+        data = get_cached_youtube_metadata(PLAYLIST_URL)
+        self.assertEqual(data["total_videos_fetched"], 120)
+        entry = YouTubeMetadataCache.objects.get(content_type="playlist")
+        self.assertEqual([page[2] for page in entry.page_etags], [50, 50, 20])
+
+        # swap a video on the last page; the item count, and so the
+        # playlist's own etag, stay the same
+        replacement = self.youtube.add_video("swapped0001", title="Swapped", seconds=42)["id"]
+        self.youtube.playlists["PLcache0001"]["video_ids"][110] = replacement
+        self.expire("playlist")
+        self.youtube.requests.clear()
+
+        data = get_cached_youtube_metadata(PLAYLIST_URL)
+        self.assertEqual(data["videos"][110]["video_id"], replacement)
+        self.assertEqual(data["videos"][110]["duration"], "0:42")
+        self.assertEqual([v["video_id"] for v in data["videos"][:110]], self.video_ids[:110])
+        self.assertTrue(all(v["duration"] for v in data["videos"]))
+        # unchanged pages are reused: durations are only looked up for the changed one
+        self.assertEqual(self.youtube.requests, ["playlists"] + ["playlistItems"] * 3 + ["videos"])
+        self.assertEqual(YouTubeMetadataCache.objects.get(content_type="playlist").data, data)
+
+    def test_unchanged_playlist_not_rewritten(self):
+        data = get_cached_youtube_metadata(PLAYLIST_URL)
+        self.expire("playlist")
+        self.youtube.requests.clear()
+
+        self.assertEqual(get_cached_youtube_metadata(PLAYLIST_URL), data)
+        self.assertEqual(self.youtube.requests, ["playlists"] + ["playlistItems"] * 3)
+        self.assertTrue(YouTubeMetadataCache.objects.get(content_type="playlist").is_fresh())
+
+    def test_playlist_growth_seen(self):
+        get_cached_youtube_metadata(PLAYLIST_URL)
+        self.youtube.playlists["PLcache0001"]["video_ids"].append("dQw4w9WgXcQ")
+        self.expire("playlist")
+
+        data = get_cached_youtube_metadata(PLAYLIST_URL)
+        self.assertEqual(data["total_videos_fetched"], 121)
+        self.assertEqual(data["videos"][-1]["video_id"], "dQw4w9WgXcQ")
+
+    async def test_async_playlist_items_revalidated(self):
+        data = await aget_cached_youtube_metadata(PLAYLIST_URL)
+        self.youtube.playlists["PLcache0001"]["video_ids"][0] = "dQw4w9WgXcQ"
+        await YouTubeMetadataCache.objects.filter(content_type="playlist").aupdate(expires_at=timezone.now())
+
+        data = await aget_cached_youtube_metadata(PLAYLIST_URL)
+        self.assertEqual(data["videos"][0]["title"], "Never Gonna")
+        self.assertEqual([v["video_id"] for v in data["videos"][1:]], self.video_ids[1:])
+
+    def test_command(self):
+        out = StringIO()
+        call_command("youtube_cache", "warm", VIDEO_URL, PLAYLIST_URL, stdout=out)
+        self.assertIn("video:dQw4w9WgXcQ  Never Gonna", out.getvalue())
+
+        out = StringIO()
+        call_command("youtube_cache", "inspect", stdout=out)
+        self.assertIn("playlist        1 entries,       1 fresh", out.getvalue())
+
+        self.expire("video")
+        out = StringIO()
+        call_command("youtube_cache", "purge", "--expired", stdout=out)
+        self.assertEqual(out.getvalue().strip(), "Deleted 1 entries")
+        self.assertEqual(list(YouTubeMetadataCache.objects.values_list("content_type", flat=True)), ["playlist"])
@@ -0,0 +1,80 @@
+import json
+import os
+import tempfile
+import threading
+
+from django.test import SimpleTestCase, override_settings
+from googleapiclient import discovery_cache
+
+from core.testing.youtube_server import FakeYouTubeServer
+from core.utils import youtube_client
+from core.utils.youtube_client import get_youtube_client, load_discovery_document, reset_youtube_clients, stats
+
+
+@override_settings(YOUTUBE_API_KEY="test-key")
+class YouTubeClientTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.youtube = FakeYouTubeServer().start()
+        cls.youtube.add_video("dQw4w9WgXcQ", title="Never Gonna")
+        cls.youtube_settings = override_settings(YOUTUBE_API_ROOT_URL=cls.youtube.root_url)
+        cls.youtube_settings.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.youtube_settings.disable()
+        cls.youtube.stop()
+        reset_youtube_clients()
+        super().tearDownClass()
+
+    def setUp(self):
+        reset_youtube_clients()
+        stats.reset()
+
+    def test_one_client_per_thread(self):
+        client = get_youtube_client()
+        self.assertIs(get_youtube_client(), client)
+
+        others = []
+        thread = threading.Thread(target=lambda: others.append(get_youtube_client()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(others[0], client)
+
+        reset_youtube_clients()
+        self.assertIsNot(get_youtube_client(), client)
+        self.assertEqual(stats.as_dict()["clients_built"], 3)
+
+    def test_calls_reach_stand_in_and_are_timed(self):
+        for _ in range(3):
+            res = get_youtube_client().videos().list(part="snippet", id="dQw4w9WgXcQ").execute()
+            self.assertEqual(res["items"][0]["snippet"]["title"], "Never Gonna")
+
+        report = stats.as_dict()
+        self.assertEqual((report["clients_built"], report["requests"]), (1, 3))
+        self.assertGreater(report["request_ms_max"], 0)
+
+
+class DiscoveryDocumentTests(SimpleTestCase):
+    def setUp(self):
+        self.previous = youtube_client._discovery_doc
+        youtube_client._discovery_doc = None
+        self.addCleanup(setattr, youtube_client, "_discovery_doc", self.previous)
+
+    def test_prefers_document_on_disk(self):
+        document = json.loads(discovery_cache.get_static_doc("youtube", "v3"))
+        document["revision"] = "on-disk"
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "youtube.v3.json")
+            with open(path, "w") as f:
+                json.dump(document, f)
+            with override_settings(YOUTUBE_DISCOVERY_DOCUMENT=path):
+                self.assertEqual(load_discovery_document()["revision"], "on-disk")
+                os.remove(path)
+                # parsed once per process; the file isn't read again
+                self.assertEqual(load_discovery_document()["revision"], "on-disk")
+
+    def test_falls_back_to_bundled_copy(self):
+        with override_settings(YOUTUBE_DISCOVERY_DOCUMENT="/nonexistent/youtube.v3.json"):
+            self.assertEqual(load_discovery_document()["name"], "youtube")
@@ -0,0 +1,86 @@
+from concurrent.futures import Future
+
+from django.test import SimpleTestCase, override_settings
+
+from core.testing.youtube_server import FakeYouTubeServer
+from core.utils.youtube import get_youtube_metadata, iter_enriched_pages, iter_playlist_pages
+from core.utils.youtube_client import reset_youtube_clients
+
+
+class DeferredPool:
+    """Runs a submitted call only when its result is asked for, so nothing
+    finishes early and only the in-flight bound lets pages through."""
+
+    def submit(self, fn, *args):
+        return Deferred(fn, args)
+
+
+class Deferred(Future):
+    def __init__(self, fn, args):
+        super().__init__()
+        self.fn, self.args = fn, args
+
+    def result(self, timeout=None):
+        if not self.done():
+            self.set_result(self.fn(*self.args))
+        return super().result(timeout)
+
+
+@override_settings(YOUTUBE_API_KEY="test-key")
+class EnrichmentTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.youtube = FakeYouTubeServer(latency=0.005).start()
+        cls.video_ids = cls.youtube.add_playlist("PLenrich001", 230)
+        cls.youtube_settings = override_settings(YOUTUBE_API_ROOT_URL=cls.youtube.root_url)
+        cls.youtube_settings.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.youtube_settings.disable()
+        cls.youtube.stop()
+        reset_youtube_clients()
+        super().tearDownClass()
+
+    def setUp(self):
+        reset_youtube_clients()
+        self.youtube.requests.clear()
+
+    def test_playlist_in_order_with_durations(self):
+        data = get_youtube_metadata("https://www.youtube.com/playlist?list=PLenrich001")
+        self.assertEqual([v["video_id"] for v in data["videos"]], self.video_ids)
+        self.assertEqual([v["position"] for v in data["videos"]], list(range(1, 231)))
+        self.assertEqual(data["videos"][0]["duration"], "1:00")
+        self.assertEqual(data["videos"][229]["duration"], "4:49")
+
+        # one videos().list call of up to 50 ids per page
+        self.assertEqual(self.youtube.requests.count("playlistItems"), 5)
+        self.assertEqual(self.youtube.requests.count("videos"), 5)
+
+    def test_pool_matches_inline(self):
+        inline = list(iter_enriched_pages(iter_playlist_pages("PLenrich001"), pool=False))
+        pooled = list(iter_enriched_pages(iter_playlist_pages("PLenrich001")))
+        self.assertEqual(pooled, inline)
+
+    def test_in_flight_bounded(self):
+        produced = []
+
+        def pages():
+            for page in iter_playlist_pages("PLenrich001", max_videos=100):
+                for n in range(5):
+                    produced.append(n)
+                    yield page[0][n * 10:(n + 1) * 10], None
+
+        seen = 0
+        for videos, _ in iter_enriched_pages(pages(), pool=DeferredPool(), max_in_flight=2):
+            seen += 1
+            self.assertTrue(all(v["duration"] for v in videos))
+            # at most max_in_flight pages are waiting behind the one yielded
+            self.assertLessEqual(len(produced), seen + 2)
+        self.assertEqual(seen, 10)
+
+    def test_truncated(self):
+        data = get_youtube_metadata("https://www.youtube.com/playlist?list=PLenrich001", max_playlist_videos=60)
+        self.assertEqual(data["total_videos_fetched"], 60)
+        self.assertEqual([v["video_id"] for v in data["videos"]], self.video_ids[:60])
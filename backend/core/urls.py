@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import FirebaseAuthView , ImportYoutubeView , SaveLearningView , ContinueWatchingView , CompletedVideos , ProfileInfoView, UserActivityGraphView, MyLearningsView , CertificateView, StartQuizView, QuizListView, SubmitQuizView, ClassroomView, MarkVideoAsCompletedView, DeleteVideo, DeletePlaylist
+from .views import AsyncFirebaseAuthView, AsyncImportYoutubeView, AsyncSaveLearningView, FirebaseAuthView , ImportYoutubeView , SaveLearningView , ContinueWatchingView , CompletedVideos , ProfileInfoView, UserActivityGraphView, MyLearningsView , CertificateView, StartQuizView, QuizListView, SubmitQuizView, ClassroomView, MarkVideoAsCompletedView, DeleteVideo, DeletePlaylist, ImportJobStatusView, LeaderboardView, CertificatePdfView, CertificateVerifyView
 
 
 urlpatterns = [
@@ -8,12 +8,22 @@ urlpatterns = [
     path('oauth-login/', FirebaseAuthView.as_view()),  # All handled same way
     path('import/' , ImportYoutubeView.as_view()),
     path("save-learning/" , SaveLearningView.as_view()),
+    path("import-jobs/<int:job_id>/" , ImportJobStatusView.as_view()),
+    # async versions, for deployments served over ASGI
+    path('async/signup/', AsyncFirebaseAuthView.as_view()),
+    path('async/login/', AsyncFirebaseAuthView.as_view()),
+    path('async/oauth-login/', AsyncFirebaseAuthView.as_view()),
+    path('async/import/' , AsyncImportYoutubeView.as_view()),
+    path("async/save-learning/" , AsyncSaveLearningView.as_view()),
     path("continue-watch/" , ContinueWatchingView.as_view()),
     path("complete/" , CompletedVideos.as_view()),
     path("profile/" , ProfileInfoView.as_view()),
     path("activity/" , UserActivityGraphView.as_view()),
+    path("leaderboard/" , LeaderboardView.as_view()),
     path("my-learnings/" , MyLearningsView.as_view()),
     path("certs/" , CertificateView.as_view()),
+    path("certificates/<uuid:certificate_id>.pdf" , CertificatePdfView.as_view()),
+    path("certificates/<uuid:certificate_id>/verify/" , CertificateVerifyView.as_view()),
     path("quiz-list/" , QuizListView.as_view()),
     path("start-quiz/" , StartQuizView.as_view()),
     path("submit-quiz/" , SubmitQuizView.as_view()),
@@ -0,0 +1,161 @@
+"""Activity logging with a per-day rollup.
+
+Every activity is written to UserActivityLog and counted in
+UserActivityDaily under the user's local date, so the activity graph reads
+one row per (day, type) instead of scanning the log.
+
+With ACTIVITY_WRITE_MODE = "buffered" (the default) events are queued and
+written in batches by an ActivityBuffer; "sync" writes each one inside the
+request, as before.
+"""
+import threading
+from collections import Counter
+from datetime import timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from ..models import UserActivityDaily, UserActivityLog, UserProfile
+from .activity_buffer import ActivityBuffer
+from .streaks import update_streak
+from .versions import ACTIVITY, PROFILE, bump_versions
+
+TIMEZONE_TTL = 60 * 60
+
+
+def parse_timezone(name):
+    """ZoneInfo for an IANA name, or None if it isn't one."""
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError, TypeError):
+        return None
+
+
+def timezone_cache_key(user_id):
+    return f"profile-tz:{user_id}"
+
+
+def get_user_timezone(user_id):
+    key = timezone_cache_key(user_id)
+    name = cache.get(key)
+    if name is None:
+        name = UserProfile.objects.filter(pk=user_id).values_list("timezone", flat=True).first() or "UTC"
+        cache.set(key, name, TIMEZONE_TTL)
+    return parse_timezone(name) or ZoneInfo("UTC")
+
+
+def forget_user_timezone(user_id):
+    cache.delete(timezone_cache_key(user_id))
+
+
+def local_date(user_id, when=None):
+    return timezone.localtime(when or timezone.now(), get_user_timezone(user_id)).date()
+
+
+def local_day_start(user_id):
+    """Epoch seconds of the start of the user's current local day."""
+    now = timezone.localtime(timezone.now(), get_user_timezone(user_id))
+    return now.replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+
+
+def record_activity(user_id, activity_type):
+    event = (user_id, activity_type, timezone.now())
+    if getattr(settings, "ACTIVITY_WRITE_MODE", "buffered") == "sync":
+        write_activity([event])
+    else:
+        # queued only once the surrounding transaction (if any) commits
+        transaction.on_commit(lambda: get_activity_buffer().add(event))
+
+
+def write_activity(events):
+    """Insert ``(user_id, activity_type, timestamp)`` events and add them to
+    the rollup with one counter update per (user, day, type). Returns how
+    many were written."""
+    try:
+        _write_activity(events)
+    except IntegrityError:
+        # a user was deleted while their events were queued
+        user_ids = {user_id for user_id, _, _ in events}
+        existing = set(UserProfile.objects.filter(pk__in=user_ids).values_list("pk", flat=True))
+        events = [e for e in events if e[0] in existing]
+        _write_activity(events)
+    return len(events)
+
+
+def _write_activity(events):
+    daily = Counter()
+    for user_id, activity_type, timestamp in events:
+        daily[user_id, local_date(user_id, timestamp), activity_type] += 1
+
+    with transaction.atomic():
+        UserActivityLog.objects.bulk_create([
+            UserActivityLog(user_id=user_id, activity_type=activity_type, timestamp=timestamp)
+            for user_id, activity_type, timestamp in events
+        ])
+        for (user_id, date, activity_type), count in daily.items():
+            add_daily_count(user_id, date, activity_type, count)
+        for user_id, date in sorted({(user_id, date) for user_id, date, _ in daily}):
+            update_streak(user_id, date)
+        # streaks are part of the profile
+        bump_versions([user_id for user_id, _, _ in events], ACTIVITY, PROFILE)
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_activity_buffer():
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = ActivityBuffer(
+                    write_activity,
+                    max_size=getattr(settings, "ACTIVITY_BUFFER_SIZE", 100),
+                    interval=getattr(settings, "ACTIVITY_FLUSH_INTERVAL", 2.0),
+                    max_pending=getattr(settings, "ACTIVITY_MAX_PENDING", 10000),
+                )
+    return _buffer
+
+
+def flush_activity():
+    """Write queued events now, e.g. before reading the graph in a test."""
+    if _buffer is not None:
+        return _buffer.flush()
+    return 0
+
+
+def add_daily_count(user_id, date, activity_type, count=1):
+    filters = {"user_id": user_id, "date": date, "activity_type": activity_type}
+    if UserActivityDaily.objects.filter(**filters).update(count=F("count") + count):
+        return
+    try:
+        with transaction.atomic():
+            UserActivityDaily.objects.create(count=count, **filters)
+    except IntegrityError:
+        # someone else created today's row first
+        UserActivityDaily.objects.filter(**filters).update(count=F("count") + count)
+
+
+def activity_graph(user_id, days=14, end=None):
+    """``[{"date", "activity_count"}]`` for the ``days`` local days ending
+    at ``end`` (default today), oldest first, with a single range read."""
+    end = end or local_date(user_id)
+    start = end - timedelta(days=days - 1)
+    counts = dict(
+        UserActivityDaily.objects.filter(user_id=user_id, date__range=(start, end))
+        .values("date")
+        .annotate(total=Sum("count"))
+        .values_list("date", "total")
+    )
+    return [
+        {
+            "date": (start + timedelta(days=i)).strftime("%Y-%m-%d"),
+            "activity_count": counts.get(start + timedelta(days=i), 0),
+        }
+        for i in range(days)
+    ]
@@ -0,0 +1,122 @@
+"""In-process queue that writes activity events in batches.
+
+Requests append to the queue and return; a daemon thread passes the queued
+events to ``write(events) -> number written`` when ``max_size`` are waiting
+or every ``interval`` seconds, and whatever is left is written at exit.
+Events still queued when the process is killed are lost, which is the
+trade-off ACTIVITY_WRITE_MODE = "sync" avoids.
+"""
+import atexit
+import logging
+import threading
+import time
+
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityBuffer:
+    def __init__(self, write, max_size=100, interval=2.0, max_pending=10000):
+        self.write = write
+        self.max_size = max_size
+        self.interval = interval
+        self.max_pending = max_pending
+        self._events = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._atexit_registered = False
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.flush_seconds = 0.0
+        self.last_flush_seconds = 0.0
+        self.slowest_flush = 0.0
+
+    def add(self, event):
+        with self._lock:
+            if len(self._events) >= self.max_pending:
+                self.dropped += 1
+                return
+            self._events.append(event)
+            self.enqueued += 1
+            full = len(self._events) >= self.max_size
+
+        self._ensure_thread()
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        """Write everything queued so far; returns how many events were written."""
+        with self._flush_lock:
+            with self._lock:
+                events, self._events = self._events, []
+            if not events:
+                return 0
+
+            start = time.perf_counter()
+            try:
+                written = self.write(events)
+            except Exception:
+                logger.exception("Writing %d activity events failed", len(events))
+                self.failed_flushes += 1
+                self._requeue(events)
+                return 0
+
+            elapsed = time.perf_counter() - start
+            self.flushes += 1
+            self.written += written
+            self.dropped += len(events) - written
+            self.flush_seconds += elapsed
+            self.last_flush_seconds = elapsed
+            self.slowest_flush = max(self.slowest_flush, elapsed)
+            logger.debug("Wrote %d activity events in %.1f ms", written, elapsed * 1000)
+            return written
+
+    def _requeue(self, events):
+        # keep the oldest events, they were queued first
+        with self._lock:
+            keep = max(self.max_pending - len(self._events), 0)
+            self.dropped += max(len(events) - keep, 0)
+            self._events[:0] = events[:keep]
+
+    def _ensure_thread(self):
+        # also restarts the thread in a child process after fork
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="activity-buffer", daemon=True)
+                self._thread.start()
+                if not self._atexit_registered:
+                    atexit.register(self.flush)
+                    self._atexit_registered = True
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            close_old_connections()
+            self.flush()
+
+    def stats(self):
+        with self._lock:
+            depth = len(self._events)
+        return {
+            "queue_depth": depth,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "flush_ms_avg": round(self.flush_seconds * 1000 / self.flushes, 2) if self.flushes else 0.0,
+            "flush_ms_last": round(self.last_flush_seconds * 1000, 2),
+            "flush_ms_max": round(self.slowest_flush * 1000, 2),
+        }
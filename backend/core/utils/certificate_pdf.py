@@ -0,0 +1,183 @@
+"""One-page certificate PDFs from a template parsed once per process.
+
+The page is plain PDF 1.4 drawn with the standard Helvetica fonts, so no
+font is embedded and nothing outside the standard library is needed: like
+quiz_generator, this runs in the spawned processes of
+core.utils.certificates' pool, which don't set up Django.
+
+``TEMPLATE`` is a content stream with ``{{field font size y}}`` slots for
+horizontally centred text. It is split into literal chunks and slots at
+import; slots filled from ``STATIC`` are drawn then too, so a render only
+lays out the per-certificate text and joins bytes. Output depends on the
+fields alone: the same certificate always renders to the same bytes.
+"""
+import re
+
+PAGE_WIDTH, PAGE_HEIGHT = 842, 595  # A4 landscape, in points
+TEXT_WIDTH = 700
+
+FONTS = {"F1": "Helvetica", "F2": "Helvetica-Bold", "F3": "Helvetica-Oblique"}
+
+# advance widths (1/1000 em) of ASCII 32..126 from the standard AFM files;
+# Helvetica-Oblique shares Helvetica's
+HELVETICA = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]
+HELVETICA_BOLD = [
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+]
+WIDTHS = {"F1": HELVETICA, "F2": HELVETICA_BOLD, "F3": HELVETICA}
+
+STATIC = {
+    "heading": "Certificate of Completion",
+    "presented": "This certifies that",
+    "completed": "has successfully completed",
+    "brand": "LearnProof",
+}
+
+TEMPLATE = """\
+q 0.97 0.97 0.99 rg 0 0 842 595 re f Q
+q 0.16 0.29 0.62 RG 6 w 24 24 794 547 re S 1.5 w 38 38 766 519 re S Q
+0.16 0.29 0.62 rg
+{{heading F2 34 468}}
+0.2 0.2 0.2 rg
+{{presented F3 16 410}}
+0 0 0 rg
+{{name F2 30 360}}
+0.2 0.2 0.2 rg
+{{completed F3 16 314}}
+0 0 0 rg
+{{title F2 22 270}}
+q 0.16 0.29 0.62 RG 1 w 321 150 m 521 150 l S Q
+0.2 0.2 0.2 rg
+{{issued F1 14 130}}
+0.45 0.45 0.45 rg
+{{reference F1 9 64}}
+0.16 0.29 0.62 rg
+{{brand F2 12 48}}
+"""
+
+SLOT = re.compile(r"\{\{(\w+) (F\d) (\d+) (\d+)\}\}\n")
+
+
+def escape(text):
+    data = text.encode("cp1252", errors="replace")
+    return data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def text_width(text, font, size):
+    widths = WIDTHS[font]
+    return sum(widths[ord(c) - 32] if 32 <= ord(c) <= 126 else 556 for c in text) * size / 1000
+
+
+def fit(text, font, size, max_lines=2):
+    """``text`` broken into at most ``max_lines`` lines of TEXT_WIDTH, the
+    last one cut short with an ellipsis if it still doesn't fit."""
+    lines, line = [], ""
+    for word in text.split():
+        candidate = f"{line} {word}".strip()
+        if line and text_width(candidate, font, size) > TEXT_WIDTH:
+            lines.append(line)
+            line = word
+        else:
+            line = candidate
+    lines.append(line)
+    cut = len(lines) > max_lines
+    lines = lines[:max_lines]
+    last = lines[-1]
+    if cut:
+        while " " in last and text_width(last + " ...", font, size) > TEXT_WIDTH:
+            last = last.rsplit(" ", 1)[0]
+        last += " ..."
+    while text_width(last, font, size) > TEXT_WIDTH:
+        # a single word wider than the page
+        last = last[:-4] + "..."
+    lines[-1] = last
+    return lines
+
+
+def centered(text, font, size, y):
+    """Text-showing operators for ``text`` centred on the page, its first
+    line's baseline at ``y``."""
+    ops = []
+    for n, line in enumerate(fit(text, font, size)):
+        x = (PAGE_WIDTH - text_width(line, font, size)) / 2
+        ops.append(b"BT /%s %d Tf %.2f %.2f Td (%s) Tj ET\n" % (
+            font.encode(), size, x, y - n * size * 1.25, escape(line)))
+    return b"".join(ops)
+
+
+def parse_template(template):
+    """Literal byte chunks and ``(field, font, size, y)`` slots, with static
+    slots already drawn and merged into the neighbouring literals."""
+    parts = []
+    pos = 0
+    for match in SLOT.finditer(template):
+        parts.append(template[pos:match.start()].encode())
+        field, font, size, y = match.group(1), match.group(2), int(match.group(3)), int(match.group(4))
+        parts.append(centered(STATIC[field], font, size, y) if field in STATIC else (field, font, size, y))
+        pos = match.end()
+    parts.append(template[pos:].encode())
+
+    merged = []
+    for part in parts:
+        if isinstance(part, bytes) and merged and isinstance(merged[-1], bytes):
+            merged[-1] += part
+        else:
+            merged.append(part)
+    return merged
+
+
+def fixed_objects():
+    fonts = b" ".join(b"/%s %d 0 R" % (name.encode(), 5 + n) for n, name in enumerate(FONTS))
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        2: b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        3: b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Resources << /Font << %s >> >> /Contents 4 0 R >>"
+           % (PAGE_WIDTH, PAGE_HEIGHT, fonts),
+    }
+    for n, base in enumerate(FONTS.values()):
+        objects[5 + n] = b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>" % base.encode()
+    return objects
+
+
+PARTS = parse_template(TEMPLATE)
+OBJECTS = fixed_objects()
+HEADER = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+
+
+def render_certificate(fields):
+    """PDF bytes for ``fields``: name, title, issued (a display date) and
+    certificate_id."""
+    values = dict(fields, reference=f"Certificate ID {fields['certificate_id']}")
+    stream = b"".join(
+        part if isinstance(part, bytes) else centered(str(values.get(part[0], "")), *part[1:])
+        for part in PARTS
+    )
+    objects = dict(OBJECTS)
+    objects[4] = b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+    objects[8] = b"<< /Title (%s) /Producer (LearnProof) >>" % escape(values["reference"])
+
+    out = [HEADER]
+    size = len(HEADER)
+    offsets = []
+    for number in sorted(objects):
+        offsets.append(size)
+        chunk = b"%d 0 obj\n%s\nendobj\n" % (number, objects[number])
+        out.append(chunk)
+        size += len(chunk)
+
+    out.append(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    out.extend(b"%010d 00000 n \n" % offset for offset in offsets)
+    out.append(b"trailer\n<< /Size %d /Root 1 0 R /Info 8 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, size))
+    return b"".join(out)
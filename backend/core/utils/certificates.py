@@ -0,0 +1,184 @@
+"""Certificate PDFs, rendered off the request and stored by content hash.
+
+Issuing a certificate only queues it: once the transaction commits, a
+dispatch thread reads its fields and has one of CERTIFICATE_RENDER_WORKERS
+spawned processes render the PDF (0 renders right after the commit, in
+the issuing thread). Files live under CERTIFICATE_ROOT as
+``<sha256[:2]>/<sha256>.pdf``, so identical renders share a file and a
+re-render that changes nothing writes nothing. A certificate whose file
+isn't there yet is rendered when it is first downloaded.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from pathlib import Path
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from ..models import Certificate
+from .certificate_pdf import render_certificate
+from .versions import CERTIFICATES, bump_version
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_dispatcher = None
+_pool_lock = threading.Lock()
+
+
+def get_render_pool():
+    """The process pool, or None when CERTIFICATE_RENDER_WORKERS is 0."""
+    global _pool
+    workers = getattr(settings, "CERTIFICATE_RENDER_WORKERS", 2)
+    if not workers:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"))
+    return _pool
+
+
+def get_dispatcher():
+    """Threads that wait on the pool and store results, one per worker."""
+    global _dispatcher
+    if _dispatcher is None:
+        with _pool_lock:
+            if _dispatcher is None:
+                workers = getattr(settings, "CERTIFICATE_RENDER_WORKERS", 2)
+                _dispatcher = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="certificate-render")
+    return _dispatcher
+
+
+def shutdown_render_pool():
+    global _pool, _dispatcher
+    with _pool_lock:
+        dispatcher, pool = _dispatcher, _pool
+        _pool = _dispatcher = None
+    if dispatcher is not None:
+        dispatcher.shutdown(wait=True)
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _discard_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def certificate_root():
+    return Path(getattr(settings, "CERTIFICATE_ROOT", settings.BASE_DIR / "media" / "certificates"))
+
+
+def pdf_path(digest):
+    return certificate_root() / digest[:2] / f"{digest}.pdf"
+
+
+def download_url(certificate_id, digest=None):
+    """The download endpoint, versioned by content hash once rendered so the
+    URL can be cached for good."""
+    url = f"/api/certificates/{certificate_id}.pdf"
+    return f"{url}?v={digest[:16]}" if digest else url
+
+
+def store_pdf(data):
+    """Write ``data`` under its SHA-256 unless that file exists; the digest."""
+    digest = hashlib.sha256(data).hexdigest()
+    path = pdf_path(digest)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    return digest
+
+
+def certificate_fields(certificate):
+    """What render_certificate draws, from a Certificate with its user loaded."""
+    return {
+        "name": certificate.user.name,
+        "title": certificate.title,
+        "issued": f"{certificate.issued_at.day} {certificate.issued_at:%B %Y}",
+        "certificate_id": str(certificate.certificate_id),
+    }
+
+
+def render_queryset(queryset):
+    return queryset.select_related("user").only(
+        "certificate_id", "title", "issued_at", "pdf_sha256", "user__name",
+    )
+
+
+def save_render(certificate, data):
+    digest = store_pdf(data)
+    if digest != certificate.pdf_sha256:
+        Certificate.objects.filter(pk=certificate.pk).update(
+            pdf_sha256=digest, download_url=download_url(certificate.certificate_id, digest),
+        )
+        bump_version(certificate.user_id, CERTIFICATES)
+    return digest
+
+
+def render_now(certificate_id):
+    """Render and store a certificate in this thread; its digest, or None if
+    there is no such certificate."""
+    certificate = render_queryset(Certificate.objects.filter(certificate_id=certificate_id)).first()
+    if certificate is None:
+        return None
+    return save_render(certificate, render_certificate(certificate_fields(certificate)))
+
+
+def render_async(certificate_id):
+    """Render a committed certificate in the background. The returned
+    future resolves to its digest."""
+    if get_render_pool() is None:
+        future = Future()
+        try:
+            future.set_result(render_now(certificate_id))
+        except Exception as exc:
+            logger.exception("Rendering certificate %s failed", certificate_id)
+            future.set_exception(exc)
+        return future
+    return get_dispatcher().submit(_dispatch, certificate_id)
+
+
+def _dispatch(certificate_id):
+    close_old_connections()
+    try:
+        certificate = render_queryset(Certificate.objects.filter(certificate_id=certificate_id)).first()
+        if certificate is None:
+            return None
+        fields = certificate_fields(certificate)
+        pool = get_render_pool()
+        try:
+            data = pool.submit(render_certificate, fields).result()
+        except BrokenProcessPool:
+            logger.exception("Certificate render pool broke; starting a new one")
+            _discard_pool(pool)
+            data = render_certificate(fields)
+        return save_render(certificate, data)
+    except Exception:
+        logger.exception("Rendering certificate %s failed", certificate_id)
+        raise
+    finally:
+        close_old_connections()
+
+
+def queue_render(certificate):
+    """Render ``certificate`` once the current transaction commits."""
+    certificate_id = certificate.certificate_id
+    transaction.on_commit(lambda: render_async(certificate_id))
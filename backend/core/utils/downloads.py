@@ -0,0 +1,89 @@
+"""File downloads with validators and byte ranges.
+
+A whole file goes out as a FileResponse over the open file, which the WSGI
+server can hand to ``wsgi.file_wrapper`` (sendfile(2) under gunicorn).
+Single ``Range: bytes=`` requests get a 206 read through a length-limited
+wrapper; multi-range requests are answered with the whole file, which
+RFC 9110 allows.
+"""
+import re
+
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+
+RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+UNSATISFIABLE = object()
+
+
+class FileRange:
+    """Read at most ``length`` bytes of ``file`` from where it stands."""
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """``(first, last)`` byte positions for a single-range header,
+    UNSATISFIABLE, or None to send the whole file."""
+    match = RANGE.match(header.strip()) if header else None
+    if not match or (not match.group(1) and not match.group(2)):
+        return None
+    first, last = match.groups()
+    if not first:
+        suffix = int(last)
+        return (max(size - suffix, 0), size - 1) if suffix and size else UNSATISFIABLE
+    first = int(first)
+    last = min(int(last), size - 1) if last else size - 1
+    if last < first and last != size - 1:
+        return None
+    if first >= size:
+        return UNSATISFIABLE
+    return first, last
+
+
+def etag_matches(header, etag):
+    return header is not None and (header.strip() == "*" or etag in [t.strip() for t in header.split(",")])
+
+
+def file_response(request, path, etag, content_type, cache_control, filename=None):
+    """Serve ``path`` with a strong ``etag`` (unquoted), answering
+    If-None-Match with 304 and Range/If-Range with 206 or 416."""
+    etag = f'"{etag}"'
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Accept-Ranges": "bytes"}
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        response = HttpResponseNotModified()
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    size = path.stat().st_size
+    if_range = request.headers.get("If-Range")
+    span = parse_range(request.headers.get("Range"), size) if if_range in (None, etag) else None
+    if span is UNSATISFIABLE:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    file = open(path, "rb")
+    if span is None:
+        response = FileResponse(file, content_type=content_type, filename=filename)
+    else:
+        first, last = span
+        file.seek(first)
+        response = FileResponse(FileRange(file, last - first + 1), status=206, content_type=content_type,
+                                filename=filename)
+        response["Content-Range"] = f"bytes {first}-{last}/{size}"
+        response["Content-Length"] = str(last - first + 1)
+    for name, value in headers.items():
+        response[name] = value
+    return response
@@ -1,13 +1,214 @@
-import firebase_admin
-from firebase_admin import auth , credentials
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import jwt
+import requests
+from asgiref.sync import sync_to_async
+from cryptography import x509
+from django.conf import settings
 from rest_framework.exceptions import AuthenticationFailed
 
-cred = credentials.Certificate('./learnproof_serviceaccountkey.json')
-firebase_admin.initialize_app(cred)
+GOOGLE_CERTS_URL = "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+SERVICE_ACCOUNT_KEY = './learnproof_serviceaccountkey.json'
+
+
+class HttpKeySource:
+    """Google's token signing certificates, kept in memory for as long as
+    the response's Cache-Control max-age allows."""
+
+    def __init__(self, url=GOOGLE_CERTS_URL, timeout=10, clock=time.time):
+        self.url = url
+        self.timeout = timeout
+        self.clock = clock
+        self.fetches = 0
+        self._keys = {}
+        self._expires_at = 0
+        self._lock = threading.Lock()
+
+    def get_keys(self):
+        if self.clock() < self._expires_at:
+            return self._keys
+
+        with self._lock:
+            # another thread may have refreshed while we waited
+            if self.clock() < self._expires_at:
+                return self._keys
+
+            res = requests.get(self.url, timeout=self.timeout)
+            res.raise_for_status()
+            self._keys = {
+                kid: x509.load_pem_x509_certificate(pem.encode()).public_key()
+                for kid, pem in res.json().items()
+            }
+            self._expires_at = self.clock() + parse_max_age(res.headers.get("Cache-Control", ""))
+            self.fetches += 1
+            return self._keys
+
+
+class StaticKeySource:
+    """Fixed kid -> public key mapping, for tests and offline use."""
+
+    def __init__(self, keys):
+        self.keys = dict(keys)
+        self.fetches = 0
+
+    def get_keys(self):
+        return self.keys
+
+
+def parse_max_age(cache_control):
+    match = re.search(r"max-age=(\d+)", cache_control)
+    return int(match.group(1)) if match else 0
+
+
+class FirebaseTokenVerifier:
+    """Verifies Firebase ID tokens locally and remembers decoded claims.
+
+    Claims are cached under a hash of the token until the token's own
+    ``exp``, so a repeat call with the same token is a dictionary lookup.
+    """
+
+    def __init__(self, project_id, key_source=None, max_entries=10000, leeway=60, clock=time.time):
+        self.project_id = project_id
+        self.issuer = f"https://securetoken.google.com/{project_id}"
+        self.key_source = key_source or HttpKeySource()
+        self.max_entries = max_entries
+        self.leeway = leeway
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._claims = OrderedDict()
+        self._lock = threading.Lock()
+
+    def verify(self, id_token):
+        claims = self.cached(id_token)
+        if claims is not None:
+            return claims
+        return self.decode(id_token)
+
+    def decode(self, id_token):
+        """Verify the token's signature and claims, and remember them."""
+        cache_key = hashlib.sha256(id_token.encode()).digest()
+        claims = self._decode(id_token)
+
+        with self._lock:
+            self._claims[cache_key] = (claims["exp"], claims)
+            self._claims.move_to_end(cache_key)
+            while len(self._claims) > self.max_entries:
+                self._claims.popitem(last=False)
+
+        return dict(claims)
+
+    def cached(self, id_token):
+        """The token's claims if it was verified before and hasn't expired,
+        else None (counted as a miss). Never blocks on I/O."""
+        cache_key = hashlib.sha256(id_token.encode()).digest()
+        now = self.clock()
+
+        with self._lock:
+            entry = self._claims.get(cache_key)
+            if entry is not None:
+                expires_at, claims = entry
+                if now < expires_at:
+                    self._claims.move_to_end(cache_key)
+                    self.hits += 1
+                    return dict(claims)
+                del self._claims[cache_key]
+            self.misses += 1
+        return None
+
+    def _decode(self, id_token):
+        header = jwt.get_unverified_header(id_token)
+        if header.get("alg") != "RS256":
+            raise jwt.InvalidTokenError("Firebase ID tokens must be signed with RS256")
+
+        key = self.key_source.get_keys().get(header.get("kid"))
+        if key is None:
+            raise jwt.InvalidTokenError("Token was signed with an unknown key")
+
+        claims = jwt.decode(
+            id_token,
+            key,
+            algorithms=["RS256"],
+            audience=self.project_id,
+            issuer=self.issuer,
+            leeway=self.leeway,
+            options={"require": ["exp", "iat", "sub"]},
+        )
+
+        sub = claims["sub"]
+        if not isinstance(sub, str) or not sub or len(sub) > 128:
+            raise jwt.InvalidTokenError("Token has an invalid subject")
+
+        claims["uid"] = sub
+        return claims
+
+    def clear(self):
+        with self._lock:
+            self._claims.clear()
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "cached_tokens": len(self._claims),
+            "key_fetches": self.key_source.fetches,
+        }
+
+
+_verifier = None
+_verifier_lock = threading.Lock()
+
+
+def get_project_id():
+    project_id = getattr(settings, "FIREBASE_PROJECT_ID", None)
+    if project_id:
+        return project_id
+
+    key_path = getattr(settings, "FIREBASE_SERVICE_ACCOUNT_KEY", SERVICE_ACCOUNT_KEY)
+    with open(key_path) as f:
+        return json.load(f)["project_id"]
+
+
+def get_token_verifier():
+    global _verifier
+    if _verifier is None:
+        with _verifier_lock:
+            if _verifier is None:
+                _verifier = FirebaseTokenVerifier(
+                    get_project_id(),
+                    max_entries=getattr(settings, "FIREBASE_TOKEN_CACHE_SIZE", 10000),
+                )
+    return _verifier
+
+
+def set_token_verifier(verifier):
+    """Swap the process-wide verifier, e.g. for one backed by a StaticKeySource."""
+    global _verifier
+    with _verifier_lock:
+        _verifier = verifier
+
 
 def verify_firebase_token(id_token):
     try:
-        decoded_token = auth.verify_id_token(id_token)
-        return decoded_token
+        return get_token_verifier().verify(id_token)
+    except Exception as e:
+        raise AuthenticationFailed('Invalid Firebase Token')
+
+
+async def averify_firebase_token(id_token):
+    """verify_firebase_token for async views: tokens seen before are
+    answered inline, new ones are decoded (and Google's keys fetched if
+    due) in a worker thread."""
+    try:
+        verifier = get_token_verifier()
+        claims = verifier.cached(id_token)
+        if claims is None:
+            claims = await sync_to_async(verifier.decode, thread_sensitive=False)(id_token)
+        return claims
     except Exception as e:
-        raise AuthenticationFailed('Invalid Firebase Token')
\ No newline at end of file
+        raise AuthenticationFailed('Invalid Firebase Token')
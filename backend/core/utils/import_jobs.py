@@ -0,0 +1,139 @@
+"""DB-backed playlist import queue.
+
+Jobs are rows in ImportJob; ``manage.py run_import_worker`` claims them and
+imports one playlistItems page per transaction, storing the next page token
+in the same commit, so a crashed job resumes from its last committed page.
+Every write is conditional on the worker still holding the job, so once a
+stale job is reclaimed the old worker's next write fails with JobLost and
+it stops without touching the new worker's progress.
+"""
+import logging
+import os
+import socket
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from ..models import ImportJob, Playlist
+from .activity import record_activity
+from .library import bulk_upsert_videos, upsert_youtube_playlist
+from .versions import LIBRARY, bump_version
+from .youtube import fetch_playlist_header, iter_enriched_pages, iter_playlist_pages
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_playlist_import(user_id, pid):
+    """Queue an import of playlist ``pid``, reusing an unfinished job if any."""
+    job = ImportJob.objects.filter(
+        user_id=user_id, pid=pid, status__in=[ImportJob.QUEUED, ImportJob.RUNNING]
+    ).first()
+    return job or ImportJob.objects.create(user_id=user_id, pid=pid)
+
+
+class JobLost(Exception):
+    """The job was reclaimed by another worker while this one ran it."""
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_job(worker, stale_after=None):
+    """Take the oldest queued job, or a running one whose worker stopped
+    heartbeating ``stale_after`` ago."""
+    stale_after = stale_after or timedelta(seconds=getattr(settings, "IMPORT_JOB_STALE_AFTER", 300))
+    now = timezone.now()
+
+    with transaction.atomic():
+        job = (
+            ImportJob.objects.select_for_update(skip_locked=connection.features.has_select_for_update_skip_locked)
+            .filter(
+                Q(status=ImportJob.QUEUED)
+                | Q(status=ImportJob.RUNNING, heartbeat_at__lt=now - stale_after)
+            )
+            .order_by("created_at")
+            .first()
+        )
+        if job is None:
+            return None
+
+        job.status = ImportJob.RUNNING
+        job.locked_by = worker
+        job.heartbeat_at = now
+        job.attempts += 1
+        job.save(update_fields=["status", "locked_by", "heartbeat_at", "attempts"])
+        return job
+
+
+def update_job(job, **fields):
+    """Write ``fields`` to the job row and to ``job``, provided this claim of
+    it is still the current one; raises JobLost otherwise."""
+    updated = ImportJob.objects.filter(
+        pk=job.pk, status=ImportJob.RUNNING, locked_by=job.locked_by, attempts=job.attempts
+    ).update(**fields)
+    if not updated:
+        raise JobLost(job.pk)
+    for name, value in fields.items():
+        setattr(job, name, value)
+
+
+def run_job(job):
+    max_attempts = getattr(settings, "IMPORT_JOB_MAX_ATTEMPTS", 3)
+    try:
+        import_pages(job)
+    except JobLost:
+        logger.warning("Import job %s was reclaimed by another worker", job.pk)
+    except Exception as e:
+        logger.exception("Import job %s failed", job.pk)
+        status = ImportJob.QUEUED if job.attempts < max_attempts else ImportJob.FAILED
+        try:
+            update_job(job, status=status, error=str(e))
+        except JobLost:
+            logger.warning("Import job %s was reclaimed by another worker", job.pk)
+
+
+def import_pages(job):
+    if job.playlist_id is None:
+        header, _ = fetch_playlist_header(job.pid)
+        if "error" in header:
+            raise ValueError(header["error"])
+
+        upsert_youtube_playlist(job.pid, header)
+        playlist, created = Playlist.objects.get_or_create(user_id=job.user_id, youtube_id=job.pid)
+        if created:
+            bump_version(job.user_id, LIBRARY)
+
+        update_job(job, playlist=playlist, total_videos=header["video_count"])
+
+    if job.pages_done and not job.next_page_token:
+        finish(job)
+        return
+
+    pages = iter_enriched_pages(iter_playlist_pages(job.pid, page_token=job.next_page_token))
+    for videos, next_page_token in pages:
+        with transaction.atomic():
+            save_page(job, videos)
+            # a lost job rolls the page back along with its progress
+            update_job(
+                job,
+                pages_done=job.pages_done + 1,
+                imported_videos=job.imported_videos + len(videos),
+                next_page_token=next_page_token,
+                heartbeat_at=timezone.now(),
+            )
+
+    finish(job)
+
+
+def save_page(job, videos):
+    bulk_upsert_videos(job.user_id, videos, job.playlist_id)
+
+
+def finish(job):
+    with transaction.atomic():
+        update_job(job, status=ImportJob.DONE, error="", finished_at=timezone.now())
+        record_activity(job.user_id, "Learning Import")
@@ -0,0 +1,299 @@
+"""Global and weekly XP leaderboards.
+
+Every XP award is added to two boards, "global" and the current ISO week
+("weekly:2026-W42", UTC). Boards are kept by a pluggable backend chosen by
+LEADERBOARD_BACKEND:
+
+- "db" (default): LeaderboardScore rows plus LeaderboardBucket counts of
+  users per LEADERBOARD_BUCKET_WIDTH points, so a rank is the sum of the
+  buckets above plus a count inside the user's own bucket.
+- "memory": a SortedList per board in this process (O(log n) updates and
+  ranks), loaded from the database on first use. Only correct with a
+  single worker process.
+- "redis": one sorted set per board (ZINCRBY / ZREVRANGE / ZREVRANK) on
+  LEADERBOARD_REDIS_URL. Any client with those methods works, e.g.
+  core.testing.redis.FakeRedis.
+
+Ties are ranked by user id in the db and memory backends; Redis orders
+them by member, descending.
+"""
+import threading
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+from sortedcontainers import SortedList
+
+from ..models import LeaderboardBucket, LeaderboardScore, UserProfile, XPLedger
+
+GLOBAL = "global"
+# ledger rows that carry XP over rather than award it in their week
+CARRIED_OVER = ["Opening balance", "Compacted"]
+WEEKLY_TTL = 15 * 24 * 60 * 60
+
+
+def weekly_board(when=None):
+    year, week, _ = (when or timezone.now()).isocalendar()
+    return f"weekly:{year}-W{week:02d}"
+
+
+def boards_for(when=None):
+    return [GLOBAL, weekly_board(when)]
+
+
+def board_scores(board):
+    """(user_id, score) for ``board`` from the database of record:
+    UserProfile.xp for the global board, the XP ledger for a week."""
+    if board == GLOBAL:
+        return UserProfile.objects.filter(xp__gt=0).values_list("pk", "xp").iterator()
+
+    year, week = board.removeprefix("weekly:").split("-W")
+    start = datetime.fromisocalendar(int(year), int(week), 1).replace(tzinfo=dt_timezone.utc)
+    return (
+        XPLedger.objects.filter(created_at__gte=start, created_at__lt=start + timedelta(days=7))
+        .exclude(reason__in=CARRIED_OVER)
+        .values("user_id")
+        .annotate(total=Sum("amount"))
+        .filter(total__gt=0)
+        .values_list("user_id", "total")
+        .iterator()
+    )
+
+
+class MemoryLeaderboard:
+    """Scores kept in a SortedList of (-score, user_id): rank is a bisect,
+    top-N a slice."""
+
+    def __init__(self, loader=board_scores):
+        self.loader = loader
+        self._boards = {}
+        self._lock = threading.Lock()
+
+    def _load(self, board, scores):
+        # caller holds the lock
+        scores = dict(scores)
+        entry = self._boards[board] = (scores, SortedList((-s, u) for u, s in scores.items()))
+        return entry
+
+    def _board(self, board):
+        # caller holds the lock
+        entry = self._boards.get(board)
+        if entry is None:
+            if board.startswith("weekly:"):
+                # only the current week is ever asked for again
+                for name in [b for b in self._boards if b.startswith("weekly:")]:
+                    del self._boards[name]
+            entry = self._load(board, self.loader(board))
+        return entry
+
+    def add(self, board, user_id, amount):
+        with self._lock:
+            if board not in self._boards:
+                # awards arrive after commit, so a fresh load already has this one
+                scores, _ = self._board(board)
+                return scores.get(user_id, 0)
+            scores, keys = self._board(board)
+            old = scores.get(user_id)
+            if old is not None:
+                keys.remove((-old, user_id))
+            scores[user_id] = new = (old or 0) + amount
+            keys.add((-new, user_id))
+            return new
+
+    def top(self, board, n):
+        with self._lock:
+            return [(u, -s) for s, u in self._board(board)[1][:n]]
+
+    def rank(self, board, user_id):
+        with self._lock:
+            scores, keys = self._board(board)
+            score = scores.get(user_id)
+            if score is None:
+                return None
+            return keys.bisect_left((-score, user_id)) + 1, score
+
+    def load(self, board, scores):
+        with self._lock:
+            self._load(board, scores)
+
+
+class DatabaseLeaderboard:
+    """LeaderboardScore rows with per-bucket user counts.
+
+    An award only touches the user's own score row unless it moves them into
+    another bucket, so the shared bucket rows are written once per
+    ``bucket_width`` points rather than on every award.
+    """
+
+    transactional = True
+
+    def __init__(self, bucket_width=100):
+        self.bucket_width = bucket_width
+
+    def floor(self, score):
+        return score - score % self.bucket_width
+
+    def add(self, board, user_id, amount):
+        filters = {"board": board, "user_id": user_id}
+        with transaction.atomic(savepoint=False):
+            old = LeaderboardScore.objects.select_for_update().filter(**filters).values_list("score", flat=True).first()
+            if old is None:
+                try:
+                    with transaction.atomic():
+                        LeaderboardScore.objects.create(score=amount, **filters)
+                except IntegrityError:
+                    # created concurrently; lock that row and add to it
+                    old = LeaderboardScore.objects.select_for_update().filter(**filters).values_list("score", flat=True).get()
+                else:
+                    self._bump(board, [(self.floor(amount), 1)])
+                    return amount
+
+            new = old + amount
+            LeaderboardScore.objects.filter(**filters).update(score=new)
+            if self.floor(old) != self.floor(new):
+                # always in floor order, so two movers can't deadlock
+                self._bump(board, sorted([(self.floor(old), -1), (self.floor(new), 1)]))
+            return new
+
+    def _bump(self, board, changes):
+        for floor, delta in changes:
+            filters = {"board": board, "floor": floor}
+            if LeaderboardBucket.objects.filter(**filters).update(count=F("count") + delta):
+                continue
+            try:
+                with transaction.atomic():
+                    LeaderboardBucket.objects.create(count=delta, **filters)
+            except IntegrityError:
+                LeaderboardBucket.objects.filter(**filters).update(count=F("count") + delta)
+
+    def top(self, board, n):
+        return list(
+            LeaderboardScore.objects.filter(board=board)
+            .order_by("-score", "user_id")
+            .values_list("user_id", "score")[:n]
+        )
+
+    def rank(self, board, user_id):
+        score = LeaderboardScore.objects.filter(board=board, user_id=user_id).values_list("score", flat=True).first()
+        if score is None:
+            return None
+
+        floor = self.floor(score)
+        above = (
+            LeaderboardBucket.objects.filter(board=board, floor__gt=floor)
+            .aggregate(n=Sum("count"))["n"] or 0
+        )
+        ahead_in_bucket = (
+            LeaderboardScore.objects.filter(board=board, score__lt=floor + self.bucket_width)
+            .filter(Q(score__gt=score) | Q(score=score, user_id__lt=user_id))
+            .count()
+        )
+        return above + ahead_in_bucket + 1, score
+
+    def load(self, board, scores):
+        counts = {}
+        rows = []
+        for user_id, score in scores:
+            rows.append(LeaderboardScore(board=board, user_id=user_id, score=score))
+            counts[self.floor(score)] = counts.get(self.floor(score), 0) + 1
+
+        with transaction.atomic():
+            LeaderboardScore.objects.filter(board=board).delete()
+            LeaderboardBucket.objects.filter(board=board).delete()
+            LeaderboardScore.objects.bulk_create(rows, batch_size=2000)
+            LeaderboardBucket.objects.bulk_create(
+                [LeaderboardBucket(board=board, floor=f, count=c) for f, c in counts.items()]
+            )
+
+    def prune(self, keep):
+        """Drop weekly boards other than ``keep``."""
+        LeaderboardScore.objects.filter(board__startswith="weekly:").exclude(board__in=keep).delete()
+        LeaderboardBucket.objects.filter(board__startswith="weekly:").exclude(board__in=keep).delete()
+
+
+class RedisLeaderboard:
+    """One sorted set per board on a redis-py compatible ``client``."""
+
+    def __init__(self, client, prefix="leaderboard:"):
+        self.client = client
+        self.prefix = prefix
+
+    def add(self, board, user_id, amount):
+        key = self.prefix + board
+        score = self.client.zincrby(key, amount, user_id)
+        if board != GLOBAL:
+            self.client.expire(key, WEEKLY_TTL)
+        return int(score)
+
+    def top(self, board, n):
+        rows = self.client.zrevrange(self.prefix + board, 0, n - 1, withscores=True)
+        return [(int(member), int(score)) for member, score in rows]
+
+    def rank(self, board, user_id):
+        key = self.prefix + board
+        position = self.client.zrevrank(key, user_id)
+        if position is None:
+            return None
+        return position + 1, int(self.client.zscore(key, user_id))
+
+    def load(self, board, scores):
+        key = self.prefix + board
+        self.client.delete(key)
+        mapping = {str(user_id): score for user_id, score in scores}
+        if mapping:
+            self.client.zadd(key, mapping)
+            if board != GLOBAL:
+                self.client.expire(key, WEEKLY_TTL)
+
+
+_leaderboard = None
+_leaderboard_lock = threading.Lock()
+
+
+def make_leaderboard(name):
+    if name == "db":
+        return DatabaseLeaderboard(getattr(settings, "LEADERBOARD_BUCKET_WIDTH", 100))
+    if name == "memory":
+        return MemoryLeaderboard()
+    if name == "redis":
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured('LEADERBOARD_BACKEND = "redis" needs the redis package')
+        return RedisLeaderboard(redis.Redis.from_url(settings.LEADERBOARD_REDIS_URL))
+    raise ImproperlyConfigured(f"Unknown LEADERBOARD_BACKEND {name!r}")
+
+
+def get_leaderboard():
+    global _leaderboard
+    if _leaderboard is None:
+        with _leaderboard_lock:
+            if _leaderboard is None:
+                _leaderboard = make_leaderboard(getattr(settings, "LEADERBOARD_BACKEND", "db"))
+    return _leaderboard
+
+
+def set_leaderboard(leaderboard):
+    """Swap the process-wide backend, e.g. for a RedisLeaderboard on FakeRedis."""
+    global _leaderboard
+    with _leaderboard_lock:
+        _leaderboard = leaderboard
+
+
+def record_xp(user_id, amount, when=None):
+    """Add an award to the global and weekly boards. Backends outside the
+    database only hear about it once the award has committed."""
+    leaderboard = get_leaderboard()
+    boards = boards_for(when)
+
+    def apply():
+        for board in boards:
+            leaderboard.add(board, user_id, amount)
+
+    if getattr(leaderboard, "transactional", False):
+        apply()
+    else:
+        transaction.on_commit(apply)
@@ -0,0 +1,183 @@
+import re
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from ..models import IdempotencyKey, Playlist, Video, YouTubePlaylist, YouTubeVideo
+from .activity import record_activity
+from .versions import CERTIFICATES, LIBRARY, bump_catalog_version, bump_version
+
+VIDEO_CHUNK_SIZE = 500
+VIDEO_UPDATE_FIELDS = ["playlist", "imported_at", "watch_progress", "is_completed"]
+# printable ASCII without spaces, short enough for IdempotencyKey.key
+IDEMPOTENCY_KEY = re.compile(r"[!-~]{1,%d}" % IdempotencyKey._meta.get_field("key").max_length)
+
+
+def upsert_catalog(model, key, rows, fields):
+    """Add ``rows`` (unsaved catalog instances) to the catalog, updating the
+    stored ones whose ``fields`` changed. Content that is already known and
+    unchanged costs one SELECT and no writes. An empty incoming value never
+    replaces a stored one."""
+    rows = {getattr(row, key): row for row in rows}
+    stored = model.objects.filter(**{f"{key}__in": list(rows)}).only("pk", key, *fields).in_bulk(field_name=key)
+
+    changed = []
+    for value, row in rows.items():
+        current = stored.get(value)
+        if current is None:
+            continue
+        updates = {f: getattr(row, f) for f in fields if getattr(row, f) and getattr(row, f) != getattr(current, f)}
+        if updates:
+            for field, new in updates.items():
+                setattr(current, field, new)
+            current.updated_at = timezone.now()
+            changed.append(current)
+
+    # a concurrent import may have added some of these since the SELECT
+    model.objects.bulk_create([row for value, row in rows.items() if value not in stored], ignore_conflicts=True)
+    if changed:
+        model.objects.bulk_update(changed, fields + ["updated_at"])
+        bump_catalog_version()
+
+
+def upsert_youtube_videos(videos):
+    """Catalog rows for import-preview dicts (video_id, title, url, description)."""
+    upsert_catalog(YouTubeVideo, "vid", [
+        YouTubeVideo(vid=v["video_id"], name=v["title"], url=v["url"], description=v.get("description", ""))
+        for v in videos
+    ], ["name", "url", "description"])
+
+
+def upsert_youtube_playlist(pid, data):
+    """Catalog row for a playlist preview or header (title, url, thumbnail)."""
+    upsert_catalog(YouTubePlaylist, "pid", [
+        YouTubePlaylist(pid=pid, name=data["title"], url=data["url"], thumbnail=data.get("thumbnail"))
+    ], ["name", "url", "thumbnail"])
+
+
+def bulk_upsert_videos(user_id, videos, playlist_id=None, chunk_size=VIDEO_CHUNK_SIZE):
+    """Insert or update a user's videos with a few statements per chunk.
+
+    ``videos`` are import-preview dicts (video_id, title, url, description);
+    their metadata goes to the shared catalog, the user gets slim rows.
+    Like the old update_or_create loop, re-imported videos are moved to
+    ``playlist_id`` and their progress is reset.
+    """
+    now = timezone.now()
+    # a payload may repeat a video; ON CONFLICT can't touch a row twice
+    previews = list({v["video_id"]: v for v in videos}.values())
+    rows = [
+        Video(
+            user_id=user_id,
+            youtube_id=v["video_id"],
+            playlist_id=playlist_id,
+            imported_at=now,
+            watch_progress=0.0,
+            is_completed=False,
+        )
+        for v in previews
+    ]
+
+    touched = {playlist_id} if playlist_id else set()
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        upsert_youtube_videos(previews[start:start + chunk_size])
+        # playlists that re-imported videos are about to leave
+        touched.update(
+            Video.objects.filter(user_id=user_id, youtube_id__in=[v.youtube_id for v in chunk], playlist__isnull=False)
+            .exclude(playlist_id=playlist_id)
+            .values_list("playlist_id", flat=True)
+            .distinct()
+        )
+        Video.objects.bulk_create(
+            chunk,
+            update_conflicts=True,
+            unique_fields=["user", "youtube"],
+            update_fields=VIDEO_UPDATE_FIELDS,
+        )
+
+    if touched:
+        recount_playlists(Playlist.objects.filter(pk__in=touched))
+    bump_version(user_id, LIBRARY)
+    return len(rows)
+
+
+def recount_playlists(playlists):
+    """Rebuild the video counters of a Playlist queryset in one UPDATE."""
+    videos = Video.objects.filter(playlist=OuterRef("pk")).order_by().values("playlist")
+    return playlists.update(
+        total_videos=Coalesce(Subquery(videos.annotate(n=Count("pk")).values("n")), 0),
+        completed_videos=Coalesce(Subquery(videos.filter(is_completed=True).annotate(n=Count("pk")).values("n")), 0),
+    )
+
+
+def mark_video_completed(video):
+    """Complete ``video``; the playlist counter only moves if it wasn't
+    completed already. Returns whether anything changed."""
+    with transaction.atomic():
+        changed = Video.objects.filter(pk=video.pk, is_completed=False).update(is_completed=True, watch_progress=100)
+        if changed and video.playlist_id:
+            Playlist.objects.filter(pk=video.playlist_id).update(completed_videos=F("completed_videos") + 1)
+        if changed:
+            bump_version(video.user_id, LIBRARY)
+    video.is_completed = True
+    video.watch_progress = 100
+    return bool(changed)
+
+
+def delete_video(video):
+    with transaction.atomic():
+        row = Video.objects.select_for_update().filter(pk=video.pk).values("playlist_id", "is_completed").first()
+        if row is None:
+            return False
+        Video.objects.filter(pk=video.pk).delete()
+        if row["playlist_id"]:
+            Playlist.objects.filter(pk=row["playlist_id"]).update(
+                total_videos=F("total_videos") - 1,
+                completed_videos=F("completed_videos") - (1 if row["is_completed"] else 0),
+            )
+        # certificates for the video lose their link to it
+        bump_version(video.user_id, LIBRARY, CERTIFICATES)
+    return True
+
+
+def save_playlist(user_id, data):
+    """Playlist, its videos and the import activity, all in one transaction."""
+    with transaction.atomic():
+        upsert_youtube_playlist(data["id"], data)
+        playlist = Playlist.objects.create(user_id=user_id, youtube_id=data["id"])
+        bulk_upsert_videos(user_id, data.get("videos", []), playlist.id)
+        record_activity(user_id, "Learning Import")
+    return playlist
+
+
+def is_valid_idempotency_key(key):
+    return isinstance(key, str) and IDEMPOTENCY_KEY.fullmatch(key) is not None
+
+
+def run_idempotent(user_id, key, func):
+    """Run ``func() -> (body, status)`` at most once per (user, key).
+
+    The key is stored in the same transaction as func's writes, so a retry
+    (or a concurrent duplicate) gets the first response replayed instead
+    of writing twice. Without a key, func just runs.
+    """
+    if not key:
+        return func()
+
+    stored = IdempotencyKey.objects.filter(user_id=user_id, key=key).first()
+    if stored:
+        return stored.response, stored.status_code
+
+    try:
+        with transaction.atomic():
+            body, status = func()
+            IdempotencyKey.objects.create(user_id=user_id, key=key, response=body, status_code=status)
+    except IntegrityError:
+        stored = IdempotencyKey.objects.filter(user_id=user_id, key=key).first()
+        if stored is None:
+            raise
+        return stored.response, stored.status_code
+    return body, status
@@ -0,0 +1,160 @@
+"""Quiz question sets shared per YouTube video or playlist.
+
+The first quiz on a piece of content generates its questions in a process
+pool (QUIZ_GENERATOR_WORKERS spawned processes; 0 generates in the
+request) and stores them as a QuizQuestionSet. Every later quiz on the
+same content, for any user, points at that row, found through the cache.
+Concurrent first requests in one process wait for a single generation;
+across processes the unique constraint keeps one row. A request waits at
+most QUIZ_GENERATION_TIMEOUT seconds and then gets QuizGenerationUnavailable;
+the generation carries on, and a retry waits for the same one.
+"""
+import logging
+import threading
+import zlib
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+
+from ..models import QuizQuestionSet
+from .quiz_generator import VERSION, generate_quiz
+
+logger = logging.getLogger(__name__)
+
+QUESTION_SET_TTL = 24 * 60 * 60
+
+_pool = None
+_pool_lock = threading.Lock()
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def get_generator_pool():
+    """The process pool, or None when QUIZ_GENERATOR_WORKERS is 0. Workers
+    are spawned rather than forked, so they don't inherit this process's
+    threads and locks."""
+    global _pool
+    workers = getattr(settings, "QUIZ_GENERATOR_WORKERS", 2)
+    if not workers:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"))
+    return _pool
+
+
+def shutdown_generator_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+class QuizGenerationUnavailable(Exception):
+    """The questions aren't ready yet; ask again later."""
+
+
+def submit(title, description, count, seed):
+    """A future for the questions: a pool job, or already done when
+    QUIZ_GENERATOR_WORKERS is 0."""
+    pool = get_generator_pool()
+    if pool is not None:
+        try:
+            return pool.submit(generate_quiz, title, description, count, seed)
+        except BrokenProcessPool:
+            logger.exception("Quiz generator pool broke; starting a new one")
+            shutdown_generator_pool()
+            return get_generator_pool().submit(generate_quiz, title, description, count, seed)
+    future = Future()
+    future.set_result(generate_quiz(title, description, count, seed))
+    return future
+
+
+def wait(future):
+    """The future's questions, waiting at most QUIZ_GENERATION_TIMEOUT. The job
+    isn't cancelled on a timeout, so nothing is generated twice."""
+    try:
+        return future.result(timeout=getattr(settings, "QUIZ_GENERATION_TIMEOUT", 10))
+    except TimeoutError:
+        raise QuizGenerationUnavailable("Quiz generation timed out") from None
+    except BrokenProcessPool:
+        logger.exception("Quiz generator pool broke; starting a new one")
+        shutdown_generator_pool()
+        raise QuizGenerationUnavailable("Quiz generator pool broke") from None
+    except CancelledError:
+        raise QuizGenerationUnavailable("Quiz generation was cancelled") from None
+
+
+def generate(title, description, count, seed):
+    return wait(submit(title, description, count, seed))
+
+
+def question_set_cache_key(content_type, content_id):
+    return f"quiz-set:{VERSION}:{content_type}:{content_id}"
+
+
+def get_question_set(content_type, content_id, source, count=5):
+    """The QuizQuestionSet for a video or playlist ID, generating it from
+    ``source()`` -> ``(title, description)`` if there is none yet. Only
+    ``pk`` and ``questions`` are guaranteed to be loaded. Raises
+    QuizGenerationUnavailable if generating takes too long."""
+    key = question_set_cache_key(content_type, content_id)
+    cached = cache.get(key)
+    if cached is not None:
+        return QuizQuestionSet(pk=cached[0], questions=cached[1])
+
+    filters = {"content_type": content_type, "content_id": content_id, "version": VERSION}
+    question_set = QuizQuestionSet.objects.filter(**filters).only("pk", "questions").first()
+    if question_set is None:
+        questions = _generate_once(key, source, count, zlib.crc32(f"{content_type}:{content_id}".encode()))
+        try:
+            with transaction.atomic():
+                question_set = QuizQuestionSet.objects.create(questions=questions, **filters)
+        except IntegrityError:
+            question_set = QuizQuestionSet.objects.only("pk", "questions").get(**filters)
+
+    cache.set(key, (question_set.pk, question_set.questions), QUESTION_SET_TTL)
+    return question_set
+
+
+def _generate_once(key, source, count, seed):
+    with _inflight_lock:
+        future = _inflight.get(key)
+        owner = future is None
+        if owner:
+            future = _inflight[key] = Future()
+    if owner:
+        try:
+            title, description = source()
+            submit(title, description, count, seed).add_done_callback(lambda job: _settle(future, job))
+        except Exception as exc:
+            future.set_exception(exc)
+
+    try:
+        return wait(future)
+    finally:
+        # a finished generation, good or bad, is no longer in flight; an
+        # unfinished one stays so the retry waits for it
+        if future.done():
+            _forget(key, future)
+
+
+def _settle(future, job):
+    if job.cancelled():
+        future.cancel()
+    elif job.exception() is not None:
+        future.set_exception(job.exception())
+    else:
+        future.set_result(job.result())
+
+
+def _forget(key, future):
+    with _inflight_lock:
+        if _inflight.get(key) is future:
+            del _inflight[key]
@@ -1,13 +1,122 @@
-def generate_quiz(title, description):
-    return [
-        {
-            "question" : f"What is the main idea of {title}?",
-            "options" : ["A", "B" , "C", "D"],
-            "answer" : "A"
-        },
-        {
-            "question": "Which of these is correct?",
-            "options": ["X", "Y", "Z", "W"],
-            "answer": "Y"
-        }
-    ]
\ No newline at end of file
+"""Local quiz questions from a title and description.
+
+Questions are fill-in-the-blank ("cloze") items: a keyword is cut out of
+the title or a sentence of the description, and the options are that
+keyword plus three other keywords from the same text. Generation is
+deterministic for a given ``seed`` so every user sees the same set.
+
+This module only uses the standard library: it runs in the spawned
+processes of core.utils.quiz_cache's pool, which don't set up Django.
+"""
+import random
+import re
+from collections import Counter
+
+VERSION = 1
+
+BLANK = "_____"
+WORD = re.compile(r"[A-Za-z][A-Za-z0-9+#'\-]*[A-Za-z0-9+#]")
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n+")
+# description lines that are links, credits or channel plugs, not content
+NOISE = re.compile(r"https?://|www\.|@|#\w|subscribe|patreon|sponsor|follow us|\d+:\d\d", re.I)
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below between
+both but by can could did do does doing down during each even every few for from further get gets getting got
+had has have having he her here hers him his how however i if in into is it its just know learn learning let
+like made make makes many may me might more most much must my new no nor not now of off on once one only or
+other our out over own part really same see she should so some such than that the their them then there these
+they thing things this those through to too under until up use used using very video videos want was way we
+well were what when where which while who why will with would you your tutorial lesson course episode full
+complete guide introduction intro beginners beginner minutes hour hours without within across along around
+""".split())
+FILLER = [
+    "algorithm", "variable", "function", "network", "history", "analysis", "theory", "design",
+    "database", "structure", "process", "method", "principle", "system", "model", "pattern",
+]
+
+
+def keywords(text):
+    """Distinct candidate answers in ``text``, most significant first: words
+    that aren't stopwords, ranked by frequency and then length."""
+    counts = Counter()
+    spelling = {}
+    for word in WORD.findall(text):
+        key = word.lower()
+        if len(key) < 4 or key in STOPWORDS or key.isdigit():
+            continue
+        counts[key] += 1
+        spelling.setdefault(key, word)
+    return [spelling[k] for k, _ in sorted(counts.items(), key=lambda kv: (-kv[1], -len(kv[0]), kv[0]))]
+
+
+def sentences(text):
+    for sentence in SENTENCE_END.split(text or ""):
+        sentence = sentence.strip(" -*•\t")
+        if NOISE.search(sentence):
+            continue
+        if 6 <= len(sentence.split()) <= 40:
+            yield sentence
+
+
+def blank_out(sentence, word):
+    return re.sub(rf"(?<![\w]){re.escape(word)}(?![\w])", BLANK, sentence, count=1, flags=re.I)
+
+
+def stem(word):
+    return word.lower().rstrip("s")
+
+
+def options_for(answer, pool, rng, question=""):
+    """``answer`` and three distractors, shuffled. Distractors come from
+    ``pool`` (closest in length first), then FILLER, skipping forms of the
+    answer and words the question already shows."""
+    taken = {stem(answer)} | {stem(w) for w in WORD.findall(question)}
+    candidates = sorted(pool, key=lambda w: (abs(len(w) - len(answer)), rng.random()))
+    distractors = []
+    for word in candidates + rng.sample(FILLER, len(FILLER)):
+        if stem(word) not in taken:
+            taken.add(stem(word))
+            distractors.append(word)
+        if len(distractors) == 3:
+            break
+    options = [answer] + distractors
+    rng.shuffle(options)
+    return options
+
+
+def generate_quiz(title, description, count=5, seed=0):
+    """Up to ``count`` questions as ``{"question", "options", "answer"}``
+    dicts, ``answer`` being one of the options."""
+    rng = random.Random(seed)
+    body = list(sentences(description))
+    pool = keywords(" ".join([title] + body))
+    questions = []
+    used = set()
+
+    title_words = [w for w in keywords(title) if w.lower() not in used]
+    if title_words:
+        answer = title_words[0]
+        used.add(answer.lower())
+        question = f"Complete the title: \"{blank_out(title, answer)}\""
+        questions.append({"question": question, "options": options_for(answer, pool, rng, question), "answer": answer})
+
+    rank = {w.lower(): i for i, w in enumerate(pool)}
+    for sentence in body:
+        if len(questions) >= count:
+            break
+        # the sentence's most significant keyword not asked about yet
+        candidates = [w for w in keywords(sentence) if w.lower() not in used and w.lower() in rank]
+        if not candidates:
+            continue
+        answer = min(candidates, key=lambda w: rank[w.lower()])
+        used.add(answer.lower())
+        question = f"Fill in the blank: {blank_out(sentence, answer)}"
+        questions.append({"question": question, "options": options_for(answer, pool, rng, question), "answer": answer})
+
+    if not questions:
+        questions.append({
+            "question": f"What is the main idea of {title}?",
+            "options": ["A", "B", "C", "D"],
+            "answer": "A",
+        })
+    return questions
@@ -0,0 +1,122 @@
+"""Ranked search over a user's saved videos and playlists.
+
+Titles and descriptions live in the shared YouTube catalog. Both backends
+start from the user's own rows and match only their catalog entries, so
+the cost follows the size of the library rather than of the catalog. On
+Postgres this checks the catalog's ``search_vector`` columns and falls
+back to trigram word similarity on ``name`` for partial words and typos.
+On SQLite it looks up each entry in the ``core_search_fts`` FTS5 table by
+rowid. Both are created by migration 0015 and kept up to date by the
+database itself.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from ..models import Playlist, Video, YouTubePlaylist, YouTubeVideo
+
+RESULT_LIMIT = 500
+MIN_TERM_LENGTH = 3
+
+# the materialized CTE is an optimisation fence: the user's rows are read
+# first and each is matched through the catalog's key index
+POSTGRES_SQL = """
+    WITH library AS MATERIALIZED (SELECT id, {key} FROM {table} WHERE user_id = %(user_id)s)
+    SELECT t.id FROM library t JOIN {catalog} c ON c.{key} = t.{key}
+    WHERE (c.search_vector @@ websearch_to_tsquery('english', %(query)s) OR %(query)s <%% c.name)
+    ORDER BY ts_rank(c.search_vector, websearch_to_tsquery('english', %(query)s))
+             + word_similarity(%(query)s, c.name) DESC, t.id DESC
+    LIMIT %(limit)s
+"""
+
+# CROSS JOIN fixes the join order, so the FTS table is probed once per
+# library row instead of matched across the catalog. The rowid is the
+# catalog id * 2, + 1 for playlists (see migration 0015). bm25 weights: a
+# hit in the name counts ten times one in the description
+SQLITE_SQL = """
+    SELECT t.id FROM {table} t
+    CROSS JOIN {catalog} c ON c.{key} = t.{key}
+    CROSS JOIN core_search_fts ON core_search_fts.rowid = c.id * 2 + {rowid_offset}
+    WHERE t.user_id = %s AND core_search_fts MATCH %s
+    ORDER BY bm25(core_search_fts, 10.0, 1.0), t.id DESC
+    LIMIT %s
+"""
+
+# kind: (per-user model, catalog model, key column, FTS rowid offset)
+TABLES = {
+    "video": (Video, YouTubeVideo, "vid", 0),
+    "playlist": (Playlist, YouTubePlaylist, "pid", 1),
+}
+
+
+def search_library(user_id, query, limit=RESULT_LIMIT):
+    """``(video_ids, playlist_ids)`` matching ``query``, best match first."""
+    query = query.strip()
+    if not query:
+        return [], []
+
+    if connection.vendor == "postgresql":
+        return (
+            _postgres_search("video", user_id, query, limit),
+            _postgres_search("playlist", user_id, query, limit),
+        )
+
+    match = fts_match_expression(query)
+    if connection.vendor == "sqlite" and match:
+        return (
+            _sqlite_search("video", user_id, match, limit),
+            _sqlite_search("playlist", user_id, match, limit),
+        )
+
+    return _scan_search(user_id, query, limit)
+
+
+def fts_match_expression(query):
+    """Quote each term so FTS5 syntax in user input is matched literally.
+
+    The trigram tokenizer cannot match terms shorter than three characters,
+    so those are dropped; None means nothing indexable is left.
+    """
+    terms = [t for t in re.findall(r"\S+", query) if len(t) >= MIN_TERM_LENGTH]
+    if not terms:
+        return None
+    return " ".join('"{}"'.format(t.replace('"', '""')) for t in terms)
+
+
+def _postgres_search(kind, user_id, query, limit):
+    model, catalog, key, _ = TABLES[kind]
+    sql = POSTGRES_SQL.format(table=model._meta.db_table, catalog=catalog._meta.db_table, key=key)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, {"user_id": user_id, "query": query, "limit": limit})
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _sqlite_search(kind, user_id, match, limit):
+    model, catalog, key, rowid_offset = TABLES[kind]
+    sql = SQLITE_SQL.format(table=model._meta.db_table, catalog=catalog._meta.db_table, key=key, rowid_offset=rowid_offset)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [user_id, match, limit])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _scan_search(user_id, query, limit):
+    videos = (
+        Video.objects.filter(Q(youtube__name__icontains=query) | Q(youtube__description__icontains=query), user_id=user_id)
+        .order_by("-imported_at", "-id")
+        .values_list("id", flat=True)
+    )
+    playlists = (
+        Playlist.objects.filter(user_id=user_id, youtube__name__icontains=query)
+        .order_by("-id")
+        .values_list("id", flat=True)
+    )
+    return list(videos[:limit]), list(playlists[:limit])
+
+
+def order_by_ids(queryset, ids):
+    """Restrict ``queryset`` to ``ids`` and keep them in that order."""
+    if not ids:
+        return queryset.none()
+    rank = Case(*[When(id=pk, then=Value(i)) for i, pk in enumerate(ids)], output_field=IntegerField())
+    return queryset.filter(id__in=ids).order_by(rank)
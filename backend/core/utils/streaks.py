@@ -0,0 +1,60 @@
+"""Daily activity streaks.
+
+``UserProfile.last_active_date`` is the user's last local day with any
+activity, so an event only has to compare its own day with it: same day
+leaves the streak alone, the next day extends it, anything later starts a
+new one. ``recompute_streaks`` rebuilds all three fields from
+UserActivityDaily.
+
+Nothing writes when a day passes without activity, so the stored
+streak_count outlives a lapsed streak until the next event or nightly
+``recompute_streaks``; read it through current_streak.
+"""
+from datetime import timedelta
+
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.functions import Greatest
+
+from ..models import UserProfile
+
+
+def update_streak(user_id, date):
+    """Count activity on local day ``date`` towards the user's streak with
+    one UPDATE. Days at or before ``last_active_date`` change nothing."""
+    extends = Q(last_active_date=date - timedelta(days=1))
+    streak = Case(When(extends, then=F("streak_count") + 1), default=Value(1))
+    return (
+        UserProfile.objects.filter(pk=user_id)
+        .filter(Q(last_active_date__isnull=True) | Q(last_active_date__lt=date))
+        .update(
+            streak_count=streak,
+            longest_streak=Greatest("longest_streak", streak),
+            last_active_date=date,
+        )
+    )
+
+
+def current_streak(streak_count, last_active_date, today):
+    """The stored streak as of local day ``today``: 0 if the last active day
+    is before yesterday, as compute_streaks counts it."""
+    if last_active_date is None or last_active_date < today - timedelta(days=1):
+        return 0
+    return streak_count
+
+
+def compute_streaks(dates, today):
+    """``(current, longest, last_active_date)`` from ascending active dates.
+
+    The current streak is 0 once a whole local day has passed without
+    activity, i.e. when the last active day is before yesterday.
+    """
+    longest = run = 0
+    previous = None
+    for date in dates:
+        run = run + 1 if previous is not None and date - previous == timedelta(days=1) else 1
+        longest = max(longest, run)
+        previous = date
+
+    if previous is None or previous < today - timedelta(days=1):
+        run = 0
+    return run, longest, previous
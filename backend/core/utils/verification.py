@@ -0,0 +1,96 @@
+"""Public certificate verification, answered from the cache.
+
+The first lookup of a certificate builds its response body once: the
+certificate's status, holder, title and issue date, signed with the
+project's SECRET_KEY. The body and its ETag are cached, so repeat hits
+(and their 304s) touch neither the database nor the serializer. Saving,
+deleting or revoking a certificate drops its entry once the transaction
+commits; unknown IDs are cached briefly as misses.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import Certificate
+from .versions import CERTIFICATES, bump_versions
+
+SALT = "core.certificate-verification"
+MISSING = "missing"
+
+
+def verification_cache_key(certificate_id):
+    return f"certificate-verify:{certificate_id}"
+
+
+def canonical(payload):
+    return json.dumps(payload, separators=(",", ":"), sort_keys=True, ensure_ascii=False)
+
+
+def sign(payload):
+    return signing.Signer(salt=SALT).signature(canonical(payload))
+
+
+def verify_signature(data):
+    """Whether a verification body (as a dict) carries our signature."""
+    payload = {k: v for k, v in data.items() if k != "signature"}
+    return signing.constant_time_compare(sign(payload), data.get("signature", ""))
+
+
+def build_verification(certificate_id):
+    """``(body, etag)`` for a certificate, or None if there is no such one."""
+    certificate = (
+        Certificate.objects.filter(certificate_id=certificate_id)
+        .select_related("user")
+        .only("certificate_id", "title", "issued_at", "revoked_at", "user__name")
+        .first()
+    )
+    if certificate is None:
+        return None
+    payload = {
+        "certificate_id": str(certificate.certificate_id),
+        "status": "revoked" if certificate.revoked_at else "valid",
+        "holder": certificate.user.name,
+        "title": certificate.title,
+        "issued_at": certificate.issued_at.date().isoformat(),
+    }
+    if certificate.revoked_at:
+        payload["revoked_at"] = certificate.revoked_at.date().isoformat()
+    payload["signature"] = sign(payload)
+    body = canonical(payload).encode()
+    return body, hashlib.sha256(body).hexdigest()[:32]
+
+
+def get_verification(certificate_id):
+    """The cached ``(body, etag)`` for a certificate, or None."""
+    key = verification_cache_key(certificate_id)
+    cached = cache.get(key)
+    if cached is None:
+        cached = build_verification(certificate_id)
+        if cached is None:
+            cache.set(key, MISSING, getattr(settings, "CERTIFICATE_VERIFICATION_MISS_TTL", 60))
+        else:
+            cache.set(key, cached, getattr(settings, "CERTIFICATE_VERIFICATION_TTL", 24 * 60 * 60))
+    return None if cached == MISSING else cached
+
+
+def forget_verification(*certificate_ids):
+    """Drop cached entries after the current transaction commits, so a
+    lookup racing the change can't cache what is being replaced."""
+    keys = [verification_cache_key(certificate_id) for certificate_id in certificate_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def revoke_certificates(queryset):
+    """Revoke the certificates in ``queryset`` that aren't already; how many were."""
+    with transaction.atomic():
+        rows = list(queryset.filter(revoked_at__isnull=True).select_for_update().values_list("certificate_id", "user_id"))
+        ids = [certificate_id for certificate_id, _ in rows]
+        Certificate.objects.filter(certificate_id__in=ids).update(revoked_at=timezone.now())
+        forget_verification(*ids)
+        bump_versions([user_id for _, user_id in rows], CERTIFICATES)
+    return len(ids)
@@ -0,0 +1,90 @@
+"""Per-user version stamps for conditional GETs.
+
+Each user has a stamp per scope of readable state, the time its last change
+committed. Writers bump the scopes they touch; the read endpoints' GET
+variants turn the stamps they depend on into an ETag and Last-Modified and
+answer a matching If-None-Match / If-Modified-Since with 304 before any
+query for the data itself. Catalog metadata is shared, so its stamp is
+global and counts towards every user's library.
+
+Stamps live in the cache, so running several workers needs a shared one
+(see CACHES in settings). A stamp that isn't there (never set, evicted)
+starts again at the current time, which at worst costs a full response.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+PROFILE, LIBRARY, CERTIFICATES, ACTIVITY = "profile", "library", "certificates", "activity"
+CATALOG = "catalog"
+
+# bump when a response format changes, so old ETags stop matching
+REPRESENTATION = 1
+
+
+def version_cache_key(scope, user_id):
+    return f"user-version:{scope}:{user_id}"
+
+
+def version_ttl():
+    return getattr(settings, "USER_VERSION_TTL", 7 * 24 * 60 * 60)
+
+
+def bump_versions(user_ids, *scopes):
+    """Mark ``scopes`` changed for ``user_ids`` once the current transaction commits."""
+    keys = [version_cache_key(scope, user_id) for user_id in set(user_ids) for scope in scopes]
+    if keys:
+        transaction.on_commit(lambda: cache.set_many(dict.fromkeys(keys, time.time()), version_ttl()))
+
+
+def bump_version(user_id, *scopes):
+    bump_versions([user_id], *scopes)
+
+
+def bump_catalog_version():
+    bump_versions([0], CATALOG)
+
+
+def get_versions(user_id, scopes):
+    """``{scope: stamp}`` in one cache round trip, starting missing ones now."""
+    keys = {version_cache_key(scope, 0 if scope == CATALOG else user_id): scope for scope in scopes}
+    stamps = cache.get_many(list(keys))
+    for key in keys.keys() - stamps.keys():
+        # add: a concurrent first read or a bump may have set it meanwhile
+        cache.add(key, time.time(), version_ttl())
+        stamps[key] = cache.get(key, time.time())
+    return {scope: stamps[key] for key, scope in keys.items()}
+
+
+def conditional_get(request, scopes, respond, since=None):
+    """``respond()``, or a 304 if the client's copy of this URL is still
+    current for the user's ``scopes``. ``since`` is a time the response
+    can't be older than whatever the stamps say, e.g. the start of the
+    user's day for "the last 14 days"."""
+    user_id = request.user.profile_id
+    if LIBRARY in scopes:
+        scopes = [*scopes, CATALOG]
+    versions = get_versions(user_id, scopes)
+    last_modified = max(versions.values())
+    parts = [REPRESENTATION, user_id, request.get_full_path(), *sorted(versions.items())]
+    if since is not None:
+        last_modified = max(last_modified, since)
+        parts.append(since)
+    etag = '"%s"' % hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+    last_modified = int(last_modified)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = respond()
+    if response.status_code in (200, 304):
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        # per-user: browsers may keep it, but must check back every time
+        response["Cache-Control"] = "private, no-cache"
+        response["Vary"] = "Authorization"
+    return response
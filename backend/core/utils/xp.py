@@ -0,0 +1,36 @@
+"""XP awards.
+
+Every award is an INSERT into XPLedger plus one UPDATE that adds to
+``UserProfile.xp`` and recomputes ``level`` in SQL, so concurrent awards
+for the same user add up instead of overwriting each other. The award is
+also added to the leaderboards (core.utils.leaderboard) before that
+UPDATE, so the profile row is locked only from there to commit.
+"""
+from django.db import transaction
+from django.db.models import F
+
+from ..models import UserProfile, XPLedger
+from .leaderboard import record_xp
+from .versions import PROFILE, bump_version
+
+XP_PER_LEVEL = 100
+
+
+def level_for(xp):
+    return xp // XP_PER_LEVEL + 1
+
+
+def award_xp(user_id, amount, reason):
+    """Record ``amount`` XP for ``reason`` and add it to the user's total."""
+    # no savepoint of its own: inside a caller's transaction a failure here
+    # rolls back with the rest of it anyway
+    with transaction.atomic(savepoint=False):
+        entry = XPLedger.objects.create(user_id=user_id, amount=amount, reason=reason)
+        record_xp(user_id, amount, entry.created_at)
+        # last, so the profile row stays locked for as short as possible;
+        # both expressions read the row as it was before this UPDATE
+        UserProfile.objects.filter(pk=user_id).update(
+            xp=F("xp") + amount,
+            level=(F("xp") + amount) / XP_PER_LEVEL + 1,
+        )
+    bump_version(user_id, PROFILE)
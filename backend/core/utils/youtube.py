@@ -1,10 +1,12 @@
-from googleapiclient.discovery import build
 import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 import isodate
-from .apikey import youtubekey
-
-YOUTUBE_API_KEY = youtubekey
+from django.conf import settings
+from googleapiclient.errors import HttpError
+from .youtube_client import get_youtube_client
 
 def extract_id(youtube_url):
     """Extract video or playlist ID from YouTube URL"""
@@ -42,6 +44,307 @@ def format_duration(duration_str):
     except:
         return duration_str
 
+def iter_playlist_pages(playlist_id, max_videos=None, page_token=None, known=None, record=None):
+    """Yield ``(videos, next_page_token)`` for each playlistItems page.
+
+    Pages are fetched lazily, one API call per page of up to 50 videos.
+    Pass ``page_token`` to resume from a previous page's ``next_page_token``.
+    Pages in ``known`` (see known_pages) are revalidated with their etag
+    and reused, durations included, while unchanged. Each page's
+    ``[page_token, etag, video_count, next_page_token]`` is appended to
+    ``record``.
+    """
+    yt = get_youtube_client()
+    pager = PlaylistPager(max_videos, page_token, known, record)
+
+    while True:
+        call = pager.next_call()
+        if call is None:
+            return
+        page_token, max_results, etag = call
+        request = yt.playlistItems().list(
+            part="snippet",
+            playlistId=playlist_id,
+            maxResults=max_results,
+            pageToken=page_token
+        )
+        try:
+            items_res = execute(request, etag)
+        except NotModified:
+            items_res = None
+        yield pager.received(items_res)
+
+class PlaylistPager:
+    """Paging state of iter_playlist_pages and aiter_playlist_pages, which
+    only make the playlistItems calls: next_call() says which page to ask
+    for, received() takes the response (None for a 304) and returns the
+    page as ``(videos, next_page_token)``."""
+
+    def __init__(self, max_videos=None, page_token=None, known=None, record=None):
+        self.max_videos = max_videos
+        self.page_token = page_token
+        self.known = known or {}
+        self.record = record
+        self.videos_fetched = 0
+        self.previous = None
+        self.done = False
+
+    def next_call(self):
+        """``(page_token, max_results, etag)``, or None once there are no more pages."""
+        max_results = 50
+        if self.max_videos:
+            max_results = min(50, self.max_videos - self.videos_fetched)
+        if self.done or max_results <= 0:
+            return None
+        self.previous = self.known.get(self.page_token or "")
+        return self.page_token, max_results, self.previous[0] if self.previous else None
+
+    def received(self, items_res):
+        if items_res is None:
+            etag, videos, next_page_token = self.previous[0], [dict(v) for v in self.previous[1]], self.previous[2]
+        else:
+            etag, next_page_token = items_res.get("etag"), items_res.get("nextPageToken")
+            videos = page_videos(items_res)
+        self.videos_fetched += len(videos)
+
+        if self.record is not None:
+            self.record.append([self.page_token, etag, len(videos), next_page_token])
+        self.page_token = next_page_token
+        self.done = not next_page_token
+        return videos, next_page_token
+
+def known_pages(videos, pages):
+    """``known`` for iter_playlist_pages from an earlier pass's videos and
+    recorded pages: page token -> ``(etag, videos, next_page_token)``."""
+    known, start = {}, 0
+    for page_token, etag, count, next_page_token in pages:
+        known[page_token or ""] = (etag, videos[start:start + count], next_page_token)
+        start += count
+    return known
+
+def page_videos(items_res):
+    """Video dicts from a playlistItems response, skipping non-videos."""
+    videos = []
+    for v in items_res.get("items", []):
+        if v["snippet"]["resourceId"]["kind"] == "youtube#video":
+            videos.append({
+                "video_id": v["snippet"]["resourceId"]["videoId"],
+                "title": v["snippet"]["title"],
+                "position": v["snippet"]["position"] + 1,
+                "url": f"https://www.youtube.com/watch?v={v['snippet']['resourceId']['videoId']}"
+            })
+    return videos
+
+def parse_durations(res):
+    return {item["id"]: format_duration(item["contentDetails"]["duration"]) for item in res.get("items", [])}
+
+def fetch_durations(video_ids):
+    """Durations for up to 50 videos in one videos().list call."""
+    if not video_ids:
+        return {}
+    res = get_youtube_client().videos().list(
+        part="contentDetails",
+        id=",".join(video_ids),
+        maxResults=50
+    ).execute()
+    return parse_durations(res)
+
+_enrich_pool = None
+_enrich_pool_lock = threading.Lock()
+
+def get_enrich_pool():
+    global _enrich_pool
+    if _enrich_pool is None:
+        with _enrich_pool_lock:
+            if _enrich_pool is None:
+                _enrich_pool = ThreadPoolExecutor(
+                    max_workers=getattr(settings, "YOUTUBE_ENRICH_WORKERS", 4),
+                    thread_name_prefix="yt-enrich",
+                )
+    return _enrich_pool
+
+def iter_enriched_pages(pages, pool=None, max_in_flight=None):
+    """Add ``duration`` to every video of each page from ``pages``.
+
+    Each page's videos().list call runs on a thread pool while the next
+    pages are still being fetched; pages are yielded in playlist order.
+    ``pool=False`` enriches inline, one call after another. Videos that
+    already have a duration (reused pages) are left alone.
+    """
+    if pool is False:
+        for videos, next_page_token in pages:
+            add_durations(videos, fetch_durations(missing_durations(videos)))
+            yield videos, next_page_token
+        return
+
+    pool = pool or get_enrich_pool()
+    max_in_flight = max_in_flight or getattr(settings, "YOUTUBE_ENRICH_WORKERS", 4) * 2
+    pending = deque()
+
+    def finish():
+        future, videos, next_page_token = pending.popleft()
+        add_durations(videos, future.result())
+        return videos, next_page_token
+
+    for videos, next_page_token in pages:
+        pending.append((pool.submit(fetch_durations, missing_durations(videos)), videos, next_page_token))
+        while pending and (pending[0][0].done() or len(pending) > max_in_flight):
+            yield finish()
+
+    while pending:
+        yield finish()
+
+def missing_durations(videos):
+    return [v["video_id"] for v in videos if "duration" not in v]
+
+def add_durations(videos, durations):
+    for v in videos:
+        if "duration" not in v:
+            v["duration"] = durations.get(v["video_id"])
+
+class NotModified(Exception):
+    """The API answered 304 to an If-None-Match revalidation."""
+
+
+def execute(request, etag=None):
+    """Run an API request, revalidating against ``etag`` when given."""
+    if etag:
+        request.headers["If-None-Match"] = etag
+    try:
+        return request.execute()
+    except HttpError as e:
+        if e.resp.status == 304:
+            raise NotModified()
+        raise
+
+
+def fetch_playlist_header(playlist_id, etag=None):
+    """Playlist metadata without its videos, as ``(metadata, etag)``."""
+    pl_res = execute(get_youtube_client().playlists().list(
+        part="snippet,contentDetails", 
+        id=playlist_id
+    ), etag)
+    return playlist_header(playlist_id, pl_res)
+
+
+def playlist_header(playlist_id, pl_res):
+    """``(metadata, etag)`` from a playlists().list response."""
+    if not pl_res["items"]:
+        return {"error": "Playlist not found"}, None
+    
+    playlist_item = pl_res["items"][0]
+    snippet = playlist_item["snippet"]
+    content_details = playlist_item["contentDetails"]
+    
+    return {
+        "type": "playlist",
+        "id": playlist_id,
+        "title": snippet["title"],
+        "description": snippet.get("description", ""),
+        "channel": snippet["channelTitle"],
+        "published_at": snippet["publishedAt"],
+        "thumbnail": snippet["thumbnails"]["high"]["url"],
+        "video_count": content_details["itemCount"],
+        "url": f"https://www.youtube.com/playlist?list={playlist_id}"
+    }, pl_res.get("etag")
+
+
+def fetch_metadata(content_type, content_id, max_playlist_videos=None, etag=None):
+    """Fetch metadata for a video or playlist ID.
+
+    Returns ``(metadata, etag)`` where ``etag`` belongs to the video
+    resource itself. Raises NotModified if ``etag`` still matches. Playlists
+    are revalidated with fetch_playlist instead.
+    """
+    if content_type == 'video':
+        res = execute(get_youtube_client().videos().list(
+            part="snippet,contentDetails,statistics", 
+            id=content_id
+        ), etag)
+        return video_metadata(content_id, res)
+        
+    elif content_type == 'playlist':
+        metadata, pl_etag, _ = fetch_playlist(content_id, max_playlist_videos)
+        return metadata, pl_etag
+
+    return {"error": "Unknown content type"}, None
+
+def fetch_playlist(playlist_id, max_videos=None, previous=None):
+    """Playlist metadata with its videos, as ``(metadata, etag, pages)``.
+
+    ``pages`` are the playlistItems pages as recorded by iter_playlist_pages.
+    Given the ``(metadata, etag, pages)`` of an earlier fetch as
+    ``previous``, the header and every page are revalidated with
+    If-None-Match and unchanged pages are reused; raises NotModified only if
+    none of them changed. The header's etag doesn't cover the playlist's
+    items, so a 304 on it alone says nothing about the videos.
+    """
+    try:
+        header = fetch_playlist_header(playlist_id, previous[1] if previous else None)
+    except NotModified:
+        header = None
+    if header and "error" in header[0]:
+        return header[0], None, []
+
+    # Page through the playlist while durations are fetched alongside
+    pages = []
+    videos = []
+    known = previous_pages(previous)
+    for page, next_page_token in iter_enriched_pages(iter_playlist_pages(playlist_id, max_videos, known=known, record=pages)):
+        videos.extend(page)
+
+    return playlist_result(header, videos, pages, previous)
+
+def previous_pages(previous):
+    """``known`` for iter_playlist_pages from fetch_playlist's ``previous``."""
+    if not previous or not previous[2]:
+        return None
+    return known_pages(previous[0]["videos"], previous[2])
+
+def playlist_result(header, videos, pages, previous=None):
+    """fetch_playlist's ``(metadata, etag, pages)`` from the header's
+    ``(metadata, etag)``, None if it answered 304, and the items fetched.
+    Raises NotModified if neither the header nor any page changed."""
+    if header is None:
+        old_metadata, etag, old_pages = previous
+        if pages == old_pages:
+            raise NotModified()
+        metadata = without_videos(old_metadata)
+    else:
+        metadata, etag = header
+
+    metadata["videos"] = videos
+    metadata["total_videos_fetched"] = len(videos)
+    return metadata, etag, pages
+
+def without_videos(metadata):
+    """A playlist's cached metadata as fetch_playlist_header returns it."""
+    return {k: v for k, v in metadata.items() if k not in ("videos", "total_videos_fetched")}
+
+def video_metadata(content_id, res):
+    """``(metadata, etag)`` from a videos().list response."""
+    if not res["items"]:
+        return {"error": "Video not found"}, None
+    
+    item = res["items"][0]
+    snippet = item["snippet"]
+    content_details = item["contentDetails"]
+    stats = item.get("statistics", {})
+    
+    return {
+        "type": "video",
+        "id": content_id,
+        "title": snippet["title"],
+        "description": snippet.get("description", ""),
+        "channel": snippet["channelTitle"],
+        "published_at": snippet["publishedAt"],
+        "thumbnail": snippet["thumbnails"]["high"]["url"],
+        "duration": format_duration(content_details["duration"]),
+        "view_count": stats.get("viewCount", "0"),
+        "like_count": stats.get("likeCount", "0"),
+        "url": f"https://www.youtube.com/watch?v={content_id}"
+    }, res.get("etag")
+
 def get_youtube_metadata(youtube_url, max_playlist_videos=None):
     """Get metadata for YouTube video or playlist
     
@@ -49,115 +352,16 @@ def get_youtube_metadata(youtube_url, max_playlist_videos=None):
         youtube_url: YouTube URL
         max_playlist_videos: Maximum videos to fetch for playlists (None = all videos)
     """
+    content_type, content_id = extract_id(youtube_url)
+    
+    if not content_type or not content_id:
+        return {"error": "Invalid YouTube URL"}
+
     try:
-        yt = build("youtube", "v3", developerKey=YOUTUBE_API_KEY)
-        content_type, content_id = extract_id(youtube_url)
-        
-        if not content_type or not content_id:
-            return {"error": "Invalid YouTube URL"}
-        
-        if content_type == 'video':
-            res = yt.videos().list(
-                part="snippet,contentDetails,statistics", 
-                id=content_id
-            ).execute()
-            
-            if not res["items"]:
-                return {"error": "Video not found"}
-            
-            item = res["items"][0]
-            snippet = item["snippet"]
-            content_details = item["contentDetails"]
-            stats = item.get("statistics", {})
-            
-            return {
-                "type": "video",
-                "id": content_id,
-                "title": snippet["title"],
-                "description": snippet.get("description", ""),
-                "channel": snippet["channelTitle"],
-                "published_at": snippet["publishedAt"],
-                "thumbnail": snippet["thumbnails"]["high"]["url"],
-                "duration": format_duration(content_details["duration"]),
-                "view_count": stats.get("viewCount", "0"),
-                "like_count": stats.get("likeCount", "0"),
-                "url": f"https://www.youtube.com/watch?v={content_id}"
-            }
-            
-        elif content_type == 'playlist':
-            # Get playlist details
-            pl_res = yt.playlists().list(
-                part="snippet,contentDetails", 
-                id=content_id
-            ).execute()
-            
-            if not pl_res["items"]:
-                return {"error": "Playlist not found"}
-            
-            playlist_item = pl_res["items"][0]
-            snippet = playlist_item["snippet"]
-            content_details = playlist_item["contentDetails"]
-            
-            # Get all playlist items with pagination
-            videos = []
-            next_page_token = None
-            videos_fetched = 0
-            
-            while True:
-                # Calculate how many to fetch in this request
-                if max_playlist_videos:
-                    remaining = max_playlist_videos - videos_fetched
-                    if remaining <= 0:
-                        break
-                    current_max = min(50, remaining)
-                else:
-                    current_max = 50
-                
-                items_res = yt.playlistItems().list(
-                    part="snippet", 
-                    playlistId=content_id, 
-                    maxResults=current_max,
-                    pageToken=next_page_token
-                ).execute()
-                
-                # Process current page videos
-                for v in items_res.get("items", []):
-                    if v["snippet"]["resourceId"]["kind"] == "youtube#video":
-                        videos.append({
-                            "video_id": v["snippet"]["resourceId"]["videoId"],
-                            "title": v["snippet"]["title"],
-                            "position": v["snippet"]["position"] + 1,
-                            "url": f"https://www.youtube.com/watch?v={v['snippet']['resourceId']['videoId']}"
-                        })
-                        videos_fetched += 1
-                        
-                        # Break if we've reached the limit
-                        if max_playlist_videos and videos_fetched >= max_playlist_videos:
-                            break
-                
-                # Check if there are more pages and we haven't hit our limit
-                next_page_token = items_res.get("nextPageToken")
-                if not next_page_token or (max_playlist_videos and videos_fetched >= max_playlist_videos):
-                    break
-            
-            return {
-                "type": "playlist",
-                "id": content_id,
-                "title": snippet["title"],
-                "description": snippet.get("description", ""),
-                "channel": snippet["channelTitle"],
-                "published_at": snippet["publishedAt"],
-                "thumbnail": snippet["thumbnails"]["high"]["url"],
-                "video_count": content_details["itemCount"],
-                "videos": videos,
-                "total_videos_fetched": len(videos),
-                "url": f"https://www.youtube.com/playlist?list={content_id}"
-            }
-            
+        metadata, etag = fetch_metadata(content_type, content_id, max_playlist_videos)
+        return metadata
     except Exception as e:
         return {"error": f"API Error: {str(e)}"}
-    
-    return {"error": "Unknown content type"}
 
 # Example usage
 if __name__ == "__main__":
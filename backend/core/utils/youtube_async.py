@@ -0,0 +1,191 @@
+"""Non-blocking YouTube Data API calls for the async views.
+
+The same requests and parsing as core.utils.youtube, sent as plain REST
+calls on an ``httpx.AsyncClient`` (the discovery-based client only
+blocks), so a worker's event loop can keep many slow API calls in flight.
+Each event loop gets its own clients and connection pools.
+"""
+import asyncio
+import itertools
+import time
+import weakref
+from collections import deque
+
+import httpx
+from django.conf import settings
+
+from . import youtube_client
+from .youtube import (
+    NotModified, PlaylistPager, add_durations, extract_id, missing_durations, parse_durations, playlist_header,
+    playlist_result, previous_pages, video_metadata,
+)
+from .youtube_client import get_api_key, stats
+
+DEFAULT_ROOT_URL = "https://youtube.googleapis.com/"
+
+# httpcore rescans its whole pool on every request and release, so the
+# connections are split over small pools instead of one big one
+POOL_SIZE = 10
+
+_clients = weakref.WeakKeyDictionary()
+
+
+class LoopClients:
+    """One event loop's connections: clients of POOL_SIZE connections each,
+    used in turn. Calls wait on a pool's semaphore rather than in
+    httpcore's queue."""
+
+    def __init__(self):
+        self.generation = youtube_client._generation
+        root_url = getattr(settings, "YOUTUBE_API_ROOT_URL", None) or DEFAULT_ROOT_URL
+        max_connections = getattr(settings, "YOUTUBE_ASYNC_MAX_CONNECTIONS", 100)
+        ssl_context = httpx.create_ssl_context()  # loading the CA bundle is the slow part of a client
+        self.pools = [
+            (
+                httpx.AsyncClient(
+                    base_url=root_url.rstrip("/") + "/youtube/v3/",
+                    timeout=getattr(settings, "YOUTUBE_HTTP_TIMEOUT", 30),
+                    limits=httpx.Limits(max_connections=POOL_SIZE),
+                    verify=ssl_context,
+                ),
+                asyncio.Semaphore(POOL_SIZE),
+            )
+            for _ in range(max(1, -(-max_connections // POOL_SIZE)))
+        ]
+        self._turn = itertools.count()
+
+    def next_pool(self):
+        return self.pools[next(self._turn) % len(self.pools)]
+
+    async def aclose(self):
+        for client, _ in self.pools:
+            await client.aclose()
+
+
+def get_async_youtube_clients():
+    """The running event loop's clients, rebuilt after reset_youtube_clients()."""
+    loop = asyncio.get_running_loop()
+    clients = _clients.get(loop)
+    if clients is None or clients.generation != youtube_client._generation:
+        clients = _clients[loop] = LoopClients()
+    return clients
+
+
+async def aclose_youtube_clients():
+    clients = _clients.pop(asyncio.get_running_loop(), None)
+    if clients is not None:
+        await clients.aclose()
+
+
+async def api_get(resource, etag=None, **params):
+    """GET a list call; raises NotModified on a 304 to ``etag``."""
+    params = {k: v for k, v in params.items() if v is not None}
+    params["key"] = get_api_key()
+    headers = {"If-None-Match": etag} if etag else None
+    client, slots = get_async_youtube_clients().next_pool()
+    async with slots:
+        start = time.perf_counter()
+        try:
+            res = await client.get(resource, params=params, headers=headers)
+        finally:
+            stats.record_request(time.perf_counter() - start)
+    if res.status_code == 304:
+        raise NotModified()
+    res.raise_for_status()
+    return res.json()
+
+
+async def afetch_playlist_header(playlist_id, etag=None):
+    return playlist_header(playlist_id, await api_get("playlists", etag, part="snippet,contentDetails", id=playlist_id))
+
+
+async def afetch_durations(video_ids):
+    if not video_ids:
+        return {}
+    return parse_durations(await api_get("videos", part="contentDetails", id=",".join(video_ids), maxResults=50))
+
+
+async def aiter_playlist_pages(playlist_id, max_videos=None, page_token=None, known=None, record=None):
+    """Async iter_playlist_pages: ``(videos, next_page_token)`` per page."""
+    pager = PlaylistPager(max_videos, page_token, known, record)
+    while True:
+        call = pager.next_call()
+        if call is None:
+            return
+        page_token, max_results, etag = call
+        try:
+            items_res = await api_get(
+                "playlistItems", etag,
+                part="snippet", playlistId=playlist_id, maxResults=max_results, pageToken=page_token,
+            )
+        except NotModified:
+            items_res = None
+        yield pager.received(items_res)
+
+
+async def aiter_enriched_pages(pages, max_in_flight=None):
+    """Async iter_enriched_pages: each page's durations are requested as a
+    task while the next pages are fetched; pages come out in order."""
+    max_in_flight = max_in_flight or getattr(settings, "YOUTUBE_ENRICH_WORKERS", 4) * 2
+    pending = deque()
+
+    async def finish():
+        task, videos, next_page_token = pending.popleft()
+        add_durations(videos, await task)
+        return videos, next_page_token
+
+    try:
+        async for videos, next_page_token in pages:
+            task = asyncio.ensure_future(afetch_durations(missing_durations(videos)))
+            pending.append((task, videos, next_page_token))
+            while pending and (pending[0][0].done() or len(pending) > max_in_flight):
+                yield await finish()
+
+        while pending:
+            yield await finish()
+    finally:
+        for task, _, _ in pending:
+            task.cancel()
+
+
+async def afetch_metadata(content_type, content_id, max_playlist_videos=None, etag=None):
+    """Async fetch_metadata: ``(metadata, etag)``; raises NotModified."""
+    if content_type == "video":
+        res = await api_get("videos", etag, part="snippet,contentDetails,statistics", id=content_id)
+        return video_metadata(content_id, res)
+
+    if content_type == "playlist":
+        metadata, pl_etag, _ = await afetch_playlist(content_id, max_playlist_videos)
+        return metadata, pl_etag
+
+    return {"error": "Unknown content type"}, None
+
+
+async def afetch_playlist(playlist_id, max_videos=None, previous=None):
+    """Async fetch_playlist: ``(metadata, etag, pages)``; raises NotModified."""
+    try:
+        header = await afetch_playlist_header(playlist_id, previous[1] if previous else None)
+    except NotModified:
+        header = None
+    if header and "error" in header[0]:
+        return header[0], None, []
+
+    pages = []
+    videos = []
+    known = previous_pages(previous)
+    async for page, _ in aiter_enriched_pages(aiter_playlist_pages(playlist_id, max_videos, known=known, record=pages)):
+        videos.extend(page)
+
+    return playlist_result(header, videos, pages, previous)
+
+
+async def aget_youtube_metadata(youtube_url, max_playlist_videos=None):
+    content_type, content_id = extract_id(youtube_url)
+    if not content_type or not content_id:
+        return {"error": "Invalid YouTube URL"}
+
+    try:
+        metadata, _ = await afetch_metadata(content_type, content_id, max_playlist_videos)
+        return metadata
+    except Exception as e:
+        return {"error": f"API Error: {str(e)}"}
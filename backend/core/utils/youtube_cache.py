@@ -0,0 +1,314 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.utils import timezone
+
+from ..models import YouTubeMetadataCache
+from .youtube import (
+    NotModified, extract_id, fetch_metadata, fetch_playlist, fetch_playlist_header,
+    get_youtube_metadata, iter_enriched_pages, iter_playlist_pages, known_pages, without_videos,
+)
+from .youtube_async import (
+    afetch_metadata, afetch_playlist, afetch_playlist_header, aget_youtube_metadata, aiter_enriched_pages,
+    aiter_playlist_pages,
+)
+
+DEFAULT_TTL = {"video": 24 * 60 * 60, "playlist": 60 * 60}
+
+
+def get_ttl(content_type):
+    ttls = getattr(settings, "YOUTUBE_CACHE_TTL", DEFAULT_TTL)
+    return timedelta(seconds=ttls.get(content_type, DEFAULT_TTL[content_type]))
+
+
+def get_cached_youtube_metadata(youtube_url, max_playlist_videos=None, force=False):
+    """get_youtube_metadata with a DB cache in front of it.
+
+    Fresh entries are served straight from the cache. Expired ones are
+    revalidated with If-None-Match, so unchanged content costs no quota,
+    and are served stale if the API is unreachable. A playlist is only
+    unchanged if its header and every page of its items are.
+    """
+    content_type, content_id = extract_id(youtube_url)
+
+    if not content_type or not content_id:
+        return {"error": "Invalid YouTube URL"}
+
+    # truncated playlists are never cached
+    if max_playlist_videos:
+        return get_youtube_metadata(youtube_url, max_playlist_videos)
+
+    entry = cache_entries(content_type, content_id).first()
+    now = timezone.now()
+
+    fresh = None if force else fresh_data(entry, now)
+    if fresh is not None:
+        return fresh
+
+    try:
+        data, etag, pages = revalidate(content_type, content_id, entry)
+    except NotModified:
+        entry.save(update_fields=renew(entry, now))
+        return entry.data
+    except Exception as e:
+        return stale_or_error(entry, e)
+
+    if "error" not in data:
+        store(content_type, content_id, data, etag, now, pages)
+    return data
+
+
+async def aget_cached_youtube_metadata(youtube_url, max_playlist_videos=None, force=False):
+    """get_cached_youtube_metadata with the async ORM and API client."""
+    content_type, content_id = extract_id(youtube_url)
+
+    if not content_type or not content_id:
+        return {"error": "Invalid YouTube URL"}
+
+    if max_playlist_videos:
+        return await aget_youtube_metadata(youtube_url, max_playlist_videos)
+
+    entry = await cache_entries(content_type, content_id).afirst()
+    now = timezone.now()
+
+    fresh = None if force else fresh_data(entry, now)
+    if fresh is not None:
+        return fresh
+
+    try:
+        data, etag, pages = await arevalidate(content_type, content_id, entry)
+    except NotModified:
+        await entry.asave(update_fields=renew(entry, now))
+        return entry.data
+    except Exception as e:
+        return stale_or_error(entry, e)
+
+    if "error" not in data:
+        await astore(content_type, content_id, data, etag, now, pages)
+    return data
+
+
+def cache_entries(content_type, content_id):
+    return YouTubeMetadataCache.objects.filter(content_type=content_type, content_id=content_id)
+
+
+def fresh_data(entry, now=None):
+    """The entry's data if it hasn't expired, else None."""
+    return entry.data if entry and entry.is_fresh(now) else None
+
+
+def renew(entry, now):
+    """Start a new lifetime for an entry the API confirmed unchanged; the
+    fields to save."""
+    entry.fetched_at = now
+    entry.expires_at = now + get_ttl(entry.content_type)
+    return ["fetched_at", "expires_at"]
+
+
+def stale_or_error(entry, exc):
+    """What to serve when the API call failed: the expired entry if any."""
+    if entry:
+        return entry.data
+    return {"error": f"API Error: {str(exc)}"}
+
+
+def revalidate(content_type, content_id, entry=None):
+    """Fetch the content, revalidating ``entry`` if there is one:
+    ``(data, etag, pages)``. Raises NotModified if nothing changed."""
+    if content_type == "playlist":
+        return fetch_playlist(content_id, previous=previous_fetch(entry))
+    data, etag = fetch_metadata(content_type, content_id, etag=entry.etag if entry else None)
+    return data, etag, []
+
+
+async def arevalidate(content_type, content_id, entry=None):
+    if content_type == "playlist":
+        return await afetch_playlist(content_id, previous=previous_fetch(entry))
+    data, etag = await afetch_metadata(content_type, content_id, etag=entry.etag if entry else None)
+    return data, etag, []
+
+
+def previous_fetch(entry):
+    """fetch_playlist's ``previous`` for a cached playlist."""
+    return entry and (entry.data, entry.etag, entry.page_etags)
+
+
+def store(content_type, content_id, data, etag, now=None, pages=()):
+    try:
+        YouTubeMetadataCache.objects.update_or_create(
+            content_type=content_type, content_id=content_id,
+            defaults=entry_values(content_type, data, etag, now, pages),
+        )
+    except IntegrityError:
+        # lost a race with another worker storing the same content
+        pass
+
+
+async def astore(content_type, content_id, data, etag, now=None, pages=()):
+    try:
+        await YouTubeMetadataCache.objects.aupdate_or_create(
+            content_type=content_type, content_id=content_id,
+            defaults=entry_values(content_type, data, etag, now, pages),
+        )
+    except IntegrityError:
+        pass
+
+
+def entry_values(content_type, data, etag, now=None, pages=()):
+    now = now or timezone.now()
+    return {
+        "data": data,
+        "etag": etag or "",
+        "page_etags": list(pages),
+        "fetched_at": now,
+        "expires_at": now + get_ttl(content_type),
+    }
+
+
+def iter_import_preview(youtube_url, page_token=None, max_pages=None):
+    """Import preview as a stream of events, for playlists of any size.
+
+    Yields a ``header`` event with the content's metadata (without videos),
+    then one ``page`` event per playlistItems page as it arrives, then an
+    ``end`` event. If ``max_pages`` stops the stream early, ``end`` carries
+    a ``continuation`` token to pass back as ``page_token`` later.
+    """
+    content_type, content_id = extract_id(youtube_url)
+
+    if not content_type or not content_id:
+        yield {"type": "error", "error": "Invalid YouTube URL"}
+        return
+
+    entry = cache_entries(content_type, content_id).first()
+    stream = PreviewStream(entry, page_token, max_pages)
+
+    try:
+        if content_type == "video":
+            yield from stream.video(stream.cached or get_cached_youtube_metadata(youtube_url))
+            return
+
+        if stream.known:
+            pages = cached_pages(stream.known, page_token)
+        else:
+            header, _ = fetch_playlist_header(content_id)
+            if "error" in header:
+                yield stream.error(header["error"])
+                return
+            stream.header = header
+            pages = iter_enriched_pages(iter_playlist_pages(content_id, page_token=page_token))
+
+        yield from stream.start()
+        for videos, next_page_token in pages:
+            yield stream.page(videos, next_page_token)
+            if stream.continuation:
+                break
+        pages.close()
+
+        yield stream.end()
+    except Exception as e:
+        yield stream.error(f"API Error: {str(e)}")
+
+
+async def aiter_import_preview(youtube_url, page_token=None, max_pages=None):
+    """iter_import_preview as an async generator, for the async view's
+    streaming response."""
+    content_type, content_id = extract_id(youtube_url)
+
+    if not content_type or not content_id:
+        yield {"type": "error", "error": "Invalid YouTube URL"}
+        return
+
+    entry = await cache_entries(content_type, content_id).afirst()
+    stream = PreviewStream(entry, page_token, max_pages)
+
+    try:
+        if content_type == "video":
+            for event in stream.video(stream.cached or await aget_cached_youtube_metadata(youtube_url)):
+                yield event
+            return
+
+        if stream.known:
+            pages = acached_pages(stream.known, page_token)
+        else:
+            header, _ = await afetch_playlist_header(content_id)
+            if "error" in header:
+                yield stream.error(header["error"])
+                return
+            stream.header = header
+            pages = aiter_enriched_pages(aiter_playlist_pages(content_id, page_token=page_token))
+
+        for event in stream.start():
+            yield event
+        async for videos, next_page_token in pages:
+            yield stream.page(videos, next_page_token)
+            if stream.continuation:
+                break
+        await pages.aclose()
+
+        yield stream.end()
+    except Exception as e:
+        yield stream.error(f"API Error: {str(e)}")
+
+
+class PreviewStream:
+    """The events of one import preview, for iter_import_preview and
+    aiter_import_preview, which only fetch what goes into them.
+
+    A fresh cache entry serves any page it recorded, first or continued:
+    then ``known`` holds its pages and ``header`` is set already.
+    """
+
+    def __init__(self, entry, page_token=None, max_pages=None):
+        self.cached = fresh_data(entry)
+        self.page_token = page_token
+        self.max_pages = max_pages
+        self.header = None
+        self.known = {}
+        if self.cached and entry.content_type == "playlist":
+            known = known_pages(self.cached["videos"], entry.page_etags)
+            if (page_token or "") in known:
+                self.known = known
+                self.header = without_videos(self.cached)
+        self.pages = self.fetched = 0
+        self.continuation = None
+
+    def error(self, message):
+        return {"type": "error", "error": message}
+
+    def video(self, data):
+        if "error" in data:
+            return [self.error(data["error"])]
+        return [{"type": "header", "data": data}, self.end()]
+
+    def start(self):
+        # a continued stream has had its header
+        return [] if self.page_token else [{"type": "header", "data": self.header}]
+
+    def page(self, videos, next_page_token):
+        """The page's event; sets ``continuation`` if max_pages stops the
+        stream after it."""
+        self.pages += 1
+        self.fetched += len(videos)
+        if self.max_pages and self.pages >= self.max_pages and next_page_token:
+            self.continuation = next_page_token
+        return {"type": "page", "videos": videos}
+
+    def end(self):
+        return {"type": "end", "continuation": self.continuation, "total_videos_fetched": self.fetched}
+
+
+def cached_pages(known, page_token=None):
+    """``(videos, next_page_token)`` for the cached pages from ``page_token``
+    on (see known_pages). The tokens are the API's own, so a continuation
+    still works once the entry has expired."""
+    page = known.get(page_token or "")
+    while page:
+        _, videos, next_page_token = page
+        yield videos, next_page_token
+        page = known.get(next_page_token) if next_page_token else None
+
+
+async def acached_pages(known, page_token=None):
+    for page in cached_pages(known, page_token):
+        yield page
@@ -0,0 +1,148 @@
+"""Process-wide YouTube Data API client factory.
+
+The discovery document is parsed once per process and each thread gets its
+own client built on a keep-alive ``httplib2.Http`` (which is not safe to
+share between threads), so repeat imports skip client construction and
+reuse open connections.
+"""
+import json
+import os
+import threading
+import time
+
+import httplib2
+import requests
+from django.conf import settings
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build_from_document
+
+DISCOVERY_URL = "https://www.googleapis.com/discovery/v1/apis/youtube/v3/rest"
+
+
+class ClientStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.clients_built = 0
+            self.build_seconds = 0.0
+            self.requests = 0
+            self.request_seconds = 0.0
+            self.slowest_request = 0.0
+
+    def record_build(self, seconds):
+        with self._lock:
+            self.clients_built += 1
+            self.build_seconds += seconds
+
+    def record_request(self, seconds):
+        with self._lock:
+            self.requests += 1
+            self.request_seconds += seconds
+            self.slowest_request = max(self.slowest_request, seconds)
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "clients_built": self.clients_built,
+                "build_ms_total": round(self.build_seconds * 1000, 2),
+                "requests": self.requests,
+                "request_ms_avg": round(self.request_seconds * 1000 / self.requests, 2) if self.requests else 0.0,
+                "request_ms_max": round(self.slowest_request * 1000, 2),
+            }
+
+
+stats = ClientStats()
+
+
+class TimedHttp(httplib2.Http):
+    """httplib2.Http that reports how long each API call took."""
+
+    def request(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().request(*args, **kwargs)
+        finally:
+            stats.record_request(time.perf_counter() - start)
+
+
+def get_api_key():
+    key = getattr(settings, "YOUTUBE_API_KEY", None) or os.environ.get("YOUTUBE_API_KEY")
+    if key:
+        return key
+    from .apikey import youtubekey
+    return youtubekey
+
+
+_discovery_doc = None
+_doc_lock = threading.Lock()
+
+
+def load_discovery_document():
+    """Parsed youtube/v3 discovery document, loaded once per process.
+
+    Prefers ``YOUTUBE_DISCOVERY_DOCUMENT`` on disk, then the copy bundled with
+    google-api-python-client, and only as a last resort downloads it (saving
+    it to ``YOUTUBE_DISCOVERY_DOCUMENT`` for next time).
+    """
+    global _discovery_doc
+    if _discovery_doc is not None:
+        return _discovery_doc
+
+    with _doc_lock:
+        if _discovery_doc is None:
+            path = getattr(settings, "YOUTUBE_DISCOVERY_DOCUMENT", None)
+            content = None
+            if path and os.path.exists(path):
+                with open(path) as f:
+                    content = f.read()
+            if content is None:
+                content = discovery_cache.get_static_doc("youtube", "v3")
+            if content is None:
+                res = requests.get(DISCOVERY_URL, timeout=10)
+                res.raise_for_status()
+                content = res.text
+                if path:
+                    with open(path, "w") as f:
+                        f.write(content)
+            _discovery_doc = json.loads(content)
+    return _discovery_doc
+
+
+_local = threading.local()
+_generation = 0
+
+
+def build_client(root_url=None, api_key=None, timeout=None):
+    start = time.perf_counter()
+    root_url = root_url or getattr(settings, "YOUTUBE_API_ROOT_URL", None)
+    http = TimedHttp(timeout=timeout or getattr(settings, "YOUTUBE_HTTP_TIMEOUT", 30))
+    client = build_from_document(
+        load_discovery_document(),
+        http=http,
+        developerKey=api_key or get_api_key(),
+        client_options={"api_endpoint": root_url} if root_url else None,
+    )
+    stats.record_build(time.perf_counter() - start)
+    return client
+
+
+def get_youtube_client():
+    """The calling thread's YouTube client, built on first use."""
+    if getattr(_local, "generation", None) != _generation:
+        _local.client = build_client()
+        _local.generation = _generation
+    return _local.client
+
+
+def reset_youtube_clients():
+    """Make every thread rebuild its client, e.g. after changing settings."""
+    global _generation
+    _generation += 1
+
+
+def warm_youtube_client():
+    load_discovery_document()
+    get_youtube_client()
@@ -1,352 +1,464 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
-from .models import UserProfile , Playlist , Video , UserActivityLog , Certificate , Quiz
+from .pagination import BodyPageNumberPagination, paginate_keyset, paginate_slice
+from .models import UserProfile , Playlist , Video , Certificate , Quiz , ImportJob
 from rest_framework import status
-from .serializers import UserProfileSerializer , VideoSerializer , PlaylistSerializer , CertificateSerializer, QuizSerializer
-from .utils.firebase import verify_firebase_token
-from .utils.youtube import get_youtube_metadata
-from .utils.quiz_generator import generate_quiz
+from .serializers import UserProfileSerializer , VideoSerializer , CertificateSerializer, QuizSerializer, ImportJobSerializer, VIDEO_LIST, PLAYLIST_LIST
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from .utils.youtube_cache import aget_cached_youtube_metadata, aiter_import_preview, get_cached_youtube_metadata, iter_import_preview
+from .async_api import AsyncAPIView
+from .utils.quiz_cache import QuizGenerationUnavailable, get_question_set
+from .utils.import_jobs import enqueue_playlist_import
+from .utils.library import delete_video, is_valid_idempotency_key, mark_video_completed, run_idempotent, save_playlist, upsert_youtube_videos
+from .utils.search import order_by_ids, search_library
+from .utils.activity import activity_graph, local_day_start, parse_timezone, record_activity
+from .utils.xp import award_xp
+from .utils.leaderboard import GLOBAL, get_leaderboard, weekly_board
+from .utils.certificates import download_url, pdf_path, queue_render, render_now
+from .utils.downloads import etag_matches, file_response
+from .utils.verification import get_verification
+from .utils.versions import ACTIVITY, CERTIFICATES, LIBRARY, PROFILE, bump_version, conditional_get
+from django.db import transaction
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from asgiref.sync import sync_to_async
 from django.utils import timezone
-from datetime import timedelta
-from datetime import datetime
+from datetime import date
+import json
 
 
 class FirebaseAuthView(APIView):
-    def post(self , request):
-        id_token = request.data.get('idToken')
+    permission_classes = [IsAuthenticated]
 
-        if not id_token:
-            return Response({"error": "No token provided"} , status=400)
-        
-        decoded = verify_firebase_token(id_token)
+    def post(self , request):
+        decoded = request.auth
         uid = decoded['uid']
         email = decoded.get('email')
         name = decoded.get('name' , 'No name')
         picture = decoded.get('picture' , '')
 
+        tz = request.data.get('timezone')
+        tz = tz if parse_timezone(tz) else None
+
         user , created = UserProfile.objects.get_or_create(
             uid=uid , 
-            defaults={'email':email , 'name':name ,'profile_pic':picture}
+            defaults={'email':email , 'name':name ,'profile_pic':picture , 'timezone':tz or 'UTC'}
         )
 
+        # clients send their IANA zone so activity days match their calendar
+        if tz and user.timezone != tz:
+            user.timezone = tz
+            user.save(update_fields=['timezone'])
+
         serializer = UserProfileSerializer(user)
         return Response(serializer.data , status=200)
 
+# most pages one streamed preview request may ask for (50 videos each)
+MAX_PREVIEW_PAGES = 100
+
+def parse_stream_params(data):
+    """``(pageToken, maxPages)`` of a streamed preview request, checked
+    before the stream starts. maxPages is bounded to MAX_PREVIEW_PAGES;
+    raises TypeError or ValueError if either is malformed."""
+    page_token = data.get("pageToken") or None
+    if page_token is not None and not isinstance(page_token, str):
+        raise TypeError("pageToken must be a string")
+
+    max_pages = data.get("maxPages")
+    if max_pages in (None, ""):
+        return page_token, None
+    if isinstance(max_pages, bool):
+        raise TypeError("maxPages must be an integer")
+    max_pages = int(max_pages)
+    if max_pages < 1:
+        raise ValueError("maxPages must be at least 1")
+    return page_token, min(max_pages, MAX_PREVIEW_PAGES)
+
 class ImportYoutubeView(APIView):
     def post(self , request):
-        id_token = request.data.get("idToken")
         youtube_url = request.data.get("url")
 
-        if not id_token or not youtube_url:
-            return Response({"error":"Missing token or url"} , status=400)
-        
-        try:
-            decoded_token = verify_firebase_token(id_token)
-            uid = decoded_token['uid']
-        except Exception as e:
-            return Response({"error":"Invalid token"} , status=401)
+        if not youtube_url:
+            return Response({"error":"Missing url"} , status=400)
         
-        try:
-            user = UserProfile.objects.get(uid=uid)
-        except UserProfile.DoesNotExist:
-            return Response({"error":"User not found"} , status=404)
-        
-        metadata = get_youtube_metadata(youtube_url)
+        if request.data.get("stream"):
+            try:
+                page_token, max_pages = parse_stream_params(request.data)
+            except (TypeError, ValueError):
+                return Response({"error": "Invalid pageToken or maxPages"}, status=400)
+            return self.stream(youtube_url, page_token, max_pages)
+
+        metadata = get_cached_youtube_metadata(youtube_url)
 
         if "error" in metadata:
             return Response(metadata , status=400)
         
         return Response({"success":True , "data":metadata} ,status=200)
+
+    def stream(self, youtube_url, page_token=None, max_pages=None):
+        """NDJSON preview: a header line, then one line per page of videos
+        as it arrives, then an end line (with a continuation token if
+        maxPages cut the playlist short)."""
+        events = iter_import_preview(youtube_url, page_token, max_pages)
+        response = StreamingHttpResponse(
+            (json.dumps(event) + "\n" for event in events),
+            content_type="application/x-ndjson",
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
     
 class SaveLearningView(APIView):
     def post(self ,request):
-        idToken = request.data.get("idToken")
         data = request.data.get("data")
+        user_id = request.user.profile_id
 
-        if not idToken or not data:
-            return Response({"error":"Missing idtoken or data"} ,status=404)
-        
-        try:
-            decoded = verify_firebase_token(idToken)
-            uid = decoded['uid']
-            user  = UserProfile.objects.get(uid=uid)
-        except:
-            return Response({"error":"Invalid or missing user"})
+        if not data:
+            return Response({"error":"Missing data"} ,status=404)
         
+        # retries with the same key get the first response back
+        key = request.headers.get("Idempotency-Key") or request.data.get("idempotencyKey")
+        if key and not is_valid_idempotency_key(key):
+            return Response({"error": "Invalid Idempotency-Key"}, status=400)
+        body, status_code = run_idempotent(user_id, key, lambda: self.save(request, user_id, data))
+        return Response(body, status=status_code)
+
+    def save(self, request, user_id, data):
         content_type = data.get("type")
         if content_type == "video":
             vid = data["id"]
-            if Video.objects.filter(user=user , vid=vid).exists():
-                return Response({"message":"You have already saved this before"})
+            if Video.objects.filter(user_id=user_id , youtube_id=vid).exists():
+                return {"message":"You have already saved this before"}, 200
             
-            video = Video.objects.create(
-                user=user,
-                vid=vid,
-                name=data["title"],
-                url = data["url"],
-                imported_at = timezone.now(),
-                description = data["description"],
-            )
+            with transaction.atomic():
+                upsert_youtube_videos([{"video_id": vid, **data}])
+                video = Video.objects.create(
+                    user_id=user_id,
+                    youtube_id=vid,
+                    imported_at = timezone.now(),
+                )
+                bump_version(user_id, LIBRARY)
 
-            activity = UserActivityLog.objects.create(
-                user = user,
-                activity_type = "Learning Import",
-            )
+                record_activity(user_id, "Learning Import")
 
-            return Response({"message":"Congo!! You have showed your dedication towards learning"})
+            return {"message":"Congo!! You have showed your dedication towards learning"}, 200
         
         elif content_type == "playlist":
             pid = data["id"]
 
-            if Playlist.objects.filter(user=user, pid=pid).exists():
-                return Response({"message": "Playlist already saved"}, status=200)
+            if Playlist.objects.filter(user_id=user_id, youtube_id=pid).exists():
+                return {"message": "Playlist already saved"}, 200
 
-            # create playlist
-            playlist = Playlist.objects.create(
-                user=user,
-                pid=pid,
-                name=data["title"],
-                url=data["url"],
-                thumbnail=data["thumbnail"],
-            )
+            # big playlists: let the import worker page through it instead
+            if request.data.get("background"):
+                job = enqueue_playlist_import(user_id, pid)
+                return {"message": "Playlist import queued", "job": ImportJobSerializer(job).data}, 202
 
-            for v in data.get("videos", []):
-                Video.objects.update_or_create(
-                    user=user,
-                    vid=v["video_id"],
-                    defaults={
-                        'name': v["title"],
-                        'url': v["url"],
-                        'playlist': playlist,
-                        'imported_at': timezone.now(),
-                        'description': v.get("description", ""),
-                        'watch_progress': 0.0,
-                        'is_completed': False
-                    }
-                )
-            
-            activity = UserActivityLog.objects.create(
-                user = user,
-                activity_type = "Learning Import",
-            )
+            # playlist, videos and activity in one transaction
+            save_playlist(user_id, data)
 
-            return Response({"message": "Playlist and videos saved"}, status=201)
+            return {"message": "Playlist and videos saved"}, 201
 
-        return Response({"error": "Invalid content type"}, status=400)
+        return {"error": "Invalid content type"}, 400
 
-class ContinueWatchingView(APIView):
-    def post(self , request):
-        idToken = request.data.get("idToken")
+# async twins of the endpoints that wait on Firebase, YouTube or slow
+# writes; under ASGI they hold no worker thread while they wait
 
-        if not idToken:
-            return Response({"error":"Missing id token"} , status=404)
-        
+class AsyncFirebaseAuthView(AsyncAPIView):
+    require_profile = False
+
+    async def post(self, request):
+        decoded = request.auth
+        uid = decoded['uid']
+        email = decoded.get('email')
+        name = decoded.get('name' , 'No name')
+        picture = decoded.get('picture' , '')
+
+        tz = request.data.get('timezone')
+        tz = tz if parse_timezone(tz) else None
+
+        user , created = await UserProfile.objects.aget_or_create(
+            uid=uid ,
+            defaults={'email':email , 'name':name ,'profile_pic':picture , 'timezone':tz or 'UTC'}
+        )
+
+        if tz and user.timezone != tz:
+            user.timezone = tz
+            await user.asave(update_fields=['timezone'])
+
+        return JsonResponse(UserProfileSerializer(user).data, status=200)
+
+class AsyncImportYoutubeView(AsyncAPIView):
+    async def post(self, request):
+        youtube_url = request.data.get("url")
+
+        if not youtube_url:
+            return JsonResponse({"error":"Missing url"} , status=400)
+
+        if request.data.get("stream"):
+            try:
+                page_token, max_pages = parse_stream_params(request.data)
+            except (TypeError, ValueError):
+                return JsonResponse({"error": "Invalid pageToken or maxPages"}, status=400)
+            return self.stream(youtube_url, page_token, max_pages)
+
+        metadata = await aget_cached_youtube_metadata(youtube_url)
+
+        if "error" in metadata:
+            return JsonResponse(metadata , status=400)
+
+        return JsonResponse({"success":True , "data":metadata} ,status=200)
+
+    def stream(self, youtube_url, page_token=None, max_pages=None):
+        async def lines():
+            async for event in aiter_import_preview(youtube_url, page_token, max_pages):
+                yield json.dumps(event) + "\n"
+
+        response = StreamingHttpResponse(lines(), content_type="application/x-ndjson")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+class AsyncSaveLearningView(AsyncAPIView):
+    async def post(self, request):
+        data = request.data.get("data")
+        user_id = request.user.profile_id
+
+        if not data:
+            return JsonResponse({"error":"Missing data"} ,status=404)
+
+        # the async ORM has no transactions, so the save (one transaction
+        # with its idempotency record) runs in one thread hop
+        key = request.headers.get("Idempotency-Key") or request.data.get("idempotencyKey")
+        if key and not is_valid_idempotency_key(key):
+            return JsonResponse({"error": "Invalid Idempotency-Key"}, status=400)
+        save = lambda: SaveLearningView().save(request, user_id, data)
+        body, status_code = await sync_to_async(run_idempotent)(user_id, key, save)
+        return JsonResponse(body, status=status_code)
+
+class ImportJobStatusView(APIView):
+    def get(self, request, job_id):
         try:
-            uinfo = verify_firebase_token(idToken)
-            uid = uinfo["uid"]
-        except:
-            return Response({"error" , "Invalid token"} , status=401)
-        
-        videos = Video.objects.filter(user__uid=uid , is_completed=False).order_by('-imported_at')[:3]
-        video_serializer = VideoSerializer(videos , many=True)
-        return Response({"videos":video_serializer.data})
+            job = ImportJob.objects.get(id=job_id, user_id=request.user.profile_id)
+        except ImportJob.DoesNotExist:
+            return Response({"error": "Import job not found"}, status=404)
+
+        return Response(ImportJobSerializer(job).data)
+
+    def post(self, request, job_id):
+        return self.get(request, job_id)
+
+# GET variants of the read endpoints authenticate with the Authorization
+# header and answer If-None-Match / If-Modified-Since from per-user version
+# stamps (core.utils.versions) before running any query for the data
+
+class ContinueWatchingView(APIView):
+    def get(self, request):
+        return conditional_get(request, [LIBRARY], lambda: self.post(request))
 
-class CompletedVideos(APIView):
     def post(self , request):
-        idToken = request.data.get("idToken")
+        videos = Video.objects.filter(user_id=request.user.profile_id , is_completed=False).order_by('-imported_at')[:3]
+        return Response({"videos":VIDEO_LIST.data(videos)})
 
-        if not idToken:
-            return Response({"error" : "Missing ID token"} , status=404)
-        
-        try:
-            decoded = verify_firebase_token(idToken)
-            uid = decoded['uid']
-            user  = UserProfile.objects.get(uid=uid)
-        except:
-            return Response({"error":"Invalid or missing user"})
-        
-        videos = Video.objects.filter(user__uid=uid , is_completed=True)[:3]
-        video_serializer = VideoSerializer(videos , many=True)
+class CompletedVideos(APIView):
+    def get(self, request):
+        return conditional_get(request, [LIBRARY], lambda: self.post(request))
 
-        playlists = Playlist.objects.filter(user__uid=uid)
-        completed_playlists = []
-        for pl in playlists:
-            videos_in_pl = Video.objects.filter(playlist=pl)
-            if videos_in_pl.exists() and all(v.is_completed for v in videos_in_pl):
-                completed_playlists.append(pl)
+    def post(self , request):
+        user_id = request.user.profile_id
 
-        pl_serializer = PlaylistSerializer(completed_playlists , many=True)
+        videos = Video.objects.filter(user_id=user_id , is_completed=True)[:3]
+
+        completed_playlists = Playlist.objects.filter(user_id=user_id).completed()
 
         return Response({
-            "videos" : video_serializer.data,
-            "playlists" : pl_serializer.data
+            "videos" : VIDEO_LIST.data(videos),
+            "playlists" : PLAYLIST_LIST.data(completed_playlists)
         })
         
 class ProfileInfoView(APIView):
+    def get(self, request):
+        # the streak shown lapses at the user's midnight
+        return conditional_get(request, [PROFILE], lambda: self.post(request),
+                               since=local_day_start(request.user.profile_id))
+
     def post(self, request):
-        id_token = request.data.get("idToken")
-        try:
-            decoded = verify_firebase_token(id_token)
-            uid = decoded["uid"]
-        except:
-            return Response({"error": "Invalid token"}, status=401)
-    
-        try:
-            user = UserProfile.objects.get(uid=uid)
-        except UserProfile.DoesNotExist:
+        user = request.user.profile
+        if user is None:
             return Response({"error":"User not found"} , status=404)
         
         user_serializer = UserProfileSerializer(user)
         return Response(user_serializer.data)
     
 class UserActivityGraphView(APIView):
+    MAX_DAYS = 366
+
+    def get(self, request):
+        # "today" moves at the user's midnight even if nothing else changed
+        return conditional_get(request, [ACTIVITY], lambda: self.graph(request, request.query_params),
+                               since=local_day_start(request.user.profile_id))
+
     def post(self, request):
-        id_token = request.data.get('idToken')
+        return self.graph(request, request.data)
 
-        if not id_token:
-            return Response({"error":"Missing Token"} ,status = 400)
-        
+    def graph(self, request, params):
+        user_id = request.user.profile_id
+
+        # activity per local day for the last `days` days (14 by default,
+        # up to a year for the heatmap), ending today or at endDate
         try:
-            decoded = verify_firebase_token(id_token)
-            uid = decoded["uid"]
-            user = UserProfile.objects.get(uid = uid)
-        except:
-            return Response({"error":"Invalid user"} ,status = 401)
+            days = min(max(int(params.get("days", 14)), 1), self.MAX_DAYS)
+            end = params.get("endDate")
+            end = date.fromisoformat(end) if end else None
+        except (TypeError, ValueError):
+            return Response({"error": "Invalid days or endDate"}, status=400)
 
+        return Response({"graph": activity_graph(user_id, days, end)}, status=200)
+    
+class LeaderboardView(APIView):
+    MAX_LIMIT = 100
 
-        #Prepare activity streak for last 14 days
-        today = timezone.now().date()
-        streak_data = []
+    def post(self, request):
+        user_id = request.user.profile_id
 
-        for i in range(13 , -1 , -1):
-            date = today - timedelta(days=i)
-            start = timezone.make_aware(datetime.combine(date , datetime.min.time()))
-            end = timezone.make_aware(datetime.combine(date , datetime.max.time()))
+        period = request.data.get("period", "global")
+        if period not in ("global", "weekly"):
+            return Response({"error": "period must be global or weekly"}, status=400)
+        try:
+            limit = min(max(int(request.data.get("limit", 10)), 1), self.MAX_LIMIT)
+        except (TypeError, ValueError):
+            return Response({"error": "Invalid limit"}, status=400)
 
-            count = UserActivityLog.objects.filter(user=user,timestamp__range=(start , end)).count()
-            streak_data.append({
-                "date": date.strftime("%Y-%m-%d"),
-                "activity_count": count
-            })
+        board = GLOBAL if period == "global" else weekly_board()
+        leaderboard = get_leaderboard()
+        top = leaderboard.top(board, limit)
+        you = leaderboard.rank(board, user_id)
+
+        profiles = UserProfile.objects.in_bulk([uid for uid, _ in top])
+        return Response({
+            "period": period,
+            "top": [{
+                "rank": rank,
+                "name": profiles[uid].name,
+                "profile_pic": profiles[uid].profile_pic,
+                "xp": score,
+            } for rank, (uid, score) in enumerate(top, 1) if uid in profiles],
+            "you": {"rank": you[0], "xp": you[1]} if you else None,
+        }, status=200)
 
-        return Response({"graph":streak_data} ,status=200)
-    
 class MyLearningsView(APIView):
+    def get(self, request):
+        return conditional_get(request, [LIBRARY], lambda: self.learnings(request, request.query_params))
+
     def post(self , request):
-        id_token = request.data.get("idToken")
-        page = request.data.get("page" , 1)
-        page_size = request.data.get("page_size" , 10)
-        search_query = request.data.get("searchQuery", "")
+        return self.learnings(request, request.data)
 
-        if not id_token:
-            return Response({"error" : "Missing Token"} , status=400)
-        
-        try:
-            decoded = verify_firebase_token(id_token)
-            uid = decoded["uid"]
-            user = UserProfile.objects.get(uid = uid)
-        except:
-            return Response({"error" : "Invalid or missing user"})
+    MAX_PAGE_SIZE = 100
 
-        # Force page param into request.GET for paginator
-        request._request.GET = request._request.GET.copy()
-        request._request.GET['page'] = str(page)
+    def learnings(self, request, params):
+        try:
+            page = max(int(params.get("page" , 1)), 1)
+            page_size = min(max(int(params.get("page_size" , 10)), 1), self.MAX_PAGE_SIZE)
+            playlist_page = max(int(params.get("playlist_page", 1)), 1)
+            # playlists are only paged when the client asks for it
+            if "playlist_page" in params or "playlist_page_size" in params:
+                playlist_page_size = min(max(int(params.get("playlist_page_size", 20)), 1), self.MAX_PAGE_SIZE)
+            else:
+                playlist_page_size = None
+        except (TypeError, ValueError):
+            return Response({"error": "page, page_size, playlist_page and playlist_page_size must be integers"}, status=400)
+        cursor = params.get("cursor")
+        search_query = params.get("searchQuery", "")
+        user_id = request.user.profile_id
 
         # Paginated Videos
-        videos = Video.objects.filter(user = user).order_by('-imported_at')
-        playlists = Playlist.objects.filter(user = user).order_by('-id')
+        videos = Video.objects.filter(user_id = user_id).order_by('-imported_at', '-id')
+        playlists = Playlist.objects.filter(user_id = user_id).order_by('-id')
 
+        # ranked by relevance; cursor mode keeps its newest-first order
         if search_query:
-            videos = videos.filter(name__icontains=search_query)
-            playlists = playlists.filter(name__icontains=search_query)
-
-        paginator = PageNumberPagination()
-        paginator.page_size = page_size
-        paginated_videos = paginator.paginate_queryset(videos , request)
-        video_serializer = VideoSerializer(paginated_videos , many=True)
-        paginated_video_response = paginator.get_paginated_response(video_serializer.data).data
-        
-        playlists_data = []
-        for pl in playlists:
-            pl_videos = Video.objects.filter(playlist = pl)
-            pl_video_serializer = VideoSerializer(pl_videos , many=True)
-            pl_data = PlaylistSerializer(pl).data
-            pl_data["videos"] = pl_video_serializer.data
-            playlists_data.append(pl_data)
+            video_ids, playlist_ids = search_library(user_id, search_query)
+            videos = order_by_ids(videos, video_ids)
+            playlists = order_by_ids(playlists, playlist_ids)
+
+        # cursor mode (send "cursor": null for the first page): keyset
+        # pagination over (imported_at, id), no COUNT, same cost at any depth
+        if "cursor" in params:
+            page_videos, next_cursor = paginate_keyset(VIDEO_LIST.values(videos), cursor, page_size)
+            paginated_video_response = {
+                "next": next_cursor,
+                "previous": None,
+                "results": VIDEO_LIST.dicts(page_videos),
+            }
+        else:
+            paginator = BodyPageNumberPagination(page, page_size)
+            paginated_videos = paginator.paginate_queryset(VIDEO_LIST.values(videos) , request)
+            paginated_video_response = paginator.get_paginated_response(VIDEO_LIST.dicts(paginated_videos)).data
+        
+        # one query for the page of playlists, one for all of their videos
+        page_playlists, has_next_playlists = paginate_slice(PLAYLIST_LIST.values(playlists), playlist_page, playlist_page_size)
+        playlists_data = PLAYLIST_LIST.dicts(page_playlists)
+        playlist_videos = {pl["id"]: [] for pl in playlists_data}
+        for video in VIDEO_LIST.values(Video.objects.filter(playlist_id__in=playlist_videos).order_by("id")):
+            playlist_videos[video.playlist].append(video)
+        for pl_data in playlists_data:
+            pl_data["videos"] = VIDEO_LIST.dicts(playlist_videos[pl_data["id"]])
 
         return Response({
             "videos" : paginated_video_response,
-            "playlists" : playlists_data
+            "playlists" : playlists_data,
+            "playlist_pagination" : {
+                "page": playlist_page,
+                "next": playlist_page + 1 if has_next_playlists else None,
+                "previous": playlist_page - 1 if playlist_page > 1 else None,
+            },
         } , status = 200)
     
 class CertificateView(APIView):
-    def post(self , request):
-        id_token = request.data.get("idToken")
-
-        if not id_token:
-            return Response({"error":"Missing idToken"} , status=401)
-        
-        try:
-            decoded = verify_firebase_token(id_token)
-            uid = decoded["uid"]
-            user = UserProfile.objects.get(uid = uid)
-        except:
-            return Response({"error" : "Invalid or missing user"} , status = 404)
-        
+    def get(self, request):
+        return conditional_get(request, [CERTIFICATES], lambda: self.post(request))
 
-        certificates = Certificate.objects.filter(user = user).order_by("-issued_at")
+    def post(self , request):
+        certificates = Certificate.objects.filter(user_id = request.user.profile_id).order_by("-issued_at")
         certificate_serializer = CertificateSerializer(certificates , many=True)
 
         return Response(certificate_serializer.data , status=200)
     
 class QuizListView(APIView):
-    def post(self, request):
-        id_token = request.data.get("idToken")
-        if not id_token:
-            return Response({"error": "Missing idToken"}, status=400)
+    def get(self, request):
+        return conditional_get(request, [LIBRARY], lambda: self.post(request))
 
-        try:
-            decoded = verify_firebase_token(id_token)
-            uid = decoded["uid"]
-            user = UserProfile.objects.get(uid=uid)
-        except UserProfile.DoesNotExist:
-            return Response({"error": "User not found"}, status=404)
+    def post(self, request):
+        user_id = request.user.profile_id
 
-        videos = Video.objects.filter(user=user, playlist__isnull=True, is_completed=True)
+        videos = Video.objects.filter(user_id=user_id, playlist__isnull=True, is_completed=True)
 
-        playlists = []
-        for pl in Playlist.objects.filter(user=user):
-            total = pl.video_set.count()
-            completed = pl.video_set.filter(is_completed=True).count()
-            if total > 0 and completed == total:
-                playlists.append(pl)
+        playlists = Playlist.objects.filter(user_id=user_id).completed()
 
         return Response({
-            "videos" : VideoSerializer(videos, many=True).data,
-            "playlists" : PlaylistSerializer(playlists, many=True).data
+            "videos" : VIDEO_LIST.data(videos),
+            "playlists" : PLAYLIST_LIST.data(playlists)
         })
     
+def playlist_quiz_source(playlist, max_videos=50):
+    """Title and description to build a playlist's quiz from: its name, and
+    the titles and descriptions of its first videos."""
+    videos = Video.objects.filter(playlist=playlist).order_by('id').values_list('youtube__name', 'youtube__description')[:max_videos]
+    return playlist.youtube.name, "\n".join(f"{name}.\n{description or ''}" for name, description in videos)
+
 class StartQuizView(APIView):
     def post(self, request):
-        id_token = request.data.get("idToken")
         vid = pid = None
         type = request.data.get("contentType")
         if type == "video":
             vid = request.data.get("contentId")
         else :
             pid = request.data.get("contentId")
-        print(f"{vid} - {pid}")
 
-        if not id_token or not (vid or pid):
-            return Response({"error": "Missing idToken or videoId"}, status=400)
+        if not (vid or pid):
+            return Response({"error": "Missing videoId"}, status=400)
 
-        try:
-            decoded = verify_firebase_token(id_token)
-            uid = decoded["uid"]
-            user = UserProfile.objects.get(uid=uid)
-        except UserProfile.DoesNotExist:
-            return Response({"error": "User not found"}, status=404)
+        user_id = request.user.profile_id
 
         if not (vid or pid):
             return Response({"error":"Need a video or a playlist to work with"})
@@ -354,33 +466,35 @@ class StartQuizView(APIView):
         target = None
         if vid:
             try:
-                target = Video.objects.get(user=user, vid=vid)
+                target = Video.objects.get(user_id=user_id, youtube_id=vid)
             except Video.DoesNotExist:
                 return Response({"error": "Video not found"}, status=404)
         elif pid:
             try:
-                target = Playlist.objects.get(user=user, pid=pid)
+                target = Playlist.objects.get(user_id=user_id, youtube_id=pid)
             except Playlist.DoesNotExist:
                 return Response({"error": "Playlist not found"}, status=404)
             
 
-        title = target.name if target else "Quiz"
-        desc = getattr(target, 'description', 'No description available')
-
-        questions = generate_quiz(title, desc)
+        # questions are generated once per YouTube video/playlist and shared
+        try:
+            if vid:
+                question_set = get_question_set("video", vid, lambda: (target.youtube.name, target.youtube.description or ""))
+            else:
+                question_set = get_question_set("playlist", pid, lambda: playlist_quiz_source(target), count=10)
+        except QuizGenerationUnavailable:
+            return Response({"error": "Quiz is still being generated, try again shortly"}, status=503, headers={"Retry-After": "5"})
+        questions = question_set.questions
 
         quiz = Quiz.objects.create(
-            user = user,
+            user_id = user_id,
             video = target if vid else None,
             playlist = target if pid else None,
-            questions = questions,
+            question_set_id = question_set.pk,
             attempted_at = timezone.now()
         )
 
-        activity = UserActivityLog.objects.create(
-            user = user,
-            activity_type = "Quiz Started" if vid else "Playlist Quiz Started"
-        )
+        record_activity(user_id, "Quiz Started" if vid else "Playlist Quiz Started")
 
         return Response({
             "quiz" : {
@@ -392,66 +506,58 @@ class StartQuizView(APIView):
 
 class SubmitQuizView(APIView):
     def post(self,request):
-        id_token = request.data.get("idToken")
         quiz_id = request.data.get("quizId")
         answers = request.data.get("answers")
 
-        if not id_token or not quiz_id or not answers:
-            return Response({"error": "Missing idToken, quizId or answers"}, status=400)
+        if not quiz_id or not answers:
+            return Response({"error": "Missing quizId or answers"}, status=400)
 
-        try:
-            decoded = verify_firebase_token(id_token)
-            uid = decoded["uid"]
-            user = UserProfile.objects.get(uid=uid)
-        except UserProfile.DoesNotExist:
-            return Response({"error": "User not found"}, status=404)
+        user = request.user.profile
 
         try:
-            quiz = Quiz.objects.get(id=quiz_id, user=user)
+            quiz = Quiz.objects.select_related('question_set', 'video__youtube', 'playlist__youtube').get(id=quiz_id, user=user)
         except Quiz.DoesNotExist:
             return Response({"error": "Quiz not found"}, status=404)
 
+        questions = quiz.get_questions()
         score = 0
-        for i, question in enumerate(quiz.questions):
+        for i, question in enumerate(questions):
             if answers[i] == question['answer']:
                 score += 1
 
-        score = round((score / len(quiz.questions)) * 100, 2)
+        score = round((score / len(questions)) * 100, 2)
         passed = score >= 50
+        certificate_url = None
 
         quiz.score = score
         quiz.passed = passed
         quiz.save()
 
-        activity = UserActivityLog.objects.create(
-            user = user,
-            activity_type = "Quiz Submitted" if quiz.video else "Playlist Quiz Submitted"
-        )
+        record_activity(user.id, "Quiz Submitted" if quiz.video else "Playlist Quiz Submitted")
 
         if passed:
 
             if quiz.playlist:
                 video_count = quiz.playlist.video_set.count()
-                user.xp += video_count * 5  # Example XP for passing a playlist quiz
-                user.level = (user.xp // 100) + 1  # Example level calculation
+                award_xp(user.id, video_count * 5, "Playlist Quiz Passed")  # Example XP for passing a playlist quiz
             else:
-                user.xp += 10  # Example XP for passing a video quiz
-                user.level = (user.xp // 100) + 1  # Example level calculation
-            user.save()
+                award_xp(user.id, 10, "Quiz Passed")  # Example XP for passing a video quiz
 
-            cert = Certificate.objects.create(
+            source = quiz.video or quiz.playlist
+            cert = Certificate(
                 user=user,
                 video = quiz.video,
                 playlist = quiz.playlist,
-                download_url=f"/media/certificates/{quiz.id}.pdf",  # Placeholder URL
+                title = source.youtube.name if source else "",
                 issued_at=timezone.now()
             )
+            # the PDF is rendered after commit; until then this URL renders on demand
+            cert.download_url = download_url(cert.certificate_id)
+            cert.save()
+            queue_render(cert)
             certificate_url = cert.download_url
 
-            activity = UserActivityLog.objects.create(
-                user = user,
-                activity_type = "Certificate Issued" if quiz.video else "Playlist Certificate Issued"
-            )
+            record_activity(user.id, "Certificate Issued" if quiz.video else "Playlist Certificate Issued")
 
         return Response({
             "score": score,
@@ -459,23 +565,65 @@ class SubmitQuizView(APIView):
             "certificate_url":certificate_url
         }, status=200)
     
+class CertificatePdfView(APIView):
+    # public: the certificate id is unguessable and the PDF is meant to be shared
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request, certificate_id):
+        row = Certificate.objects.filter(certificate_id=certificate_id).values_list("pdf_sha256", "revoked_at").first()
+        if row is None:
+            return Response({"error": "Certificate not found"}, status=404)
+        digest, revoked_at = row
+        if revoked_at:
+            return Response({"error": "Certificate revoked"}, status=410)
+
+        if not digest or not pdf_path(digest).exists():
+            digest = render_now(certificate_id)
+            if digest is None:
+                # deleted since the lookup above
+                return Response({"error": "Certificate not found"}, status=404)
+
+        # a URL carrying the current hash never changes content
+        if request.GET.get("v") == digest[:16]:
+            cache_control = "public, max-age=31536000, immutable"
+        else:
+            cache_control = "public, max-age=300"
+        return file_response(request, pdf_path(digest), digest, "application/pdf", cache_control,
+                             filename=f"certificate-{certificate_id}.pdf")
+
+class CertificateVerifyView(APIView):
+    # public and cached: repeat hits never reach the database
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request, certificate_id):
+        verification = get_verification(certificate_id)
+        if verification is None:
+            return Response({"error": "Certificate not found"}, status=404)
+
+        body, etag = verification
+        etag = f'"{etag}"'
+        if etag_matches(request.headers.get("If-None-Match"), etag):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(body, content_type="application/json")
+        response["ETag"] = etag
+        # kept short so shared caches pick up a revocation quickly
+        response["Cache-Control"] = f"public, max-age={getattr(settings, 'CERTIFICATE_VERIFICATION_MAX_AGE', 60)}"
+        return response
+
 class ClassroomView(APIView):
     def post(self, request):
-        id_token = request.data.get("idToken")
         vid = request.data.get("videoId")
 
-        if not id_token or not vid:
-            return Response({"error":"Missing idToken or videoId"}, status=400)
+        if not vid:
+            return Response({"error":"Missing videoId"}, status=400)
         
-        try:
-            decoded = verify_firebase_token(id_token)
-            uid = decoded["uid"]
-            user = UserProfile.objects.get(uid=uid)
-        except UserProfile.DoesNotExist:
-            return Response({"error": "User not found"}, status=404)
+        user_id = request.user.profile_id
         
         try:
-            video = Video.objects.select_related('playlist').get(user=user , vid=vid)
+            video = Video.objects.select_related('youtube', 'playlist__youtube').get(user_id=user_id , youtube_id=vid)
         except Video.DoesNotExist:
             return Response({"error":"Video Not found"}, status=404)
         
@@ -483,16 +631,13 @@ class ClassroomView(APIView):
         
         playlist_data = None
         if video.playlist:
-            playlist_videos = Video.objects.filter(user=user, playlist=video.playlist)
+            playlist_videos = Video.objects.filter(user_id=user_id, playlist=video.playlist)
             playlist_data = {
-                "name" : video.playlist.name,
-                "videos" : VideoSerializer(playlist_videos, many=True).data,
+                "name" : video.playlist.youtube.name,
+                "videos" : VIDEO_LIST.data(playlist_videos),
             }
 
-        activity = UserActivityLog.objects.create(
-            user=user,
-            activity_type="Classroom Accessed" if video.playlist else "Video Accessed"
-        )
+        record_activity(user_id, "Classroom Accessed" if video.playlist else "Video Accessed")
         
         return Response({
             "video" : video_data,
@@ -501,81 +646,57 @@ class ClassroomView(APIView):
 
 class MarkVideoAsCompletedView(APIView):
     def post(self, request):
-        id_token = request.data.get("idToken")
         vid = request.data.get("videoId")
 
-        if not id_token or not vid:
-            return Response({"error": "Missing idToken or videoId"}, status=400)
+        if not vid:
+            return Response({"error": "Missing videoId"}, status=400)
         
-        try:
-            decoded = verify_firebase_token(id_token)
-            uid = decoded["uid"]
-            user = UserProfile.objects.get(uid=uid)
-        except UserProfile.DoesNotExist:
-            return Response({"error": "User not found"}, status=404)
+        user = request.user.profile
         
         try:
-            video = Video.objects.get(user=user, vid=vid)
+            video = Video.objects.get(user=user, youtube_id=vid)
         except Video.DoesNotExist:
             return Response({"error": "Video not found"}, status=404)
 
-        video.is_completed = True
-        video.watch_progress = 100
-        video.save()
+        mark_video_completed(video)
 
-        user.xp += 10  # Example XP for completing a video
-        user.level = (user.xp // 100) + 1  # Example level calculation
-        user.save()
+        award_xp(user.id, 10, "Video Marked as Completed")  # Example XP for completing a video
 
-        activity = UserActivityLog.objects.create(
-            user = user,
-            activity_type = "Video Marked as Completed"
-        )
+        record_activity(user.id, "Video Marked as Completed")
 
         return Response({"message": "Video marked as completed"}, status=200)
     
 class DeleteVideo(APIView):
     def post(self, request):
-        id_token = request.data.get("idToken")
         vid = request.data.get("videoId")
 
-        if not id_token or not vid:
-            return Response({"error": "Missing idToken or videoId"}, status=400)
+        if not vid:
+            return Response({"error": "Missing videoId"}, status=400)
         
-        try:
-            decoded = verify_firebase_token(id_token)
-            uid = decoded["uid"]
-            user = UserProfile.objects.get(uid=uid)
-        except UserProfile.DoesNotExist:
-            return Response({"error": "User not found"}, status=404)
+        user_id = request.user.profile_id
         
         try:
-            video = Video.objects.get(user=user, vid=vid)
-            video.delete()
+            video = Video.objects.get(user_id=user_id, youtube_id=vid)
+            delete_video(video)
             return Response({"message": "Video deleted successfully"}, status=200)
         except Video.DoesNotExist:
             return Response({"error": "Video not found"}, status=404)
         
 class DeletePlaylist(APIView):
     def post(self, request):
-        id_token = request.data.get("idToken")
         pid = request.data.get("playlistId")
 
-        if not id_token or not pid:
-            return Response({"error": "Missing idToken or playlistId"}, status=400)
+        if not pid:
+            return Response({"error": "Missing playlistId"}, status=400)
         
-        try:
-            decoded = verify_firebase_token(id_token)
-            uid = decoded["uid"]
-            user = UserProfile.objects.get(uid=uid)
-        except UserProfile.DoesNotExist:
-            return Response({"error": "User not found"}, status=404)
+        user_id = request.user.profile_id
         
         try:
-            playlist = Playlist.objects.get(user=user, pid=pid)
+            playlist = Playlist.objects.get(user_id=user_id, youtube_id=pid)
             playlist_videos = Video.objects.filter(playlist=playlist)
             deleted_count, details = playlist_videos.delete()  # Delete all videos in the playlist
             playlist.delete()
+            bump_version(user_id, LIBRARY, CERTIFICATES)
             return Response({"message": "Playlist and Videos associated with it deleted successfully"}, status=200)
         except Playlist.DoesNotExist:
             return Response({"error": "Playlist not found"}, status=404)
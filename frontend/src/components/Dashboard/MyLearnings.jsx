@@ -181,9 +181,6 @@ const MyLearnings = () => {
 
                                     <div className="flex-1">
                                         <h3 className="font-semibold text-gray-800">{video.name}</h3>
-                                        <p className="text-sm text-gray-600 truncate max-w-xs">
-                                            {video.description || "No description"}
-                                        </p>
 
                                         <div className="mt-2 w-full bg-gray-200 h-2 rounded">
                                             <div
@@ -282,9 +279,6 @@ const MyLearnings = () => {
 
                                                     <div className="flex-1">
                                                         <h4 className="text-sm font-medium">{video.name}</h4>
-                                                        <p className="text-xs text-gray-500 line-clamp-1">
-                                                            {video.description || "No description"}
-                                                        </p>
 
                                                         <div className="w-full bg-gray-200 rounded-full h-2 mt-1">
                                                             <div